@@ -0,0 +1,87 @@
+"""
+Fan-out cost of the live status stream (StatusBroadcaster).
+
+For N idle subscribers, each waiting in get() on its own task as a stream
+would, every one of them watching a different package:
+- "miss": cost of a transition that matches none of them,
+- "hit": cost of a transition that matches one of them,
+both in microseconds per transition. Neither should grow with N: a
+transition only visits the subscribers it matches.
+
+Also prints the memory per idle subscriber (subscription, index entry and
+waiting task), and the cost per delivered event when every subscriber is
+unfiltered and gets every transition.
+
+Usage:
+    python -m benchmarks.bench_broadcast [subscribers ...]
+"""
+import asyncio
+import logging
+import sys
+import time
+import tracemalloc
+from typing import List
+
+from src.adapters.events.broadcaster import StatusBroadcaster
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+
+TRANSITIONS = 20_000
+UNFILTERED_TRANSITIONS = 20
+
+
+async def _drain(subscription) -> None:
+    while True:
+        await subscription.get()
+
+
+def _per_transition(broadcaster: StatusBroadcaster, package: Package, count: int) -> float:
+    started = time.perf_counter()
+    for _ in range(count):
+        broadcaster.on_status_changed(package, PackageStatus.READY)
+    return (time.perf_counter() - started) / count
+
+
+async def _run(size: int) -> None:
+    broadcaster = StatusBroadcaster(queue_size=TRANSITIONS + 1)
+
+    tracemalloc.start()
+    subscriptions = [broadcaster.subscribe(package_ids=[f"package-{i}"]) for i in range(size)]
+    tasks = [asyncio.create_task(_drain(subscription)) for subscription in subscriptions]
+    # Let every task reach its get() and park there
+    await asyncio.sleep(0)
+    bytes_per_subscriber = tracemalloc.get_traced_memory()[0] / size
+    tracemalloc.stop()
+
+    miss = _per_transition(broadcaster, Package("Calle 1", PackageStatus.IN_TRANSIT, "nobody"), TRANSITIONS)
+    hit = _per_transition(broadcaster, Package("Calle 1", PackageStatus.IN_TRANSIT, "package-0"), TRANSITIONS)
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    broadcaster.close()
+
+    broadcaster = StatusBroadcaster(queue_size=UNFILTERED_TRANSITIONS)
+    for _ in range(size):
+        broadcaster.subscribe()
+    fan_out = _per_transition(
+        broadcaster, Package("Calle 1", PackageStatus.IN_TRANSIT, "package-0"), UNFILTERED_TRANSITIONS
+    )
+    broadcaster.close()
+
+    print(
+        f"{size:>12} {miss * 1e6:>8.2f} {hit * 1e6:>8.2f} {bytes_per_subscriber:>10.0f}"
+        f" {fan_out / size * 1e9:>16.0f}",
+        flush=True,
+    )
+
+
+async def main(sizes: List[int]) -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    print(f"{'subscribers':>12} {'miss us':>8} {'hit us':>8} {'B/idle sub':>10} {'ns/unfiltered':>16}")
+    for size in sizes:
+        await _run(size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 50_000]))
@@ -0,0 +1,95 @@
+"""
+Cost of the transition history (InMemoryTransitionHistory).
+
+Records N transitions spread over N / 4 packages and 31 days, then prints:
+- the time to record one transition,
+- the memory held per transition (packages' records, hourly counters),
+- the time of a 31-day count_by_hour() query, read from the hourly
+  counters, vs counting the same window by scanning every package history.
+
+Usage:
+    python -m benchmarks.bench_history [transitions ...]
+"""
+import asyncio
+import gc
+import sys
+import time
+import tracemalloc
+from typing import List
+
+from src.adapters.history.in_memory_history import HOUR, InMemoryTransitionHistory
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+
+DAYS = 31
+# READY -> IN_TRANSIT -> FAILED_ATTEMPT -> IN_TRANSIT -> DELIVERED
+PATH = (PackageStatus.IN_TRANSIT, PackageStatus.FAILED_ATTEMPT, PackageStatus.IN_TRANSIT, PackageStatus.DELIVERED)
+
+
+class SteppingClock:
+    def __init__(self, step: float):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self) -> float:
+        self.now += self.step
+        return self.now
+
+
+def _record(packages: List[Package], clock: SteppingClock) -> InMemoryTransitionHistory:
+    history = InMemoryTransitionHistory(clock=clock)
+    for package in packages:
+        package.status = PackageStatus.READY
+    for new_status in PATH:
+        for package in packages:
+            previous = package.status
+            package.status = new_status
+            history.on_status_changed(package, previous)
+    return history
+
+
+async def _run(size: int) -> None:
+    packages = [Package(customer_address="Calle 1") for _ in range(size // len(PATH))]
+
+    # Timed and measured in separate passes: tracemalloc slows allocations down
+    step = DAYS * 24 * HOUR / size
+    tracemalloc.start()
+    history = _record(packages, SteppingClock(step))
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del history
+    gc.collect()
+
+    clock = SteppingClock(step)
+    started = time.perf_counter()
+    history = _record(packages, clock)
+    record_seconds = time.perf_counter() - started
+    end = clock.now + 1
+    gc.collect()
+
+    started = time.perf_counter()
+    counts = await history.count_by_hour(0, end)
+    bucket_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scanned = 0
+    for package in packages:
+        scanned += len(await history.get_package_history(package.id, 0, end))
+    scan_seconds = time.perf_counter() - started
+    assert scanned == sum(sum(by_status.values()) for by_status in counts.values()) == len(history)
+
+    print(
+        f"{len(history):>12} {record_seconds / len(history) * 1e6:>10.2f} {held / len(history):>8.1f}"
+        f" {bucket_seconds * 1000:>10.3f} {scan_seconds * 1000:>10.1f}",
+        flush=True,
+    )
+
+
+async def main(sizes: List[int]) -> None:
+    print(f"{'transitions':>12} {'record us':>10} {'B/trans':>8} {'hourly ms':>10} {'scan ms':>10}")
+    for size in sizes:
+        await _run(size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]))
@@ -0,0 +1,112 @@
+"""
+Journal benchmark: PATCH latency with group commit, and recovery time.
+
+1. Latency: CONCURRENCY coroutines apply transitions through the use case
+   on a repository without journal and on one journaling to disk, and the
+   p50/p99 latency of each transition is reported. Group commit lets
+   concurrent transitions share one fsync.
+2. Recovery: for each size, builds a data directory holding a snapshot of
+   that many packages plus a log tail of 10% transitions, then times
+   InMemoryPackageRepository.open() rebuilding the state from it.
+
+Usage:
+    python -m benchmarks.bench_journal [packages ...]     (default: 100000 1000000)
+"""
+import asyncio
+import logging
+import statistics
+import sys
+import tempfile
+import time
+
+from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
+from src.adapters.repository.journal import PackageJournal
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.use_cases.update_package_status import UpdatePackageStatusUseCase
+
+CONCURRENCY = 100
+LATENCY_PACKAGES = 20_000
+CHUNK_SIZE = 100_000
+
+
+def _percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def _patch_latencies(repository: InMemoryPackageRepository):
+    packages = [Package(customer_address=f"Calle {i}") for i in range(LATENCY_PACKAGES)]
+    await repository.preload_packages(packages)
+    use_case = UpdatePackageStatusUseCase(repository)
+    latencies = []
+
+    async def worker(offset: int) -> None:
+        for package in packages[offset::CONCURRENCY]:
+            started = time.perf_counter()
+            await use_case.execute(package.id, PackageStatus.IN_TRANSIT)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(CONCURRENCY)))
+    return latencies, len(latencies) / (time.perf_counter() - started)
+
+
+async def bench_latency() -> None:
+    print(f"PATCH latency, {CONCURRENCY} concurrent writers")
+    print(f"{'repository':>20} {'ops/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    latencies, throughput = await _patch_latencies(InMemoryPackageRepository())
+    print(f"{'no journal':>20} {throughput:>10.0f} {statistics.median(latencies) * 1e3:>8.3f} "
+          f"{_percentile(latencies, 0.99) * 1e3:>8.3f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        repository = InMemoryPackageRepository(journal=PackageJournal(directory), snapshot_every=10**9)
+        await repository.open()
+        latencies, throughput = await _patch_latencies(repository)
+        await repository.close()
+    print(f"{'journal + fsync':>20} {throughput:>10.0f} {statistics.median(latencies) * 1e3:>8.3f} "
+          f"{_percentile(latencies, 0.99) * 1e3:>8.3f}")
+
+
+async def bench_recovery(packages: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        repository = InMemoryPackageRepository(journal=PackageJournal(directory), snapshot_every=10**12)
+        await repository.open()
+        ids = []
+        for start in range(0, packages, CHUNK_SIZE):
+            chunk = [Package(customer_address=f"Calle {i}") for i in range(start, min(start + CHUNK_SIZE, packages))]
+            ids.extend(p.id for p in chunk)
+            await repository.preload_packages(chunk)
+        await repository.snapshot()
+        tail = ids[: packages // 10]
+        for start in range(0, len(tail), CHUNK_SIZE):
+            await repository.transition_many([
+                (package_id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+                for package_id in tail[start:start + CHUNK_SIZE]
+            ])
+        await repository._journal.close()
+        del repository
+
+        recovered = InMemoryPackageRepository(journal=PackageJournal(directory))
+        started = time.perf_counter()
+        await recovered.open()
+        elapsed = time.perf_counter() - started
+        counts = await recovered.count_by_status()
+        assert counts[PackageStatus.IN_TRANSIT] == len(tail)
+        await recovered._journal.close()
+    print(f"{packages:>12} {len(tail):>12} {elapsed:>10.2f}")
+
+
+async def main(sizes) -> None:
+    await bench_latency()
+    print()
+    print("Recovery time (snapshot + log tail)")
+    print(f"{'packages':>12} {'tail recs':>12} {'seconds':>10}")
+    for size in sizes:
+        await bench_recovery(size)
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    asyncio.run(main(sizes))
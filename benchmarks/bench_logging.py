@@ -0,0 +1,98 @@
+"""
+PATCH latency with the old synchronous logging setup vs the queue-based one.
+
+- sync/DEBUG: StreamHandler + RotatingFileHandler attached directly to the
+  root logger, with every hot-path message enabled (what each PATCH used to
+  emit at INFO before those messages were downgraded to DEBUG).
+- queue/DEBUG: same messages, but written by a QueueListener thread.
+- queue/INFO: the new default, hot-path messages filtered out.
+
+Requests go through the real app with httpx.ASGITransport. The notification
+adapter is replaced by a no-op one to keep its simulated latency out of the
+numbers.
+Console output is written to a file in a temporary directory so the terminal
+is not flooded.
+
+Usage:
+    python -m benchmarks.bench_logging [requests] [concurrency]
+"""
+import asyncio
+import logging
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.api.dependencies import build_container
+from src.api.main import create_app
+from src.domain.entities import Package
+from src.logger import BoundedQueueHandler, stop_logging
+
+from benchmarks.common import NullNotifier
+
+
+def _configure(mode: str, level: int, directory: str):
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+    formatter = logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    console = logging.StreamHandler(open(os.path.join(directory, f"{mode}-console.log"), "w"))
+    file_handler = RotatingFileHandler(os.path.join(directory, f"{mode}-app.log"), encoding="utf-8")
+    for handler in (console, file_handler):
+        handler.setFormatter(formatter)
+    if mode == "sync":
+        root.addHandler(console)
+        root.addHandler(file_handler)
+        return None
+    log_queue = queue.Queue(maxsize=10_000)
+    root.addHandler(BoundedQueueHandler(log_queue, overflow="drop"))
+    listener = QueueListener(log_queue, console, file_handler)
+    listener.start()
+    return listener
+
+
+async def _run(app: FastAPI, requests: int, concurrency: int):
+    repository = app.state.container.repository
+    await repository.clear()
+    packages = [Package(customer_address=f"Calle {i}") for i in range(requests)]
+    await repository.preload_packages(packages)
+    latencies = []
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        async def worker(offset: int) -> None:
+            for package in packages[offset::concurrency]:
+                started = time.perf_counter()
+                response = await client.patch(f"/packages/{package.id}/status", json={"status": "IN_TRANSIT"})
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies
+
+
+async def main(requests: int, concurrency: int) -> None:
+    stop_logging()
+    app = create_app(build_container(notification_adapter=NullNotifier()), configure_logging=False)
+    print(f"{requests} PATCH requests, concurrency {concurrency}")
+    print(f"{'logging':>14} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode, level in (("sync", logging.DEBUG), ("queue", logging.DEBUG), ("queue", logging.INFO)):
+            listener = _configure(mode, level, directory)
+            latencies = sorted(await _run(app, requests, concurrency))
+            if listener:
+                listener.stop()
+            name = f"{mode}/{logging.getLevelName(level)}"
+            print(f"{name:>14} {statistics.median(latencies) * 1e3:>8.3f} "
+                  f"{latencies[int(len(latencies) * 0.99)] * 1e3:>8.3f} {latencies[-1] * 1e3:>8.3f}")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(count, concurrency))
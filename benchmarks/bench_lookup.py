@@ -0,0 +1,65 @@
+"""
+Cost of reading the status of some packages as the fleet grows.
+
+Through httpx.ASGITransport, with N packages in the in-memory repository:
+- "list+filter": GET /packages and picking one package client-side, the
+  only way before GET /packages/{package_id} existed,
+- "get": GET /packages/{package_id},
+- "lookup": POST /packages:lookup of LOOKUP_IDS ids,
+each the best of ROUNDS, in milliseconds. Only "list+filter" should grow
+with N.
+
+Usage:
+    python -m benchmarks.bench_lookup [packages ...]
+"""
+import asyncio
+import logging
+import sys
+import time
+from typing import Awaitable, Callable, List
+
+from httpx import AsyncClient, ASGITransport
+
+from src.api.dependencies import build_container
+from src.api.main import create_app
+from src.domain.entities import Package
+
+ROUNDS = 5
+LOOKUP_IDS = 100
+
+
+async def _best(request: Callable[[], Awaitable]) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        await request()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+async def main(sizes: List[int]) -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    app = create_app(build_container(), configure_logging=False)
+    repository = app.state.container.repository
+
+    print(f"{'packages':>9} {'list+filter ms':>15} {'get ms':>8} {f'lookup({LOOKUP_IDS}) ms':>16}")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        for size in sizes:
+            await repository.clear()
+            packages = [Package(customer_address=f"Calle {i}, Madrid") for i in range(size)]
+            await repository.preload_packages(packages)
+            target = packages[size // 2].id
+            ids = [package.id for package in packages[:: max(1, size // LOOKUP_IDS)][:LOOKUP_IDS]]
+
+            async def list_and_filter():
+                response = await client.get("/packages")
+                return next(p for p in response.json() if p["id"] == target)
+
+            listing = await _best(list_and_filter)
+            single = await _best(lambda: client.get(f"/packages/{target}"))
+            lookup = await _best(lambda: client.post("/packages:lookup", json={"ids": ids}))
+            print(f"{size:>9} {listing * 1000:>15.2f} {single * 1000:>8.2f} {lookup * 1000:>16.2f}", flush=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]] or [1_000, 100_000]))
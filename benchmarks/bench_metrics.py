@@ -0,0 +1,142 @@
+"""
+Cost of the metrics instrumentation.
+
+- Micro: nanoseconds per Counter.inc() and Histogram.observe().
+- PATCH: latency and throughput of PATCH /packages/{id}/status through
+  httpx.ASGITransport, on an app whose routes are plain APIRoutes and whose
+  repository / use-case metrics are replaced by no-ops ("off"), vs the real
+  instrumented routes and metrics ("on").
+
+The notification adapter is replaced by a no-op one, as in bench_logging.
+
+Usage:
+    python -m benchmarks.bench_metrics [requests] [concurrency]
+"""
+import asyncio
+import logging
+import sys
+import time
+
+from fastapi import APIRouter, FastAPI
+from fastapi.routing import APIRoute
+from httpx import ASGITransport, AsyncClient
+
+from src.adapters.repository import in_memory_repository
+from src.api import routers
+from src.api.dependencies import AppContainer, build_container
+from src.domain.entities import Package
+from src.metrics import Counter, Histogram, MetricsRegistry
+from src.use_cases import update_package_status
+
+from benchmarks.common import NullNotifier, latency_summary
+
+MICRO_ITERATIONS = 1_000_000
+ROUNDS = 5
+
+
+class _NullMetric:
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+def _micro() -> None:
+    registry = MetricsRegistry()
+    counter = Counter("bench_total", "Bench.", registry=registry)
+    histogram = Histogram("bench_seconds", "Bench.", registry=registry)
+    for name, operation in (("Counter.inc", counter.inc), ("Histogram.observe", histogram.observe)):
+        started = time.perf_counter()
+        for _ in range(MICRO_ITERATIONS):
+            operation(0.003)
+        elapsed = time.perf_counter() - started
+        print(f"{name:>18}: {elapsed / MICRO_ITERATIONS * 1e9:.0f} ns/op")
+
+
+def _build_app(instrumented: bool, container: AppContainer) -> FastAPI:
+    if instrumented:
+        router = routers.router
+    else:
+        router = APIRouter()
+        # HTTP routes only: the benchmark never opens the live WebSocket
+        for route in routers.router.routes:
+            if not isinstance(route, APIRoute):
+                continue
+            router.add_api_route(
+                route.path, route.endpoint, methods=list(route.methods),
+                response_model=route.response_model, status_code=route.status_code,
+            )
+    app = FastAPI()
+    app.state.container = container
+    app.include_router(router)
+    return app
+
+
+def _set_metrics(enabled: bool, originals: dict) -> None:
+    if enabled:
+        for (module, name), value in originals.items():
+            setattr(module, name, value)
+        return
+    null = _NullMetric()
+    in_memory_repository.LOCK_WAIT_SECONDS = null
+    in_memory_repository.LOCK_HOLD_SECONDS = null
+    update_package_status.STATUS_UPDATE_RETRIES = null
+    update_package_status._OUTCOME_COUNTERS = {
+        outcome: null for outcome in update_package_status.StatusUpdateOutcome
+    }
+
+
+async def _run(app: FastAPI, requests: int, concurrency: int):
+    repository = app.state.container.repository
+    await repository.clear()
+    packages = [Package(customer_address=f"Calle {i}") for i in range(requests)]
+    await repository.preload_packages(packages)
+    latencies = []
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        async def worker(offset: int) -> None:
+            for package in packages[offset::concurrency]:
+                started = time.perf_counter()
+                response = await client.patch(f"/packages/{package.id}/status", json={"status": "IN_TRANSIT"})
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return requests / elapsed, latencies
+
+
+async def main(requests: int, concurrency: int) -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    container = build_container(notification_adapter=NullNotifier())
+    _micro()
+
+    originals = {
+        (in_memory_repository, "LOCK_WAIT_SECONDS"): in_memory_repository.LOCK_WAIT_SECONDS,
+        (in_memory_repository, "LOCK_HOLD_SECONDS"): in_memory_repository.LOCK_HOLD_SECONDS,
+        (update_package_status, "STATUS_UPDATE_RETRIES"): update_package_status.STATUS_UPDATE_RETRIES,
+        (update_package_status, "_OUTCOME_COUNTERS"): update_package_status._OUTCOME_COUNTERS,
+    }
+    apps = {False: _build_app(False, container), True: _build_app(True, container)}
+
+    print(f"{requests} PATCH requests, concurrency {concurrency}, best of {ROUNDS}")
+    print(f"{'metrics':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    best = {}
+    for _ in range(ROUNDS):
+        # Alternate modes so drift (GC, CPU frequency) affects both alike
+        for enabled in (False, True):
+            _set_metrics(enabled, originals)
+            throughput, latencies = await _run(apps[enabled], requests, concurrency)
+            if enabled not in best or throughput > best[enabled][0]:
+                best[enabled] = (throughput, latency_summary(latencies))
+    for enabled in (False, True):
+        throughput, summary = best[enabled]
+        print(f"{'on' if enabled else 'off':>8} {throughput:>8.0f} {summary['p50_ms']:>8.3f} {summary['p99_ms']:>8.3f}")
+    print(f"overhead: {(1 - best[True][0] / best[False][0]) * 100:.1f}% throughput")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(count, concurrency))
@@ -0,0 +1,138 @@
+"""
+Cost and behaviour of the notification outbox (FileOutbox + OutboxDispatcher).
+
+1. record: time to record one transition in the outbox, in memory only
+   and written to a file (group commit by the writer task, included).
+2. outage: the receiver is down while N transitions happen, then comes
+   back. Prints the events held in memory at the end of the outage (at
+   most MAX_IN_MEMORY: the rest waits on disk), the file size, the lag
+   reported by the outbox_lag_seconds gauge, and how fast the dispatcher
+   drains the backlog once deliveries succeed again, checking that every
+   event arrived and each package's events in order.
+
+Usage:
+    python -m benchmarks.bench_outbox [events ...]
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from src.adapters.outbox.dispatcher import OutboxDispatcher
+from src.adapters.outbox.file_outbox import FileOutbox
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.ports.notification import NotificationPort
+
+MAX_IN_MEMORY = 10_000
+BATCH_SIZE = 100
+PACKAGES = 1_000
+# READY -> IN_TRANSIT -> FAILED_ATTEMPT -> IN_TRANSIT -> DELIVERED
+PATH = (PackageStatus.IN_TRANSIT, PackageStatus.FAILED_ATTEMPT, PackageStatus.IN_TRANSIT, PackageStatus.DELIVERED)
+
+
+class SwitchableReceiver(NotificationPort):
+    """
+    Receiver that fails while `down`, and otherwise takes `latency`
+    seconds per batch and records what it got.
+    """
+
+    def __init__(self, latency: float):
+        self.down = True
+        self.latency = latency
+        self.received: Dict[str, List[PackageStatus]] = {}
+        self.count = 0
+
+    async def deliver_status_changes(self, events) -> None:
+        if self.down:
+            raise ConnectionError("receiver down")
+        await asyncio.sleep(self.latency)
+        for event in events:
+            self.received.setdefault(event.package_id, []).append(event.status)
+        self.count += len(events)
+
+
+async def _transitions(outbox: FileOutbox, count: int, packages: List[Package]) -> None:
+    """
+    Records `count` transitions, walking every package down PATH, yielding
+    to the event loop every BATCH_SIZE of them as concurrent requests would.
+    """
+    for i in range(count):
+        package = packages[i % len(packages)]
+        previous = package.status
+        package.status = PATH[(i // len(packages)) % len(PATH)]
+        outbox.on_status_changed(package, previous)
+        if i % BATCH_SIZE == 0:
+            await asyncio.sleep(0)
+
+
+async def _record(count: int, path: Optional[str]) -> float:
+    outbox = FileOutbox(path, max_in_memory=count)
+    await outbox.open()
+    packages = [Package(customer_address="Calle 1") for _ in range(PACKAGES)]
+    started = time.perf_counter()
+    await _transitions(outbox, count, packages)
+    await outbox.close()
+    return (time.perf_counter() - started) / count
+
+
+async def _outage(count: int, path: str) -> None:
+    outbox = FileOutbox(path, max_in_memory=MAX_IN_MEMORY)
+    await outbox.open()
+    receiver = SwitchableReceiver(latency=0.001)
+    dispatcher = OutboxDispatcher(outbox, receiver, batch_size=BATCH_SIZE, backoff_base=0.05, backoff_max=0.05)
+    dispatcher.start()
+
+    packages = [Package(customer_address="Calle 1") for _ in range(PACKAGES)]
+    started = time.perf_counter()
+    await _transitions(outbox, count, packages)
+    while outbox._buffer:
+        await asyncio.sleep(0.01)
+    outage = time.perf_counter() - started
+    in_memory, pending, lag = len(outbox._events), outbox.pending(), outbox.lag()
+    file_size = os.path.getsize(outbox.file_path)
+
+    receiver.down = False
+    started = time.perf_counter()
+    await dispatcher.stop(drain_timeout=600)
+    drain = time.perf_counter() - started
+    await outbox.close()
+
+    expected = {}
+    for i in range(count):
+        expected.setdefault(packages[i % len(packages)].id, []).append(PATH[(i // len(packages)) % len(PATH)])
+    in_order = all(receiver.received.get(package_id) == statuses for package_id, statuses in expected.items())
+    print(
+        f"{count:>10} {outage:>8.2f} {in_memory:>10} {pending:>10} {file_size / 2**20:>8.1f} {lag:>7.2f}"
+        f" {drain:>8.2f} {receiver.count / drain:>10.0f} {receiver.count == count and in_order!s:>9}",
+        flush=True,
+    )
+
+
+async def main(sizes: List[int]) -> None:
+    logging.getLogger().setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as directory:
+        print("record: microseconds per transition")
+        print(f"{'events':>10} {'memory':>9} {'file':>9}")
+        for size in sizes:
+            memory = await _record(size, None)
+            persisted = await _record(size, os.path.join(directory, f"record-{size}.log"))
+            print(f"{size:>10} {memory * 1e6:>9.2f} {persisted * 1e6:>9.2f}", flush=True)
+
+        print(
+            f"\noutage: events recorded while the receiver is down ({MAX_IN_MEMORY} held in memory at most),"
+            f" then drained {BATCH_SIZE} per delivery at 1 ms each"
+        )
+        print(
+            f"{'events':>10} {'outage s':>8} {'in memory':>10} {'pending':>10} {'file MiB':>8} {'lag s':>7}"
+            f" {'drain s':>8} {'events/s':>10} {'in order':>9}"
+        )
+        for size in sizes:
+            await _outage(size, os.path.join(directory, f"outage-{size}.log"))
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]))
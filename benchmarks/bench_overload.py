@@ -0,0 +1,200 @@
+"""
+PATCH latency under overload, without and with admission control.
+
+The app runs in process (httpx.ASGITransport) over a repository standing
+for a storage that is the bottleneck: each transition holds one of
+STORAGE_CONNECTIONS connections for STORAGE_LATENCY seconds, so updates
+pile up waiting for a connection well before the CPU is busy (client and
+server share one event loop here). Its capacity is first measured with a
+closed loop, then requests are sent open loop (at a fixed rate, whatever
+the answers) and latency is counted from the time each request was due.
+
+1. overload: `overload` x the capacity, with the concurrency limiter
+   effectively off vs on (2 x STORAGE_CONNECTIONS in flight and the
+   settings' ADMISSION_MAX_QUEUE / ADMISSION_MAX_QUEUE_DELAY): goodput
+   (200s per second), share of requests shed with 503, and p50/p99 of
+   the 200s.
+2. noisy client: one client at 2 x the capacity next to a polite one at
+   a tenth of it, with the per-client rate limit off vs set to half the
+   capacity: latency of the polite client's requests, and how many of
+   the noisy client's got 429.
+
+Usage:
+    python -m benchmarks.bench_overload [seconds] [overload]
+"""
+import asyncio
+import logging
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from httpx import ASGITransport, AsyncClient
+
+from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
+from src.api.admission import ConcurrencyLimiter, TokenBucketLimiter
+from src.api.dependencies import AppContainer, build_container
+from src.api.main import create_app
+from src.config import settings
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+
+from benchmarks.common import NullNotifier, latency_summary
+
+CLIENT_HEADER = "X-Client-Id"
+STORAGE_CONNECTIONS = 4
+STORAGE_LATENCY = 0.02
+CAPACITY_CONCURRENCY = 32
+CAPACITY_REQUESTS = 1_000
+UNLIMITED = 1_000_000_000
+
+
+class SlowStorageRepository(InMemoryPackageRepository):
+    """
+    In-memory repository whose transitions wait for one of `connections`
+    connections and hold it `latency` seconds, as a database round trip.
+    """
+
+    def __init__(self, connections: int, latency: float):
+        super().__init__()
+        self._connections = asyncio.Semaphore(connections)
+        self._latency = latency
+
+    async def transition(self, package_id: str, expected_status: PackageStatus, new_status: PackageStatus) -> Package:
+        async with self._connections:
+            await asyncio.sleep(self._latency)
+            return await super().transition(package_id, expected_status, new_status)
+
+
+class _Run:
+    def __init__(self, container: AppContainer):
+        self.container = container
+        self.client = AsyncClient(
+            transport=ASGITransport(app=create_app(container, configure_logging=False)),
+            base_url="http://testserver",
+        )
+        self._packages: List[str] = []
+
+    async def packages(self, count: int) -> List[str]:
+        if len(self._packages) < count:
+            fresh = [Package(customer_address=f"Calle {i}") for i in range(count * 2)]
+            await self.container.repository.preload_packages(fresh)
+            self._packages += [package.id for package in fresh]
+        taken, self._packages = self._packages[:count], self._packages[count:]
+        return taken
+
+    async def patch(self, package_id: str, client_id: str = "scanner") -> int:
+        response = await self.client.patch(
+            f"/packages/{package_id}/status", json={"status": "IN_TRANSIT"}, headers={CLIENT_HEADER: client_id}
+        )
+        return response.status_code
+
+
+async def _capacity(run: _Run) -> float:
+    package_ids = await run.packages(CAPACITY_REQUESTS)
+
+    async def worker(offset: int) -> None:
+        for package_id in package_ids[offset::CAPACITY_CONCURRENCY]:
+            await run.patch(package_id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(CAPACITY_CONCURRENCY)))
+    return CAPACITY_REQUESTS / (time.perf_counter() - started)
+
+
+async def _open_loop(
+    run: _Run, streams: Dict[str, float], seconds: float
+) -> Tuple[float, Dict[str, Tuple[Counter, List[float]]]]:
+    """
+    Sends each client's requests at its rate (requests/s) for `seconds`;
+    returns the time until the last answer and, per client, the count of
+    each status code and the latencies of the 200s.
+    """
+    results: Dict[str, Tuple[Counter, List[float]]] = {name: (Counter(), []) for name in streams}
+    tasks = []
+
+    async def send(client_id: str, package_id: str, due: float) -> None:
+        code = await run.patch(package_id, client_id)
+        codes, latencies = results[client_id]
+        codes[code] += 1
+        if code == 200:
+            latencies.append(time.perf_counter() - due)
+
+    async def stream(client_id: str, rate: float) -> None:
+        package_ids = await run.packages(int(rate * seconds) + 1)
+        started = time.perf_counter()
+        for i, package_id in enumerate(package_ids):
+            due = started + i / rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(client_id, package_id, due)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(stream(client_id, rate) for client_id, rate in streams.items()))
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - started, results
+
+
+def _row(name: str, codes: Counter, latencies: List[float], elapsed: float) -> str:
+    total = sum(codes.values())
+    summary = latency_summary(latencies) or {"p50_ms": 0.0, "p99_ms": 0.0}
+    return (
+        f"{name:>24} {codes[200] / elapsed:>9.0f} {codes[503] / total:>7.1%} {codes[429] / total:>7.1%}"
+        f" {summary['p50_ms']:>9.1f} {summary['p99_ms']:>9.1f}"
+    )
+
+
+def _build(admission: bool, rate_limit: Optional[float]) -> _Run:
+    container = build_container(
+        repository=SlowStorageRepository(STORAGE_CONNECTIONS, STORAGE_LATENCY),
+        notification_adapter=NullNotifier(),
+    )
+    if admission:
+        container.concurrency_limiter = ConcurrencyLimiter(
+            2 * STORAGE_CONNECTIONS, settings.admission_max_queue, settings.admission_max_queue_delay
+        )
+    else:
+        container.concurrency_limiter = ConcurrencyLimiter(UNLIMITED, UNLIMITED, float(UNLIMITED))
+    if rate_limit:
+        container.rate_limiter = TokenBucketLimiter(rate_limit, max(1, int(rate_limit)))
+    return _Run(container)
+
+
+async def main(seconds: float, overload: float) -> None:
+    logging.getLogger().setLevel(logging.ERROR)
+    settings.rate_limit_client_header = CLIENT_HEADER
+    header = f"{'':>24} {'ok/s':>9} {'503':>7} {'429':>7} {'p50 ms':>9} {'p99 ms':>9}"
+
+    capacity = await _capacity(_build(admission=False, rate_limit=None))
+    print(
+        f"capacity {capacity:.0f} req/s ({STORAGE_CONNECTIONS} storage connections, "
+        f"{STORAGE_LATENCY * 1000:g} ms per write); admission on: {2 * STORAGE_CONNECTIONS} in flight, "
+        f"{settings.admission_max_queue} queued, {settings.admission_max_queue_delay:g}s max queue delay"
+    )
+
+    print(f"\noverload: {overload:g} x capacity for {seconds:g}s")
+    print(header)
+    for admission in (False, True):
+        elapsed, results = await _open_loop(
+            _build(admission=admission, rate_limit=None), {"scanner": capacity * overload}, seconds
+        )
+        codes, latencies = results["scanner"]
+        print(_row("admission on" if admission else "admission off", codes, latencies, elapsed), flush=True)
+
+    print(f"\nnoisy client: 2 x capacity next to a polite client at 0.1 x, for {seconds:g}s")
+    print(header)
+    for rate_limit in (None, capacity / 2):
+        elapsed, results = await _open_loop(
+            _build(admission=True, rate_limit=rate_limit), {"noisy": capacity * 2, "polite": capacity * 0.1}, seconds
+        )
+        label = f"rate limit {rate_limit:.0f}/s" if rate_limit else "rate limit off"
+        for client_id in ("noisy", "polite"):
+            codes, latencies = results[client_id]
+            print(_row(f"{label}, {client_id}", codes, latencies, elapsed), flush=True)
+
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    factor = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    asyncio.run(main(duration, factor))
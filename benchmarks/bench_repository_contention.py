@@ -0,0 +1,130 @@
+"""
+Contention benchmark for the in-memory repository lock, on the real write
+path.
+
+WRITERS concurrent writers apply status changes spread over a growing
+number of distinct packages, through:
+- repository.transition() on a repository without journal,
+- repository.transition() on a repository journaling to disk (each write
+  waits for its group-commit fsync, outside the lock),
+- PATCH /packages/{id}/status, through httpx.ASGITransport on the app.
+
+The repository takes one asyncio.Lock for all writers. Its critical
+section never awaits, so on one event loop a writer holds the lock without
+anyone else running: the lock is hardly ever contended, and the throughput
+does not depend on how many packages the writers share. One lock per
+package id (a KeyedLock over a WeakValueDictionary) was measured with this
+benchmark on one core: the bare transition was ~30% slower (a lock created
+and looked up per call), and with the journal or through PATCH the
+difference was within noise, so the repository went back to a single lock.
+
+Usage:
+    python -m benchmarks.bench_repository_contention [writers]
+"""
+import asyncio
+import logging
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import httpx
+
+from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
+from src.adapters.repository.journal import PackageJournal
+from src.api.dependencies import build_container
+from src.api.main import create_app
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.domain.exceptions import StaleStatusError
+
+WRITERS = 200
+OPERATIONS_PER_WRITER = 20
+DISTINCT_PACKAGES = [1, 10, 100, 1000]
+REPEATS = 3
+# Transitions allowed back and forth, so writers can keep going
+_OTHER = {PackageStatus.IN_TRANSIT: PackageStatus.FAILED_ATTEMPT, PackageStatus.FAILED_ATTEMPT: PackageStatus.IN_TRANSIT}
+
+
+async def _repository(packages: List[Package], directory=None) -> InMemoryPackageRepository:
+    repository = InMemoryPackageRepository(journal=PackageJournal(directory) if directory else None)
+    await repository.open()
+    await repository.preload_packages(packages)
+    return repository
+
+
+async def _writers(write: Callable[[random.Random], "asyncio.Future"], writers: int) -> float:
+    async def writer(seed: int) -> None:
+        rnd = random.Random(seed)
+        for _ in range(OPERATIONS_PER_WRITER):
+            await write(rnd)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(i) for i in range(writers)))
+    return writers * OPERATIONS_PER_WRITER / (time.perf_counter() - started)
+
+
+async def _transitions(packages: List[Package], writers: int, directory=None) -> float:
+    repository = await _repository(packages, directory)
+    ids = [package.id for package in packages]
+
+    async def write(rnd: random.Random) -> None:
+        package_id = rnd.choice(ids)
+        current = (await repository.get_by_id(package_id)).status
+        try:
+            await repository.transition(package_id, current, _OTHER[current])
+        except StaleStatusError:
+            pass
+
+    ops = await _writers(write, writers)
+    if directory:
+        await repository.close()
+    return ops
+
+
+async def _patches(packages: List[Package], writers: int) -> float:
+    repository = await _repository(packages)
+    app = create_app(build_container(repository=repository), configure_logging=False)
+    ids = [package.id for package in packages]
+    statuses: Dict[int, int] = {}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def write(rnd: random.Random) -> None:
+            response = await client.patch(
+                f"/packages/{rnd.choice(ids)}/status", json={"status": rnd.choice(list(_OTHER)).value}
+            )
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        ops = await _writers(write, writers)
+    if set(statuses) - {200}:
+        print(f"    (answers: {statuses})")
+    return ops
+
+
+async def main(writers: int) -> None:
+    logging.getLogger().setLevel(logging.ERROR)
+    print(f"{writers} concurrent writers x {OPERATIONS_PER_WRITER} status changes, best of {REPEATS}")
+    print(f"{'path':>22} {'packages':>9} {'ops/s':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        runs = 0
+        for path in ("transition", "transition + journal", "PATCH"):
+            for count in DISTINCT_PACKAGES:
+                best = 0.0
+                for _ in range(REPEATS):
+                    packages = [
+                        Package(customer_address=f"Calle {i}", status=PackageStatus.IN_TRANSIT)
+                        for i in range(count)
+                    ]
+                    if path == "PATCH":
+                        ops = await _patches(packages, writers)
+                    else:
+                        runs += 1
+                        data = f"{directory}/{runs}" if path == "transition + journal" else None
+                        ops = await _transitions(packages, writers, data)
+                    best = max(best, ops)
+                print(f"{path:>22} {count:>9} {best:>10.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else WRITERS))
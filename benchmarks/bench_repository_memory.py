@@ -0,0 +1,57 @@
+"""
+Memory benchmark: bytes per package held by each in-memory repository adapter.
+
+Preloads the same packages into InMemoryPackageRepository and
+ColumnarPackageRepository and measures the memory retained by each with
+tracemalloc. Packages are created on the fly so that only what the
+repository keeps alive is counted.
+
+Usage:
+    python -m benchmarks.bench_repository_memory [packages] [distinct_addresses]
+"""
+import asyncio
+import gc
+import sys
+import tracemalloc
+
+from src.adapters.repository.columnar_repository import ColumnarPackageRepository
+from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
+from src.domain.entities import Package
+
+CHUNK_SIZE = 10_000
+
+
+async def _measure(repository_class, packages: int, addresses) -> int:
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    repository = repository_class()
+    for start in range(0, packages, CHUNK_SIZE):
+        await repository.preload_packages([
+            Package(customer_address=addresses[i % len(addresses)])
+            for i in range(start, min(start + CHUNK_SIZE, packages))
+        ])
+
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del repository
+    return retained
+
+
+async def main(packages: int, distinct_addresses: int) -> None:
+    addresses = [f"Calle Prueba {i}, Madrid" for i in range(distinct_addresses)]
+    print(f"{packages} packages, {distinct_addresses} distinct addresses")
+    print(f"{'adapter':>30} {'MiB':>10} {'bytes/package':>15}")
+    for repository_class in (InMemoryPackageRepository, ColumnarPackageRepository):
+        retained = await _measure(repository_class, packages, addresses)
+        print(f"{repository_class.__name__:>30} {retained / 2**20:>10.1f} {retained / packages:>15.0f}")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    asyncio.run(main(count, distinct))
@@ -0,0 +1,107 @@
+"""
+Cost of serializing package listings.
+
+GET /packages through httpx.ASGITransport, for N packages in the in-memory
+repository, encoded:
+- "pydantic": the default FastAPI path, returning Package objects from a
+  route with response_model=List[PackageResponse] (one model validated
+  per package, then jsonable_encoder and json.dumps),
+- "cold": the real route with an empty PackageEncoder cache (orjson only),
+- "warm": the real route again, every package's bytes cached,
+- "over capacity": the real route with a cache holding half the packages,
+  after one listing, with the share of packages served from the cache
+  (half of them: a listing larger than the cache does not evict it).
+
+Also prints the memory held by the encoder cache per package.
+
+Usage:
+    python -m benchmarks.bench_serialization [packages ...]
+"""
+import asyncio
+import logging
+import sys
+import time
+import tracemalloc
+from typing import List
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.api.dependencies import build_container
+from src.api.main import create_app
+from src.api.serialization import PACKAGE_ENCODINGS, PackageEncoder
+from src.api.schemas import PackageResponse
+from src.domain.entities import Package
+from src.ports.repository import PackageRepository
+
+ROUNDS = 3
+
+
+def _baseline_app(repository: PackageRepository) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/packages", response_model=List[PackageResponse])
+    async def list_packages():
+        return await repository.list_all()
+
+    return app
+
+
+async def _best_get(app: FastAPI, before=None) -> float:
+    best = float("inf")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        for _ in range(ROUNDS):
+            if before:
+                before()
+            started = time.perf_counter()
+            response = await client.get("/packages")
+            best = min(best, time.perf_counter() - started)
+            assert response.status_code == 200
+    return best
+
+
+async def main(sizes: List[int]) -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    app = create_app(build_container(), configure_logging=False)
+    repository = app.state.container.repository
+    baseline = _baseline_app(repository)
+    container = app.state.container
+    encoder = container.package_encoder
+    hits, misses = PACKAGE_ENCODINGS.labels("hit"), PACKAGE_ENCODINGS.labels("miss")
+
+    print(f"GET /packages, best of {ROUNDS}")
+    print(
+        f"{'packages':>9} {'pydantic ms':>12} {'cold ms':>9} {'warm ms':>9} {'speedup':>8} {'cache B/pkg':>12}"
+        f" {'over cap ms':>12} {'over cap hits':>14}"
+    )
+    for size in sizes:
+        await repository.clear()
+        await repository.preload_packages([Package(customer_address=f"Calle {i}, Madrid") for i in range(size)])
+
+        pydantic = await _best_get(baseline)
+        cold = await _best_get(app, before=encoder.clear)
+
+        encoder.clear()
+        tracemalloc.start()
+        encoder.encode_array(await repository.list_all())
+        cache_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        warm = await _best_get(app)
+
+        container.package_encoder = PackageEncoder(size // 2)
+        container.package_encoder.encode_array(await repository.list_all())
+        hits_before, misses_before = hits.value, misses.value
+        over_capacity = await _best_get(app)
+        hit_rate = (hits.value - hits_before) / (hits.value - hits_before + misses.value - misses_before)
+        container.package_encoder = encoder
+
+        print(
+            f"{size:>9} {pydantic * 1000:>12.1f} {cold * 1000:>9.1f} {warm * 1000:>9.1f}"
+            f" {pydantic / warm:>7.1f}x {cache_bytes / size:>12.0f}"
+            f" {over_capacity * 1000:>12.1f} {hit_rate:>13.0%}",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]] or [1_000, 100_000]))
@@ -0,0 +1,91 @@
+"""
+Throughput of SQLPackageRepository vs InMemoryPackageRepository under
+concurrent PATCH load.
+
+CONCURRENCY coroutines run UpdatePackageStatusUseCase.execute() over
+PACKAGES packages (READY -> IN_TRANSIT), plus one transition_many() batch of
+the same size, on each adapter. Then the same coroutines read a hot set of
+HOT_PACKAGES packages over and over (get_by_id), as scanners re-reading the
+packages being handled right now. The SQL adapter uses a SQLite file in a
+temporary directory, alone and behind a CachingPackageRepository.
+
+Usage:
+    python -m benchmarks.bench_sql_repository [packages] [pool_size]
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from src.adapters.repository.caching_repository import CachingPackageRepository
+from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
+from src.adapters.repository.sql_repository import SQLPackageRepository
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.use_cases.update_package_status import UpdatePackageStatusUseCase
+
+CONCURRENCY = 50
+HOT_PACKAGES = 100
+HOT_READS = 20
+
+
+async def _run(repository, packages: int):
+    await repository.open()
+    singles = [Package(customer_address=f"Calle {i}") for i in range(packages)]
+    batched = [Package(customer_address=f"Calle {i}") for i in range(packages)]
+    started = time.perf_counter()
+    await repository.preload_packages(singles + batched)
+    preload_rate = 2 * packages / (time.perf_counter() - started)
+
+    use_case = UpdatePackageStatusUseCase(repository)
+
+    async def worker(offset: int) -> None:
+        for package in singles[offset::CONCURRENCY]:
+            await use_case.execute(package.id, PackageStatus.IN_TRANSIT)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(CONCURRENCY)))
+    patch_rate = packages / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await use_case.execute_many([(p.id, PackageStatus.IN_TRANSIT) for p in batched])
+    batch_rate = packages / (time.perf_counter() - started)
+
+    hot = singles[:HOT_PACKAGES]
+
+    async def reader() -> None:
+        for _ in range(HOT_READS):
+            for package in hot:
+                await repository.get_by_id(package.id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(reader() for _ in range(CONCURRENCY)))
+    hot_rate = CONCURRENCY * HOT_READS * HOT_PACKAGES / (time.perf_counter() - started)
+
+    await repository.close()
+    return preload_rate, patch_rate, batch_rate, hot_rate
+
+
+def _print(name: str, rates) -> None:
+    print(f"{name:>30} {rates[0]:>12.0f} {rates[1]:>10.0f} {rates[2]:>12.0f} {rates[3]:>14.0f}", flush=True)
+
+
+async def main(packages: int, pool_size: int) -> None:
+    print(f"{packages} packages, {CONCURRENCY} concurrent writers")
+    print(f"{'adapter':>30} {'preload/s':>12} {'PATCH/s':>10} {'batched/s':>12} {'hot reads/s':>14}")
+    _print("InMemoryPackageRepository", await _run(InMemoryPackageRepository(), packages))
+    with tempfile.TemporaryDirectory() as directory:
+        repository = SQLPackageRepository(os.path.join(directory, "bench.db"), pool_size=pool_size)
+        _print("SQLPackageRepository", await _run(repository, packages))
+    with tempfile.TemporaryDirectory() as directory:
+        repository = SQLPackageRepository(os.path.join(directory, "bench.db"), pool_size=pool_size)
+        _print("SQL + CachingPackageRepository", await _run(CachingPackageRepository(repository), packages))
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    pool = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    asyncio.run(main(count, pool))
@@ -0,0 +1,110 @@
+"""
+Startup time of the API, and how responsive it stays while it warms up.
+
+1. import: seconds to `import src.api.main` (no app is built on import)
+   and then to create_app(), each in a fresh interpreter.
+2. For each seed size, a uvicorn server is started with SEED_MANIFEST
+   pointing to an NDJSON manifest of that many packages, and /health is
+   polled every few milliseconds:
+   - "listening": seconds until the first answer (503 while warming up),
+   - "ready": seconds until /health answers 200 (the manifest is stored),
+   - "max poll ms": the slowest /health answer in between, i.e. the
+     longest the event loop was held by the warm-up (one ingest chunk).
+
+Usage:
+    python -m benchmarks.bench_startup [packages ...]
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+import httpx
+
+POLL_INTERVAL = 0.005
+TIMEOUT = 300.0
+
+_IMPORT_TIMES = """
+import time
+started = time.perf_counter()
+from src.api.main import create_app
+imported = time.perf_counter()
+create_app(configure_logging=False)
+print(imported - started, time.perf_counter() - imported)
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _import_times() -> Tuple[float, float]:
+    output = subprocess.run([sys.executable, "-c", _IMPORT_TIMES], capture_output=True, text=True, check=True)
+    imported, created = output.stdout.split()
+    return float(imported), float(created)
+
+
+def _write_manifest(path: str, count: int) -> None:
+    with open(path, "w") as manifest:
+        for i in range(count):
+            manifest.write(json.dumps({"customer_address": f"Calle {i}, Madrid"}) + "\n")
+
+
+def _run(packages: int, directory: str) -> Tuple[float, float, float]:
+    env = dict(os.environ, LOG_LEVEL="WARNING", LOG_FILE=os.path.join(directory, "app.log"))
+    env.pop("SEED_MANIFEST", None)
+    if packages:
+        manifest = os.path.join(directory, f"seed-{packages}.ndjson")
+        _write_manifest(manifest, packages)
+        env["SEED_MANIFEST"] = manifest
+
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    listening = None
+    slowest = 0.0
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=TIMEOUT) as client:
+            while time.perf_counter() - started < TIMEOUT:
+                sent = time.perf_counter()
+                try:
+                    response = client.get("/health")
+                except httpx.TransportError:
+                    time.sleep(POLL_INTERVAL)
+                    continue
+                answered = time.perf_counter()
+                if listening is None:
+                    listening = answered - started
+                else:
+                    slowest = max(slowest, answered - sent)
+                if response.status_code == 200:
+                    return listening, answered - started, slowest
+                time.sleep(POLL_INTERVAL)
+        raise RuntimeError(f"not ready after {TIMEOUT:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(sizes: List[int]) -> None:
+    imported, created = _import_times()
+    print(f"import src.api.main: {imported * 1000:.0f} ms, create_app(): {created * 1000:.0f} ms")
+    print(f"{'packages':>10} {'listening s':>12} {'ready s':>9} {'max poll ms':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            listening, ready, slowest = _run(size, directory)
+            print(f"{size:>10} {listening:>12.2f} {ready:>9.2f} {slowest * 1000:>12.1f}", flush=True)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [0, 100_000, 1_000_000])
@@ -0,0 +1,144 @@
+"""
+PATCH throughput of uvicorn with 1..N worker processes sharing state through
+SharedMemoryPackageRepository (REPOSITORY_BACKEND=shared).
+
+For each worker count the benchmark:
+1. preloads `packages` READY packages into a fresh state file,
+2. starts `uvicorn src.api.main:app --workers N` on a local port,
+3. PATCHes every package to IN_TRANSIT from several client processes
+   (so the client side is not the bottleneck), and
+4. checks through GET /packages/stats that every update landed exactly
+   once, whichever worker served it.
+
+Throughput only scales while there are idle cores for the extra workers
+and clients; the CPU count is printed with the results.
+
+Usage:
+    python -m benchmarks.bench_workers [packages] [workers ...]
+"""
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+import httpx
+
+from src.adapters.repository.shared_memory_repository import SharedMemoryPackageRepository
+from src.domain.entities import Package
+
+CLIENT_PROCESSES = 4
+CONNECTIONS_PER_CLIENT = 16
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _preload(path: str, count: int) -> List[str]:
+    repository = SharedMemoryPackageRepository(path, capacity=count + 100)
+    await repository.open()
+    packages = [Package(customer_address=f"Calle {i}") for i in range(count)]
+    await repository.preload_packages(packages)
+    await repository.close()
+    return [package.id for package in packages]
+
+
+def _client(port: int, package_ids: List[str], start, results) -> None:
+    async def run() -> int:
+        limits = httpx.Limits(max_connections=CONNECTIONS_PER_CLIENT)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            failures = 0
+
+            async def worker(offset: int) -> None:
+                nonlocal failures
+                for package_id in package_ids[offset::CONNECTIONS_PER_CLIENT]:
+                    response = await client.patch(f"/packages/{package_id}/status", json={"status": "IN_TRANSIT"})
+                    failures += response.status_code != 200
+
+            # Open the connections before the clock starts
+            await asyncio.gather(*(client.get("/health") for _ in range(CONNECTIONS_PER_CLIENT)))
+            start.wait()
+            await asyncio.gather(*(worker(i) for i in range(CONNECTIONS_PER_CLIENT)))
+            return failures
+
+    results.put(asyncio.run(run()))
+
+
+def _wait_until_up(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+        time.sleep(0.1)
+
+
+def _run(workers: int, packages: int, directory: str) -> float:
+    path = os.path.join(directory, f"workers-{workers}.shm")
+    package_ids = asyncio.run(_preload(path, packages))
+    port = _free_port()
+    env = dict(
+        os.environ,
+        REPOSITORY_BACKEND="shared",
+        SHARED_STATE_PATH=path,
+        LOG_LEVEL="WARNING",
+        LOG_FILE=os.path.join(directory, "app.log"),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_up(port)
+        context = multiprocessing.get_context("spawn")
+        start, results = context.Event(), context.Queue()
+        clients = [
+            context.Process(target=_client, args=(port, package_ids[i::CLIENT_PROCESSES], start, results))
+            for i in range(CLIENT_PROCESSES)
+        ]
+        for client in clients:
+            client.start()
+        # Give the clients time to import and connect
+        time.sleep(2)
+        started = time.perf_counter()
+        start.set()
+        failures = sum(results.get() for _ in clients)
+        elapsed = time.perf_counter() - started
+        for client in clients:
+            client.join()
+
+        stats = httpx.get(f"http://127.0.0.1:{port}/packages/stats").json()
+        if failures or stats["by_status"]["IN_TRANSIT"] != packages:
+            raise RuntimeError(f"inconsistent state: {failures} failed PATCHes, stats={stats}")
+        return packages / elapsed
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(packages: int, worker_counts: List[int]) -> None:
+    print(f"{packages} PATCH requests, {CLIENT_PROCESSES} client processes, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'req/s':>8} {'speedup':>8}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in worker_counts:
+            throughput = _run(workers, packages, directory)
+            baseline = baseline or throughput
+            print(f"{workers:>8} {throughput:>8.0f} {throughput / baseline:>7.2f}x", flush=True)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    workers = [int(arg) for arg in sys.argv[2:]] or [1, 2, 4]
+    main(count, workers)
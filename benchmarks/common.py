@@ -0,0 +1,36 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+import statistics
+from typing import Dict, List, Sequence
+
+from src.ports.notification import NotificationPort
+
+
+class NullNotifier(NotificationPort):
+    """
+    Notification adapter that does nothing, to keep the stub's simulated
+    latency out of the timings.
+    """
+
+    async def deliver_status_changes(self, events) -> None:
+        pass
+
+
+def latency_summary(latencies: Sequence[float]) -> Dict[str, float]:
+    """
+    p50/p90/p99/max of a list of latencies in seconds, reported in milliseconds.
+    """
+    ordered: List[float] = sorted(latencies)
+    if not ordered:
+        return {}
+
+    def at(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1e3
+
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1e3, 4),
+        "p90_ms": round(at(0.90), 4),
+        "p99_ms": round(at(0.99), 4),
+        "max_ms": round(ordered[-1] * 1e3, 4),
+    }
@@ -0,0 +1,69 @@
+"""
+Compares two result files written by benchmarks.suite and flags regressions.
+
+Benchmarks are matched by name and parameters. A throughput drop or a p99
+increase larger than the threshold (10% by default) is reported as a
+regression, and the exit status is 1 if there is any, so the comparison can
+gate a CI job.
+
+Usage:
+    python -m benchmarks.compare base.json new.json [--threshold 0.10]
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+# Metric -> True if a higher value is better
+_TRACKED_METRICS = {"ops_per_sec": True, "p50_ms": False, "p99_ms": False}
+
+
+def _load(path: str) -> Tuple[Dict[str, Any], Dict[Tuple[str, str], Dict[str, float]]]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    results = {
+        (entry["benchmark"], json.dumps(entry["params"], sort_keys=True)): entry["metrics"]
+        for entry in data["results"]
+    }
+    return data.get("metadata", {}), results
+
+
+def compare(base_path: str, new_path: str, threshold: float) -> List[str]:
+    base_meta, base = _load(base_path)
+    new_meta, new = _load(new_path)
+    print(f"base: {base_meta.get('commit')}  new: {new_meta.get('commit')}")
+    print(f"{'benchmark':<32} {'params':<24} {'metric':<12} {'base':>12} {'new':>12} {'change':>8}")
+
+    regressions = []
+    for key in sorted(base.keys() & new.keys()):
+        benchmark, params = key
+        for metric, higher_is_better in _TRACKED_METRICS.items():
+            old_value, new_value = base[key].get(metric), new[key].get(metric)
+            if not old_value or new_value is None:
+                continue
+            change = (new_value - old_value) / old_value
+            worse = -change if higher_is_better else change
+            flag = " !" if worse > threshold else ""
+            print(f"{benchmark:<32} {params:<24} {metric:<12} {old_value:>12} {new_value:>12} {change:>+7.1%}{flag}")
+            if flag:
+                regressions.append(f"{benchmark} {params} {metric} {change:+.1%}")
+
+    for key in sorted(base.keys() - new.keys()):
+        print(f"only in base: {key[0]} {key[1]}")
+    for key in sorted(new.keys() - base.keys()):
+        print(f"only in new: {key[0]} {key[1]}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    found = compare(args.base, args.new, args.threshold)
+    if found:
+        print(f"\n{len(found)} regression(s) above {args.threshold:.0%}:")
+        for line in found:
+            print(f"  {line}")
+        sys.exit(1)
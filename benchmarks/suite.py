@@ -0,0 +1,360 @@
+"""
+Benchmark suite for the hot paths, layer by layer, with results written to a
+JSON file so two commits can be compared with benchmarks.compare.
+
+Layers:
+- domain: PackageDomainService single and batch transition checks, the
+  rejection path, and change_status.
+- repository: InMemoryPackageRepository preload, get_by_id, transition,
+  save, list_page and count_by_status at each requested size.
+- use_case: UpdatePackageStatusUseCase.execute under N concurrent coroutines.
+- asgi: GET /packages and PATCH /packages/{id}/status through the real app
+  with httpx.ASGITransport (in process, no network).
+- uvicorn: the same requests against a uvicorn server started in a child
+  process on a local port.
+
+The notification adapter is replaced by a no-op one in every layer, so the
+stub's simulated latency stays out of the numbers. Logging is raised to
+WARNING for the same reason.
+
+Usage:
+    python -m benchmarks.suite [--layers domain repository ...] [--sizes 10000 1000000 ...]
+                               [--concurrency 1 10 100 ...] [--requests N] [--output FILE]
+
+10M packages need several GB of RAM for the object-per-package adapter, so
+the default sizes stop at 1M; pass --sizes 10000 1000000 10000000 to include it.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.domain.exceptions import InvalidStateTransitionError
+from src.domain.services import PackageDomainService
+from src.use_cases.update_package_status import UpdatePackageStatusUseCase
+
+from benchmarks.common import NullNotifier, latency_summary
+
+LAYERS = ("domain", "repository", "use_case", "asgi", "uvicorn")
+DEFAULT_SIZES = [10_000, 1_000_000]
+DEFAULT_CONCURRENCY = [1, 10, 100, 1000]
+DEFAULT_OUTPUT = "bench_results.json"
+
+# Operations timed per repository benchmark
+REPOSITORY_OPERATIONS = 20_000
+# Micro-benchmark iterations for the domain layer
+DOMAIN_ITERATIONS = 200_000
+PAGE_SIZE = 100
+
+
+def _result(benchmark: str, params: Dict[str, Any], operations: int, elapsed: float,
+            latencies: List[float] = ()) -> Dict[str, Any]:
+    metrics: Dict[str, Any] = {"ops_per_sec": round(operations / elapsed, 1)}
+    metrics.update(latency_summary(latencies))
+    entry = {"benchmark": benchmark, "params": params, "metrics": metrics}
+    print(f"{benchmark:<32} {json.dumps(params):<22} "
+          + " ".join(f"{name}={value}" for name, value in metrics.items()), flush=True)
+    return entry
+
+
+def _package_id(i: int) -> str:
+    return f"bench-{i:010d}"
+
+
+def _packages(count: int) -> List[Package]:
+    return [
+        Package(customer_address=f"Calle {i % 1000}", package_id=_package_id(i))
+        for i in range(count)
+    ]
+
+
+async def _timed(operation: Callable[[int], Awaitable[Any]], count: int):
+    latencies = []
+    started = time.perf_counter()
+    for i in range(count):
+        op_started = time.perf_counter()
+        await operation(i)
+        latencies.append(time.perf_counter() - op_started)
+    return time.perf_counter() - started, latencies
+
+
+def bench_domain() -> List[Dict[str, Any]]:
+    results = []
+    validate = PackageDomainService.validate_transition
+    started = time.perf_counter()
+    for _ in range(DOMAIN_ITERATIONS):
+        validate(PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    results.append(_result("domain.validate_transition", {}, DOMAIN_ITERATIONS, time.perf_counter() - started))
+
+    can_transition = PackageDomainService.can_transition
+    started = time.perf_counter()
+    for _ in range(DOMAIN_ITERATIONS):
+        can_transition(PackageStatus.DELIVERED, PackageStatus.IN_TRANSIT)
+    results.append(_result("domain.can_transition_rejected", {}, DOMAIN_ITERATIONS, time.perf_counter() - started))
+
+    started = time.perf_counter()
+    for _ in range(DOMAIN_ITERATIONS):
+        try:
+            validate(PackageStatus.DELIVERED, PackageStatus.IN_TRANSIT)
+        except InvalidStateTransitionError:
+            pass
+    results.append(_result("domain.validate_rejected", {}, DOMAIN_ITERATIONS, time.perf_counter() - started))
+
+    currents = [PackageStatus.READY, PackageStatus.DELIVERED] * (DOMAIN_ITERATIONS // 2)
+    targets = [PackageStatus.IN_TRANSIT] * len(currents)
+    started = time.perf_counter()
+    PackageDomainService.can_transition_many(currents, targets)
+    results.append(_result("domain.can_transition_many", {}, len(currents), time.perf_counter() - started))
+
+    package = Package(customer_address="Calle 1")
+    change_status = PackageDomainService.change_status
+    started = time.perf_counter()
+    for _ in range(DOMAIN_ITERATIONS):
+        package.status = PackageStatus.READY
+        change_status(package, PackageStatus.IN_TRANSIT)
+    results.append(_result("domain.change_status", {}, DOMAIN_ITERATIONS, time.perf_counter() - started))
+    return results
+
+
+async def bench_repository(sizes: List[int]) -> List[Dict[str, Any]]:
+    results = []
+    for size in sizes:
+        params = {"size": size}
+        repository = InMemoryPackageRepository()
+        packages = _packages(size)
+        started = time.perf_counter()
+        await repository.preload_packages(packages)
+        results.append(_result("repository.preload", params, size, time.perf_counter() - started))
+        del packages
+
+        rnd = random.Random(size)
+        operations = min(REPOSITORY_OPERATIONS, size)
+        picks = [_package_id(rnd.randrange(size)) for _ in range(operations)]
+        # Distinct packages, so every transition starts from READY
+        fresh = [_package_id(i) for i in rnd.sample(range(size), operations)]
+
+        async def get_by_id(i: int) -> None:
+            await repository.get_by_id(picks[i])
+
+        async def transition(i: int) -> None:
+            await repository.transition(fresh[i], PackageStatus.READY, PackageStatus.IN_TRANSIT)
+
+        async def save(i: int) -> None:
+            await repository.save(Package(customer_address="Calle 2", package_id=picks[i]))
+
+        async def list_page(i: int) -> None:
+            await repository.list_page(PAGE_SIZE, after=picks[i])
+
+        async def list_page_by_status(i: int) -> None:
+            await repository.list_page(PAGE_SIZE, after=picks[i], status=PackageStatus.IN_TRANSIT)
+
+        async def count_by_status(i: int) -> None:
+            await repository.count_by_status()
+
+        for name, operation in (
+            ("get_by_id", get_by_id),
+            ("transition", transition),
+            ("save", save),
+            ("list_page", list_page),
+            ("list_page_by_status", list_page_by_status),
+            ("count_by_status", count_by_status),
+        ):
+            elapsed, latencies = await _timed(operation, operations)
+            results.append(_result(f"repository.{name}", params, operations, elapsed, latencies))
+        del repository
+    return results
+
+
+async def bench_use_case(concurrency_levels: List[int], requests: int) -> List[Dict[str, Any]]:
+    results = []
+    for concurrency in concurrency_levels:
+        repository = InMemoryPackageRepository()
+        await repository.preload_packages(_packages(requests))
+        use_case = UpdatePackageStatusUseCase(repository)
+        latencies: List[float] = []
+
+        async def worker(offset: int) -> None:
+            for i in range(offset, requests, concurrency):
+                op_started = time.perf_counter()
+                await use_case.execute(_package_id(i), PackageStatus.IN_TRANSIT)
+                latencies.append(time.perf_counter() - op_started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(min(concurrency, requests))))
+        elapsed = time.perf_counter() - started
+        results.append(_result("use_case.execute", {"concurrency": concurrency}, requests, elapsed, latencies))
+    return results
+
+
+async def _http_load(client: httpx.AsyncClient, transport: str, concurrency_levels: List[int],
+                     requests: int, reset: Callable[[], Awaitable[None]]) -> List[Dict[str, Any]]:
+    """
+    GET /packages pages and PATCHes of distinct packages (READY -> IN_TRANSIT),
+    spread over `concurrency` workers sharing the client.
+    """
+    results = []
+    for concurrency in concurrency_levels:
+        await reset()
+        workers = min(concurrency, requests)
+        for method in ("GET", "PATCH"):
+            latencies: List[float] = []
+
+            async def worker(offset: int) -> None:
+                for i in range(offset, requests, workers):
+                    op_started = time.perf_counter()
+                    if method == "GET":
+                        response = await client.get("/packages", params={"limit": PAGE_SIZE, "after": _package_id(i)})
+                    else:
+                        response = await client.patch(f"/packages/{_package_id(i)}/status", json={"status": "IN_TRANSIT"})
+                    latencies.append(time.perf_counter() - op_started)
+                    if response.status_code != 200:
+                        raise RuntimeError(f"{method} answered {response.status_code}: {response.text}")
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(i) for i in range(workers)))
+            elapsed = time.perf_counter() - started
+            results.append(_result(
+                f"{transport}.{method.lower()}", {"concurrency": concurrency}, requests, elapsed, latencies
+            ))
+    return results
+
+
+async def bench_asgi(concurrency_levels: List[int], requests: int) -> List[Dict[str, Any]]:
+    from src.api.dependencies import build_container
+    from src.api.main import create_app
+
+    app = create_app(build_container(notification_adapter=NullNotifier()))
+    # Creating the app configures logging at INFO
+    logging.getLogger().setLevel(logging.WARNING)
+    repository = app.state.container.repository
+
+    async def reset() -> None:
+        await repository.clear()
+        await repository.preload_packages(_packages(requests))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        return await _http_load(client, "asgi", concurrency_levels, requests, reset)
+
+
+def _serve(port: int, packages: int) -> None:
+    """
+    Child process: uvicorn serving the app with a no-op notifier and the
+    benchmark packages preloaded (the lifespan then skips its own preload).
+    """
+    import uvicorn
+    from src.api.dependencies import build_container
+    from src.api.main import create_app
+
+    app = create_app(build_container(notification_adapter=NullNotifier()))
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(app.state.container.repository.preload_packages(_packages(packages)))
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_until_up(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+        await asyncio.sleep(0.1)
+
+
+async def bench_uvicorn(concurrency_levels: List[int], requests: int) -> List[Dict[str, Any]]:
+    results = []
+    for concurrency in concurrency_levels:
+        # One server per level, so every level PATCHes packages still in READY
+        port = _free_port()
+        server = multiprocessing.get_context("spawn").Process(target=_serve, args=(port, requests), daemon=True)
+        server.start()
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+                await _wait_until_up(client)
+
+                async def reset() -> None:
+                    pass
+
+                results.extend(await _http_load(client, "uvicorn", [concurrency], requests, reset))
+        finally:
+            server.terminate()
+            server.join()
+    return results
+
+
+def _metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results: List[Dict[str, Any]] = []
+    if "domain" in args.layers:
+        results.extend(bench_domain())
+    if "repository" in args.layers:
+        results.extend(await bench_repository(args.sizes))
+    if "use_case" in args.layers:
+        results.extend(await bench_use_case(args.concurrency, args.requests))
+    if "asgi" in args.layers:
+        results.extend(await bench_asgi(args.concurrency, args.requests))
+    if "uvicorn" in args.layers:
+        results.extend(await bench_uvicorn(args.concurrency, args.requests))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"metadata": _metadata(), "results": results}, f, indent=2)
+        f.write("\n")
+    print(f"{len(results)} results written to {args.output}")
+
+
+def _parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layers", nargs="+", choices=LAYERS, default=list(LAYERS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES,
+                        help="repository sizes (packages)")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=DEFAULT_CONCURRENCY,
+                        help="concurrent coroutines / HTTP workers")
+    parser.add_argument("--requests", type=int, default=5_000,
+                        help="operations per use-case and HTTP benchmark")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(_parse_args(sys.argv[1:])))
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Collection, Deque, Dict, FrozenSet, List, Optional, Set
+
+import orjson
+
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.metrics import Counter, Gauge
+from src.ports.events import TransitionListener
+
+logger = logging.getLogger(__name__)
+
+EVENT_SUBSCRIBERS = Gauge(
+    "status_event_subscribers",
+    "Clients currently subscribed to the live status stream.",
+)
+STATUS_EVENTS = Counter(
+    "status_events_total",
+    "Live status events by result (published once per transition, delivered once per matching subscriber).",
+    ["result"],
+)
+EVENT_SUBSCRIBERS_DROPPED = Counter(
+    "status_event_subscribers_dropped_total",
+    "Subscribers disconnected because their queue was full (they did not keep up).",
+)
+_PUBLISHED = STATUS_EVENTS.labels("published")
+_DELIVERED = STATUS_EVENTS.labels("delivered")
+
+# Why a subscription was closed (Subscription.close_reason)
+UNSUBSCRIBED = "unsubscribed"
+SLOW_SUBSCRIBER = "subscriber too slow, events were dropped"
+SHUTTING_DOWN = "server shutting down"
+
+
+class SubscriptionClosedError(Exception):
+    """
+    The subscription was closed: unsubscribed, its subscriber fell behind,
+    or the broadcaster shut down. Pending events are discarded.
+    """
+
+    def __init__(self, reason: str):
+        self.reason = reason
+        super().__init__(reason)
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class Subscription:
+    """
+    One subscriber of a StatusBroadcaster: a bounded queue of encoded
+    events, read with get().
+
+    An idle subscription holds no future, task or timer, only its filters
+    and an empty deque, so tens of thousands of them stay cheap.
+    """
+
+    __slots__ = ("package_ids", "statuses", "_queue", "_max_queue", "_waiter", "close_reason")
+
+    def __init__(self, package_ids: FrozenSet[str], statuses: FrozenSet[PackageStatus], max_queue: int):
+        self.package_ids = package_ids
+        self.statuses = statuses
+        self._queue: Deque[bytes] = deque()
+        self._max_queue = max_queue
+        self._waiter: Optional[asyncio.Future] = None
+        self.close_reason: Optional[str] = None
+
+    @property
+    def closed(self) -> bool:
+        return self.close_reason is not None
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Next event (a JSON object as bytes), waiting for one if needed.
+        Returns None when `timeout` seconds pass without one (e.g. to send
+        a keep-alive).
+
+        Throws:
+        - SubscriptionClosedError once the subscription is closed.
+        """
+        if not self._queue:
+            if self.close_reason is not None:
+                raise SubscriptionClosedError(self.close_reason)
+            loop = asyncio.get_running_loop()
+            waiter = self._waiter = loop.create_future()
+            timer = loop.call_later(timeout, _wake, waiter) if timeout is not None else None
+            try:
+                await waiter
+            finally:
+                self._waiter = None
+                if timer is not None:
+                    timer.cancel()
+            if not self._queue:
+                if self.close_reason is not None:
+                    raise SubscriptionClosedError(self.close_reason)
+                return None
+        return self._queue.popleft()
+
+    def _push(self, event: bytes) -> bool:
+        """
+        Queues an event; False if the queue is full.
+        """
+        if len(self._queue) >= self._max_queue:
+            return False
+        self._queue.append(event)
+        if self._waiter is not None:
+            _wake(self._waiter)
+        return True
+
+    def _close(self, reason: str) -> None:
+        if self.close_reason is not None:
+            return
+        self.close_reason = reason
+        self._queue.clear()
+        if self._waiter is not None:
+            _wake(self._waiter)
+
+
+class StatusBroadcaster(TransitionListener):
+    """
+    Fans status transitions out to live subscribers (the SSE and WebSocket
+    streams), each optionally filtered by package ids and/or statuses.
+
+    Subscribers are indexed by what they filter on: by package id when they
+    name packages, else by status, else in the unfiltered set. A transition
+    only visits the subscribers of its package, of its new status and the
+    unfiltered ones, so its cost does not grow with the number of
+    subscribers it does not match. It is encoded once, on the first match,
+    and the same bytes are queued for every subscriber.
+
+    Each subscriber queues at most queue_size events. A subscriber whose
+    queue is full is not keeping up: it is closed rather than left to miss
+    events silently, and its client reconnects and catches up with
+    GET /packages/changes.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self._queue_size = queue_size
+        self._unfiltered: Set[Subscription] = set()
+        self._by_package: Dict[str, Set[Subscription]] = {}
+        self._by_status: Dict[PackageStatus, Set[Subscription]] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def subscribe(
+        self,
+        package_ids: Collection[str] = (),
+        statuses: Collection[PackageStatus] = (),
+    ) -> Subscription:
+        """
+        New subscription to the transitions of the given packages (all when
+        empty) into the given statuses (any when empty). Pair every call with
+        unsubscribe().
+        """
+        subscription = Subscription(frozenset(package_ids), frozenset(statuses), self._queue_size)
+        if subscription.package_ids:
+            for package_id in subscription.package_ids:
+                self._by_package.setdefault(package_id, set()).add(subscription)
+        elif subscription.statuses:
+            for package_status in subscription.statuses:
+                self._by_status.setdefault(package_status, set()).add(subscription)
+        else:
+            self._unfiltered.add(subscription)
+        self._count += 1
+        EVENT_SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription, reason: str = UNSUBSCRIBED) -> None:
+        """
+        Removes and closes a subscription, waking up a pending get(). Safe
+        to call more than once.
+        """
+        subscription._close(reason)
+        if subscription.package_ids:
+            removed = self._discard(self._by_package, subscription.package_ids, subscription)
+        elif subscription.statuses:
+            removed = self._discard(self._by_status, subscription.statuses, subscription)
+        else:
+            removed = subscription in self._unfiltered
+            self._unfiltered.discard(subscription)
+        if removed:
+            self._count -= 1
+            EVENT_SUBSCRIBERS.dec()
+
+    def on_status_changed(self, package: Package, previous_status: PackageStatus) -> None:
+        _PUBLISHED.inc()
+        if not self._count:
+            return
+        new_status = package.status
+        event: Optional[bytes] = None
+        delivered = 0
+        slow: List[Subscription] = []
+
+        for group, check_status in (
+            (self._by_package.get(package.id), True),
+            (self._by_status.get(new_status), False),
+            (self._unfiltered, False),
+        ):
+            if not group:
+                continue
+            for subscription in group:
+                if check_status and subscription.statuses and new_status not in subscription.statuses:
+                    continue
+                if event is None:
+                    event = memoryview(orjson.dumps({
+                        "id": package.id,
+                        "status": new_status.value,
+                        "previous_status": previous_status.value,
+                        "customer_address": package.customer_address,
+                    })).tobytes()
+                if subscription._push(event):
+                    delivered += 1
+                else:
+                    slow.append(subscription)
+
+        _DELIVERED.inc(delivered)
+        for subscription in slow:
+            logger.warning(
+                "StatusBroadcaster: Subscriber fell %d events behind, disconnecting it", self._queue_size
+            )
+            EVENT_SUBSCRIBERS_DROPPED.inc()
+            self.unsubscribe(subscription, SLOW_SUBSCRIBER)
+
+    def close(self) -> None:
+        """
+        Closes every subscription (e.g. at shutdown), ending their streams.
+        """
+        subscriptions = set(self._unfiltered)
+        for group in (*self._by_package.values(), *self._by_status.values()):
+            subscriptions.update(group)
+        for subscription in subscriptions:
+            self.unsubscribe(subscription, SHUTTING_DOWN)
+        logger.info("StatusBroadcaster: Closed %d subscriptions", len(subscriptions))
+
+    def _discard(self, index: Dict, keys: Collection, subscription: Subscription) -> bool:
+        removed = False
+        for key in keys:
+            group = index.get(key)
+            if group is not None and subscription in group:
+                removed = True
+                group.discard(subscription)
+                if not group:
+                    del index[key]
+        return removed
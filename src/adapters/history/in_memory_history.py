@@ -0,0 +1,139 @@
+import logging
+import math
+import struct
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from src.domain.entities import Package, StatusTransition
+from src.domain.enums import PackageStatus, STATUS_CODES, STATUSES_BY_CODE
+from src.ports.history import TransitionHistory
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+# One transition: when (float seconds since the epoch) and the from/to status
+# codes packed in one byte (from << 4 | to), 9 bytes in all
+_RECORD = struct.Struct("<dB")
+
+
+class InMemoryTransitionHistory(TransitionHistory):
+    """
+    In-memory implementation of TransitionHistory, append-only, keeping
+    the transitions of the last `retention` seconds.
+
+    The transitions of each package are packed back to back in one
+    bytearray (9 bytes per transition, one object per package), and the
+    package ids are the very string objects the repository already holds.
+    Next to them, a counter per hour and status is bumped on every
+    transition, so count_by_hour() reads one bucket per hour of the window
+    instead of scanning the history.
+
+    Memory stays bounded by the transitions within the retention: packages
+    are kept in the order of their last transition, so the ones that did
+    not move for `retention` seconds are dropped from the front as new
+    transitions come in; the older records of a package that keeps moving
+    are cut off when it gets a new one, and hourly counters once their
+    hour is entirely past the retention.
+
+    Transitions are recorded as this process applies them, and are lost
+    when it stops: with several workers each one only knows its own, and
+    recorded_since() is never earlier than the moment it was created.
+    """
+
+    def __init__(self, retention: float = 31 * 24 * HOUR, clock: Callable[[], float] = time.time):
+        self._retention = retention
+        self._clock = clock
+        self._started = clock()
+        # package id -> packed _RECORDs, oldest first; ordered by last transition
+        self._by_package: "OrderedDict[str, bytearray]" = OrderedDict()
+        # hour start -> transitions into each status, indexed by status code
+        self._hourly: Dict[int, List[int]] = {}
+        self._count = 0
+        # No package can have expired before then
+        self._expires_at = 0.0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def recorded_since(self) -> float:
+        return max(self._started, self._clock() - self._retention)
+
+    def on_status_changed(self, package: Package, previous_status: PackageStatus) -> None:
+        at = self._clock()
+        to_code = STATUS_CODES[package.status]
+        record = _RECORD.pack(at, STATUS_CODES[previous_status] << 4 | to_code)
+        cutoff = at - self._retention
+        records = self._by_package.get(package.id)
+        if records is None:
+            self._by_package[package.id] = bytearray(record)
+        else:
+            if _RECORD.unpack_from(records)[0] < cutoff:
+                self._cut(records, cutoff)
+            records += record
+            self._by_package.move_to_end(package.id)
+        self._count += 1
+        if at >= self._expires_at:
+            self._expire(cutoff)
+
+        hour = int(at // HOUR) * HOUR
+        counts = self._hourly.get(hour)
+        if counts is None:
+            counts = self._hourly[hour] = [0] * len(STATUSES_BY_CODE)
+            for old in [h for h in self._hourly if h + HOUR <= cutoff]:
+                del self._hourly[old]
+        counts[to_code] += 1
+
+    async def get_package_history(
+        self,
+        package_id: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> List[StatusTransition]:
+        records = self._by_package.get(package_id)
+        if records is None:
+            return []
+        cutoff = self._clock() - self._retention
+        start = cutoff if start is None else max(start, cutoff)
+        transitions: List[StatusTransition] = []
+        for at, codes in _RECORD.iter_unpack(records):
+            if at < start or (end is not None and at >= end):
+                continue
+            transitions.append(
+                StatusTransition(package_id, STATUSES_BY_CODE[codes >> 4], STATUSES_BY_CODE[codes & 0xF], at)
+            )
+        return transitions
+
+    async def count_by_hour(self, start: float, end: float) -> Dict[int, Dict[PackageStatus, int]]:
+        counts_by_hour: Dict[int, Dict[PackageStatus, int]] = {}
+        for hour in range(int(start // HOUR) * HOUR, math.ceil(end), HOUR):
+            counts = self._hourly.get(hour)
+            if counts is not None:
+                counts_by_hour[hour] = {STATUSES_BY_CODE[code]: n for code, n in enumerate(counts) if n}
+        return counts_by_hour
+
+    def _cut(self, records: bytearray, cutoff: float) -> None:
+        """
+        Drops the records of one package older than cutoff.
+        """
+        old = 0
+        while old < len(records) and _RECORD.unpack_from(records, old)[0] < cutoff:
+            old += _RECORD.size
+        if old:
+            del records[:old]
+            self._count -= old // _RECORD.size
+
+    def _expire(self, cutoff: float) -> None:
+        """
+        Drops the packages whose last transition is older than cutoff, and
+        notes when the oldest one left will be.
+        """
+        by_package = self._by_package
+        while by_package:
+            records = by_package[next(iter(by_package))]
+            last = _RECORD.unpack_from(records, len(records) - _RECORD.size)[0]
+            if last >= cutoff:
+                self._expires_at = last + self._retention
+                return
+            by_package.popitem(last=False)
+            self._count -= len(records) // _RECORD.size
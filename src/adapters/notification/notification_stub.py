@@ -1,24 +1,32 @@
 import asyncio
 import logging
-from src.domain.entities import Package
+from typing import List
+from src.ports.outbox import OutboxEvent
+from src.ports.notification import NotificationPort
 
 logger = logging.getLogger(__name__)
 
-class NotificationStub:
+class NotificationStub(NotificationPort):
     """
     It simulates a notification adapter that, in a real-world scenario,
     could send a webhook, publish to a Kafka topic, etc.
     Here, we simply print a message after a brief asynchronous wait.
     """
 
-    async def notify_status_changed(self, package: Package) -> None:
-        logger.info("NotificationStub: Notifying status change for package %s", package.id)
+    async def deliver_status_changes(self, events: List[OutboxEvent]) -> None:
+        """
+        Notifies a batch of status changes with a single (simulated) round trip.
+        """
+        logger.debug("NotificationStub: Notifying status change for %d packages", len(events))
 
-        await asyncio.sleep(0.1) # Simulate network latency or IO
-        
-        logger.info(
-            "NotificationStub: Package %s now in status %s (customer_address=%s)",
-            package.id,
-            package.status,
-            package.customer_address,
-        )
\ No newline at end of file
+        await asyncio.sleep(0.1) # One simulated call for the whole batch
+
+        for event in events:
+            logger.debug(
+                "NotificationStub: Package %s now in status %s, was %s (customer_address=%s, event %d)",
+                event.package_id,
+                event.status,
+                event.previous_status,
+                event.customer_address,
+                event.sequence,
+            )
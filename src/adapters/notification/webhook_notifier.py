@@ -0,0 +1,161 @@
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from src.metrics import Counter, Histogram
+from src.ports.notification import NotificationDeliveryError, NotificationPort, NotificationRejectedError
+from src.ports.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_DELIVERY_SECONDS = Histogram(
+    "notification_delivery_seconds",
+    "Time of one POST of a batch to the webhook.",
+)
+NOTIFICATION_EVENTS = Counter(
+    "notification_events_total",
+    "Notification events by result (delivered, failed: refused by the webhook).",
+    ["result"],
+)
+_DELIVERED = NOTIFICATION_EVENTS.labels("delivered")
+_FAILED = NOTIFICATION_EVENTS.labels("failed")
+
+# Responses worth retrying: the receiver is overloaded or temporarily down
+_RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class WebhookNotifierStats:
+    """
+    Counters describing the notifier's deliveries.
+    """
+    delivered: int = 0
+    failed: int = 0
+    batches_sent: int = 0
+    last_batch_latency_seconds: float = 0.0
+
+
+class WebhookNotifier(NotificationPort):
+    """
+    Notification adapter that POSTs status changes to an external webhook.
+
+    Each deliver_status_changes() call is one POST {"events": [...]} through
+    a pooled httpx.AsyncClient. An event carries its outbox sequence as
+    event_id (so the receiver can discard the ones delivered twice), the
+    package id, status, previous_status, customer_address, and at, the
+    time of the change in seconds since the epoch. Batching, retries and ordering are up to the
+    outbox dispatcher calling it, which keeps the events until the webhook
+    accepted them.
+
+    Besides stats(), batch latency and event counts are exported through
+    the notification_* metrics.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        timeout: float = 5.0,
+        max_connections: int = 10,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self._url = url
+        self._timeout = timeout
+        self._max_connections = max_connections
+        self._transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._stats = WebhookNotifierStats()
+
+    async def start(self) -> None:
+        """
+        Opens the pooled HTTP client.
+        """
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            timeout=self._timeout,
+            limits=httpx.Limits(
+                max_connections=self._max_connections,
+                max_keepalive_connections=self._max_connections,
+            ),
+            transport=self._transport,
+        )
+        logger.info("WebhookNotifier: started (url=%s)", self._url)
+
+    async def stop(self) -> None:
+        """
+        Closes the HTTP client.
+        """
+        if self._client is None:
+            return
+        await self._client.aclose()
+        self._client = None
+        logger.info("WebhookNotifier: stopped")
+
+    async def deliver_status_changes(self, events: List[OutboxEvent]) -> None:
+        """
+        POSTs the batch once: the outbox dispatcher keeps undelivered events
+        and does the backoff. Raises NotificationRejectedError when the
+        webhook answers with a status not worth retrying (e.g. 400), and
+        NotificationDeliveryError for any other failure. Needs start() to
+        have been called.
+        """
+        batch = [_event(event) for event in events]
+        try:
+            await self._post(batch)
+        except NotificationRejectedError:
+            self._stats.failed += len(batch)
+            _FAILED.inc(len(batch))
+            raise
+
+    def stats(self) -> WebhookNotifierStats:
+        """
+        Returns a snapshot of the notifier's counters.
+        """
+        return WebhookNotifierStats(**asdict(self._stats))
+
+    async def _post(self, batch: List[Dict[str, Any]]) -> None:
+        """
+        Sends the batch in one POST.
+
+        Throws:
+        - NotificationRejectedError if the webhook answered with a status not worth retrying.
+        - NotificationDeliveryError if the POST failed or got a retryable status.
+        """
+        started = time.perf_counter()
+        try:
+            response = await self._client.post(self._url, json={"events": batch})
+        except httpx.HTTPError as e:
+            raise NotificationDeliveryError(f"Batch of {len(batch)} events failed: {e!r}") from e
+        finally:
+            NOTIFICATION_DELIVERY_SECONDS.observe(time.perf_counter() - started)
+        if response.is_success:
+            self._stats.delivered += len(batch)
+            self._stats.batches_sent += 1
+            self._stats.last_batch_latency_seconds = time.perf_counter() - started
+            _DELIVERED.inc(len(batch))
+            logger.debug("WebhookNotifier: delivered batch of %d events", len(batch))
+            return
+        if response.status_code not in _RETRYABLE_STATUS_CODES:
+            logger.error(
+                "WebhookNotifier: webhook rejected batch of %d events with status %d",
+                len(batch), response.status_code,
+            )
+            raise NotificationRejectedError(f"Webhook rejected the batch with status {response.status_code}")
+        raise NotificationDeliveryError(
+            f"Webhook answered {response.status_code} for batch of {len(batch)} events"
+        )
+
+def _event(event: OutboxEvent) -> Dict[str, Any]:
+    return {
+        "event_id": event.sequence,
+        "package_id": event.package_id,
+        "status": event.status.value,
+        "previous_status": event.previous_status.value,
+        "customer_address": event.customer_address,
+        "at": event.at,
+    }
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from typing import Optional
+
+from src.metrics import Counter
+from src.ports.notification import NotificationPort, NotificationRejectedError
+from src.ports.outbox import Outbox
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DELIVERY_FAILURES = Counter(
+    "outbox_delivery_failures_total",
+    "Outbox batches whose delivery failed (each one is sent again).",
+)
+
+
+class OutboxDispatcher:
+    """
+    Background task delivering the events of an outbox through a
+    NotificationPort, apart from the requests that caused them.
+
+    Events are taken batch_size at a time in sequence order, sent with one
+    deliver_status_changes() call and acknowledged once it returns. When
+    it raises, the same batch is sent again after a backoff growing from
+    backoff_base to backoff_max seconds, for as long as it takes, and
+    nothing behind it goes out meanwhile. So the changes of a package
+    reach the receiver in the order they happened, at least once: a batch
+    that failed half way, or was delivered right before a crash, is sent
+    again.
+
+    A batch the receiver refuses for good (NotificationRejectedError) is
+    not retried: it is split in halves, sent again at once, until the
+    refused events are isolated; those go to the outbox's dead_letter()
+    and delivery moves on.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        notifier: NotificationPort,
+        *,
+        batch_size: int = 100,
+        backoff_base: float = 0.1,
+        backoff_max: float = 30.0,
+    ):
+        self._outbox = outbox
+        self._notifier = notifier
+        self._batch_size = batch_size
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._task: Optional[asyncio.Task] = None
+        self._drained: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._drained = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="outbox-dispatcher")
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        """
+        Waits up to drain_timeout seconds for the pending events to be
+        delivered, then stops. What is left stays in the outbox.
+        """
+        if self._task is None:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + drain_timeout
+        while self._outbox.pending() and not self._task.done():
+            self._drained.clear()
+            try:
+                await asyncio.wait_for(self._drained.wait(), timeout=deadline - loop.time())
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "OutboxDispatcher: stopping with %d undelivered events", self._outbox.pending()
+                )
+                break
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        failures = 0
+        # While the events up to `suspect` are those of a refused batch,
+        # they are sent at most `limit` at a time
+        limit, suspect = self._batch_size, 0
+        while True:
+            batch = await self._outbox.next_batch(self._batch_size)
+            if batch[0].sequence > suspect:
+                limit = self._batch_size
+            batch = batch[:limit]
+            try:
+                await self._notifier.deliver_status_changes(batch)
+            except NotificationRejectedError as e:
+                failures = 0
+                if len(batch) > 1:
+                    limit, suspect = len(batch) // 2, max(suspect, batch[-1].sequence)
+                    continue
+                await self._outbox.dead_letter(batch, str(e))
+            except Exception as e:
+                failures += 1
+                OUTBOX_DELIVERY_FAILURES.inc()
+                delay = min(self._backoff_max, self._backoff_base * 2 ** (failures - 1))
+                logger.warning(
+                    "OutboxDispatcher: delivering %d events failed (attempt %d), retrying in %.1fs: %r",
+                    len(batch), failures, delay, e,
+                )
+                await asyncio.sleep(delay)
+                continue
+            else:
+                failures = 0
+                self._outbox.ack(batch[-1].sequence)
+            if not self._outbox.pending():
+                self._drained.set()
@@ -0,0 +1,412 @@
+import asyncio
+import fcntl
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from typing import BinaryIO, Callable, Deque, List, Optional, Tuple
+
+import orjson
+
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.metrics import Counter, Gauge
+from src.ports.outbox import Outbox, OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_EVENTS = Counter(
+    "outbox_events_total",
+    "Status changes going through the notification outbox, by result (recorded, delivered, dead_lettered, dropped).",
+    ["result"],
+)
+OUTBOX_PENDING = Gauge(
+    "outbox_pending_events",
+    "Status changes recorded in the outbox and not delivered yet.",
+)
+OUTBOX_LAG = Gauge(
+    "outbox_lag_seconds",
+    "Age of the oldest status change not delivered yet (0 when the outbox is empty).",
+)
+_RECORDED = OUTBOX_EVENTS.labels("recorded")
+_DELIVERED = OUTBOX_EVENTS.labels("delivered")
+_DEAD_LETTERED = OUTBOX_EVENTS.labels("dead_lettered")
+_DROPPED = OUTBOX_EVENTS.labels("dropped")
+
+# Outbox files a process tries to claim: path, path.1, ..., path.<_MAX_SLOTS - 1>
+_MAX_SLOTS = 64
+
+
+class FileOutbox(Outbox):
+    """
+    Outbox held in memory and, when given a path, in an append-only file,
+    so that the events not delivered yet survive a crash or a restart.
+
+    - The file has one JSON array per line: ["E", sequence, package_id,
+      status, previous_status, customer_address, at] for an event, and
+      ["A", sequence] once the events up to sequence were delivered.
+      open() hands out again the events after the last "A"; a torn last
+      line (crash in the middle of a write) is cut off.
+    - Writes use group commit, as in PackageJournal: on_status_changed()
+      only buffers the line, and a writer task writes and fsyncs what
+      gathered in commit_interval seconds in a worker thread. committed()
+      resolves once the lines buffered so far are fsynced; the PATCH routes
+      await it before answering, so a transition the client saw accepted
+      has its event on disk.
+    - At most max_in_memory events are kept in memory. Past that (the
+      receiver is down or slower than the updates), newer events are only
+      in the file and are read back from it as the older ones get
+      delivered, so the backlog costs disk, not memory. Without a path
+      they have nowhere to go and are dropped (and counted).
+    - When everything is delivered and the file outgrew compact_bytes, it
+      is truncated to a single "A" line keeping the last sequence number.
+    - Events the receiver refuses for good are appended, with the reason,
+      to a dead-letter file next to the outbox file (<file>.dead) as
+      ["D", sequence, package_id, status, previous_status,
+      customer_address, at, reason], then acknowledged.
+    - A process holds an exclusive lock on its file. With several workers
+      each one claims the first of path, path.1, path.2, ... that is free,
+      and takes over whatever a previous process left undelivered in it.
+
+    The outbox_* metrics export the backlog and its lag.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        *,
+        max_in_memory: int = 100_000,
+        commit_interval: float = 0.002,
+        compact_bytes: int = 64 << 20,
+        clock: Callable[[], float] = time.time,
+    ):
+        if max_in_memory < 1:
+            raise ValueError("max_in_memory must be at least 1")
+        self._path = path
+        self._max_in_memory = max_in_memory
+        self._commit_interval = commit_interval
+        self._compact_bytes = compact_bytes
+        self._clock = clock
+
+        # Undelivered events held in memory, oldest first
+        self._events: Deque[OutboxEvent] = deque()
+        self._last_sequence = 0
+        self._acked = 0
+        # While spilled, the events from _spill_sequence on are only in the
+        # file, from _spill_offset (None until that line is written)
+        self._spilled = False
+        self._spill_sequence = 0
+        self._spill_offset: Optional[int] = None
+        self._available = asyncio.Event()
+
+        self._file: Optional[BinaryIO] = None
+        # Bytes of the file holding complete lines
+        self._size = 0
+        # Lines waiting for the writer: (sequence, line), sequence 0 for an "A"
+        self._buffer: List[Tuple[int, bytes]] = []
+        # Resolved once the buffered lines, and the ones being written, are on disk
+        self._batch_future: Optional[asyncio.Future] = None
+        self._in_flight: Optional[asyncio.Future] = None
+        self._wakeup = asyncio.Event()
+        self._written = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def file_path(self) -> Optional[str]:
+        """
+        File claimed by open(), None when the outbox is not persisted.
+        """
+        return self._file.name if self._file is not None else None
+
+    async def open(self) -> None:
+        OUTBOX_PENDING.set_function(self.pending)
+        OUTBOX_LAG.set_function(self.lag)
+        self._available = asyncio.Event()
+        if self._path is not None:
+            loop = asyncio.get_running_loop()
+            self._wakeup, self._written = asyncio.Event(), asyncio.Event()
+            self._file = await loop.run_in_executor(None, self._claim)
+            await loop.run_in_executor(None, self._recover)
+            self._closing = False
+            self._writer = asyncio.create_task(self._run(), name="file-outbox")
+            logger.info(
+                "FileOutbox: %d undelivered events recovered from %s", self.pending(), self._file.name
+            )
+        if self._events:
+            self._available.set()
+
+    async def close(self) -> None:
+        OUTBOX_PENDING.set_function(None)
+        OUTBOX_LAG.set_function(None)
+        if self._writer is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._writer
+        self._writer = None
+        self._file.close()
+        self._file = None
+        if self.pending():
+            logger.warning("FileOutbox: closing with %d undelivered events", self.pending())
+
+    def on_status_changed(self, package: Package, previous_status: PackageStatus) -> None:
+        persisted = self._writer is not None
+        if not persisted and len(self._events) >= self._max_in_memory:
+            _DROPPED.inc()
+            logger.error("FileOutbox: outbox full, dropping the notification for package %s", package.id)
+            return
+
+        self._last_sequence += 1
+        event = OutboxEvent(
+            self._last_sequence,
+            package.id,
+            package.status,
+            previous_status,
+            package.customer_address,
+            self._clock(),
+        )
+        _RECORDED.inc()
+        if persisted:
+            self._write(event.sequence, _encode_event(event))
+            if not self._spilled and len(self._events) >= self._max_in_memory:
+                self._spilled = True
+                self._spill_sequence = event.sequence
+                self._spill_offset = None
+                logger.warning(
+                    "FileOutbox: %d events pending, keeping the newer ones on disk only", len(self._events)
+                )
+        if not self._spilled:
+            self._events.append(event)
+        self._available.set()
+
+    async def next_batch(self, max_events: int) -> List[OutboxEvent]:
+        while True:
+            if not self._events and self._spilled:
+                await self._read_spilled()
+            if self._events:
+                return list(itertools.islice(self._events, max_events))
+            self._available.clear()
+            await self._available.wait()
+
+    async def committed(self) -> None:
+        future = self._batch_future if self._batch_future is not None else self._in_flight
+        if future is not None:
+            await asyncio.shield(future)
+
+    def ack(self, sequence: int) -> None:
+        self._acknowledge(sequence, _DELIVERED)
+
+    async def dead_letter(self, events: List[OutboxEvent], reason: str) -> None:
+        for event in events:
+            logger.error(
+                "FileOutbox: the receiver refused the notification %d for package %s (%s): %s",
+                event.sequence, event.package_id, event.status.value, reason,
+            )
+        if self._writer is not None:
+            lines = [_encode_event(event, "D", reason) for event in events]
+            await asyncio.get_running_loop().run_in_executor(None, self._write_dead_letters, lines)
+        self._acknowledge(events[-1].sequence, _DEAD_LETTERED)
+
+    def pending(self) -> int:
+        return self._last_sequence - self._acked
+
+    def lag(self) -> float:
+        if not self._events:
+            return 0.0
+        return max(0.0, self._clock() - self._events[0].at)
+
+    def _acknowledge(self, sequence: int, counter: Counter) -> None:
+        if sequence <= self._acked:
+            return
+        self._acked = sequence
+        removed = 0
+        while self._events and self._events[0].sequence <= sequence:
+            self._events.popleft()
+            removed += 1
+        counter.inc(removed)
+        if self._writer is not None:
+            self._write(0, orjson.dumps(["A", sequence]) + b"\n")
+
+    def _write(self, sequence: int, line: bytes) -> None:
+        self._buffer.append((sequence, line))
+        if self._batch_future is None:
+            self._batch_future = asyncio.get_running_loop().create_future()
+        if len(self._buffer) == 1:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._buffer:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if self._commit_interval and not self._closing:
+                await asyncio.sleep(self._commit_interval)
+            batch, self._buffer = self._buffer, []
+            self._in_flight, self._batch_future = self._batch_future, None
+            offset = self._size
+            try:
+                await loop.run_in_executor(None, self._write_lines, [line for _, line in batch])
+            except Exception as e:
+                logger.exception("FileOutbox: failed to write %d lines", len(batch))
+                self._size = os.fstat(self._file.fileno()).st_size
+                self._in_flight.set_exception(e)
+                # Mark it retrieved: there may be no request waiting for it
+                self._in_flight.exception()
+            else:
+                self._in_flight.set_result(None)
+                self._size += sum(len(line) for _, line in batch)
+                if self._spilled and self._spill_offset is None:
+                    for sequence, line in batch:
+                        if sequence == self._spill_sequence:
+                            self._spill_offset = offset
+                            break
+                        offset += len(line)
+            self._in_flight = None
+            self._written.set()
+
+            if (
+                not self._buffer
+                and not self._spilled
+                and self._acked == self._last_sequence
+                and self._size > self._compact_bytes
+            ):
+                line = orjson.dumps(["A", self._last_sequence]) + b"\n"
+                await loop.run_in_executor(None, self._truncate, line)
+                self._size = len(line)
+                logger.info("FileOutbox: compacted %s", self._file.name)
+
+    async def _read_spilled(self) -> None:
+        # The next spilled event may not be written yet
+        while self._spill_offset is None or self._spill_offset >= self._size:
+            self._written.clear()
+            await self._written.wait()
+        loop = asyncio.get_running_loop()
+        events, self._spill_offset = await loop.run_in_executor(
+            None, _read_events, self._file.name, self._spill_offset, self._size, 0, self._max_in_memory
+        )
+        self._events.extend(events)
+        if events:
+            self._spill_sequence = events[-1].sequence + 1
+        if self._spill_sequence > self._last_sequence:
+            self._spilled = False
+            self._spill_offset = None
+            logger.info("FileOutbox: backlog back in memory")
+
+    def _claim(self) -> BinaryIO:
+        """
+        Runs in a worker thread: opens and locks the first free outbox file.
+        """
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        for slot in range(_MAX_SLOTS):
+            path = self._path if slot == 0 else f"{self._path}.{slot}"
+            file = open(path, "a+b")
+            try:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                file.close()
+                continue
+            return file
+        raise RuntimeError(f"All {_MAX_SLOTS} outbox files {self._path}[.n] are locked by other processes")
+
+    def _recover(self) -> None:
+        """
+        Runs in a worker thread: finds the last sequence and acknowledgement
+        in the claimed file, cuts off a torn last line and loads the oldest
+        undelivered events.
+        """
+        size = last_sequence = acked = 0
+        with open(self._file.name, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                size += len(line)
+                record = _decode(line)
+                if record is None:
+                    continue
+                if record[0] == "A":
+                    acked = max(acked, record[1])
+                last_sequence = max(last_sequence, record[1])
+        if size < os.fstat(self._file.fileno()).st_size:
+            logger.warning("FileOutbox: cutting off a torn line at the end of %s", self._file.name)
+            self._file.truncate(size)
+
+        self._size = size
+        self._last_sequence = last_sequence
+        self._acked = acked
+        events, offset = _read_events(self._file.name, 0, size, acked, self._max_in_memory)
+        self._events = deque(events)
+        if events and events[-1].sequence < last_sequence:
+            self._spilled = True
+            self._spill_sequence = events[-1].sequence + 1
+            self._spill_offset = offset
+
+    def _write_lines(self, lines: List[bytes]) -> None:
+        self._file.write(b"".join(lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _write_dead_letters(self, lines: List[bytes]) -> None:
+        with open(f"{self._file.name}.dead", "ab") as f:
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _truncate(self, line: bytes) -> None:
+        self._file.truncate(0)
+        self._write_lines([line])
+
+
+def _encode_event(event: OutboxEvent, kind: str = "E", *extra: str) -> bytes:
+    return orjson.dumps([
+        kind,
+        event.sequence,
+        event.package_id,
+        event.status.value,
+        event.previous_status.value,
+        event.customer_address,
+        event.at,
+        *extra,
+    ]) + b"\n"
+
+
+def _decode(line: bytes) -> Optional[list]:
+    try:
+        return orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return None
+
+
+def _read_events(path: str, start: int, end: int, after: int, limit: int) -> Tuple[List[OutboxEvent], int]:
+    """
+    Reads up to `limit` events numbered above `after` from the lines in
+    [start, end) of the file. Returns them with the offset right after the
+    last line read.
+    """
+    events: List[OutboxEvent] = []
+    offset = start
+    with open(path, "rb") as f:
+        f.seek(start)
+        while offset < end and len(events) < limit:
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            record = _decode(line)
+            if record is not None and record[0] == "E" and record[1] > after:
+                events.append(OutboxEvent(
+                    record[1],
+                    record[2],
+                    PackageStatus(record[3]),
+                    PackageStatus(record[4]),
+                    record[5],
+                    record[6],
+                ))
+    return events, offset
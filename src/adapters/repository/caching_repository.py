@@ -0,0 +1,283 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.domain.exceptions import PackageNotFoundError, StaleStatusError
+from src.metrics import Counter
+from src.ports.repository import PackageRepository
+
+logger = logging.getLogger(__name__)
+
+REPOSITORY_CACHE_REQUESTS = Counter(
+    "repository_cache_requests_total",
+    "Package lookups answered by the repository cache (hit) or passed to the storage (miss).",
+    ["result"],
+)
+REPOSITORY_CACHE_INVALIDATIONS = Counter(
+    "repository_cache_invalidations_total",
+    "Cached packages found stale (or gone) by a conditional update or a refresh.",
+)
+_HITS = REPOSITORY_CACHE_REQUESTS.labels("hit")
+_MISSES = REPOSITORY_CACHE_REQUESTS.labels("miss")
+
+
+class CachingPackageRepository(PackageRepository):
+    """
+    Decorator of any PackageRepository that keeps recently read or written
+    packages in memory, so repeated get_by_id() / get_many() of hot packages
+    (e.g. the ones being scanned right now) skip the storage.
+
+    - Bounded LRU of max_entries packages, each valid for ttl seconds.
+    - Write-through: save() and successful transitions store in the wrapped
+      repository first, then cache what was stored.
+    - A transition rejected with StaleStatusError (or PackageNotFoundError)
+      drops the cached package: the caller read a stale copy, and its retry
+      reads the storage again.
+    - refresh() drops the cached package and reads the stored one, for the
+      decisions no conditional update checks (a no-op, a refused transition).
+    - Listings, counts and change tracking go straight to the wrapped
+      repository.
+
+    Every write made through this instance updates the cache, so in a single
+    process it is never stale. Writes made by other processes (sql and
+    shared backends) are seen once the entry expires: ttl bounds how old a
+    plain read can be. Status updates don't depend on it: a transition is a
+    conditional update checked by the storage, and the use case refresh()es
+    the package before answering that there is nothing to do or that the
+    transition is not allowed.
+    """
+
+    def __init__(
+        self,
+        inner: PackageRepository,
+        max_entries: int = 10_000,
+        ttl: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._inner = inner
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._clock = clock
+        # package id -> (package, expires_at), least recently used first
+        self._cache: "OrderedDict[str, Tuple[Package, float]]" = OrderedDict()
+        # Ids being read from the storage, with how many reads are in flight,
+        # and those written meanwhile: such a read may return the version
+        # from before the write, so it must not be cached
+        self._loading: Dict[str, int] = {}
+        self._written_while_loading: Set[str] = set()
+
+    @property
+    def inner(self) -> PackageRepository:
+        return self._inner
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    async def open(self) -> None:
+        await self._inner.open()
+
+    async def close(self) -> None:
+        await self._inner.close()
+        self._cache.clear()
+
+    async def clear(self) -> None:
+        """
+        Empties the wrapped repository (adapters that support it) and the cache.
+        Useful for resetting state between tests.
+        """
+        await self._inner.clear()
+        self._cache.clear()
+
+    async def get_by_id(self, package_id: str) -> Package:
+        package = self._lookup(package_id)
+        if package is not None:
+            _HITS.inc()
+            return package
+        _MISSES.inc()
+        self._begin_load(package_id)
+        try:
+            package = await self._inner.get_by_id(package_id)
+        finally:
+            fresh = self._end_load(package_id)
+        if fresh:
+            self._put(package)
+        return package
+
+    async def get_many(self, package_ids: Iterable[str]) -> Dict[str, Package]:
+        found: Dict[str, Package] = {}
+        missing: List[str] = []
+        for package_id in package_ids:
+            package = self._lookup(package_id)
+            if package is None:
+                missing.append(package_id)
+            else:
+                found[package_id] = package
+        _HITS.inc(len(found))
+        _MISSES.inc(len(missing))
+        if not missing:
+            return found
+
+        for package_id in missing:
+            self._begin_load(package_id)
+        try:
+            loaded = await self._inner.get_many(missing)
+        finally:
+            fresh = [self._end_load(package_id) for package_id in missing]
+        for package_id, is_fresh in zip(missing, fresh):
+            package = loaded.get(package_id)
+            if package is not None:
+                found[package_id] = package
+                if is_fresh:
+                    self._put(package)
+        return found
+
+    async def refresh(self, package_id: str) -> Optional[Package]:
+        entry = self._cache.pop(package_id, None)
+        try:
+            package = await self.get_by_id(package_id)
+        except PackageNotFoundError:
+            if entry is not None:
+                REPOSITORY_CACHE_INVALIDATIONS.inc()
+            raise
+        if entry is not None and entry[0].status != package.status:
+            REPOSITORY_CACHE_INVALIDATIONS.inc()
+            logger.debug("CachingPackageRepository: Refreshed stale package %s", package_id)
+        return package
+
+    async def save(self, package: Package) -> None:
+        await self._inner.save(package)
+        self._written(package.id)
+        self._put(package)
+
+    async def transition(
+        self,
+        package_id: str,
+        expected_status: PackageStatus,
+        new_status: PackageStatus,
+    ) -> Package:
+        try:
+            package = await self._inner.transition(package_id, expected_status, new_status)
+        except (StaleStatusError, PackageNotFoundError):
+            self._invalidate(package_id)
+            raise
+        self._written(package_id)
+        self._put(package)
+        return package
+
+    async def transition_many(
+        self,
+        transitions: Sequence[Tuple[str, PackageStatus, PackageStatus]],
+    ) -> List[Union[Package, Exception]]:
+        results = await self._inner.transition_many(transitions)
+        for (package_id, _, _), outcome in zip(transitions, results):
+            if isinstance(outcome, Package):
+                self._written(package_id)
+                self._put(outcome)
+            else:
+                self._invalidate(package_id)
+        return results
+
+    async def preload_packages(self, packages: List[Package]) -> None:
+        # Bulk loads would flush the hot packages out of the cache: drop any
+        # cached copy instead, the next read fetches the stored one
+        await self._inner.preload_packages(packages)
+        for package in packages:
+            self._written(package.id)
+            self._cache.pop(package.id, None)
+
+    async def insert_missing(self, packages: List[Package]) -> List[str]:
+        existing = set(await self._inner.insert_missing(packages))
+        for package in packages:
+            if package.id not in existing:
+                self._written(package.id)
+                self._cache.pop(package.id, None)
+        return list(existing)
+
+    async def preload_if_empty(self, packages: List[Package]) -> bool:
+        loaded = await self._inner.preload_if_empty(packages)
+        if loaded:
+            for package in packages:
+                self._written(package.id)
+                self._cache.pop(package.id, None)
+        return loaded
+
+    async def list_all(self) -> List[Package]:
+        return await self._inner.list_all()
+
+    async def list_by_status(self, status: PackageStatus) -> List[Package]:
+        return await self._inner.list_by_status(status)
+
+    async def count_by_status(self) -> Dict[PackageStatus, int]:
+        return await self._inner.count_by_status()
+
+    async def list_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        status: Optional[PackageStatus] = None,
+    ) -> List[Package]:
+        return await self._inner.list_page(limit, after=after, status=status)
+
+    async def current_version(self) -> Optional[int]:
+        return await self._inner.current_version()
+
+    async def changes_since(self, version: int, limit: int) -> Optional[Tuple[int, List[Package]]]:
+        return await self._inner.changes_since(version, limit)
+
+    async def iter_all(
+        self,
+        status: Optional[PackageStatus] = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[List[Package]]:
+        async for chunk in self._inner.iter_all(status=status, chunk_size=chunk_size):
+            yield chunk
+
+    def _lookup(self, package_id: str) -> Optional[Package]:
+        entry = self._cache.get(package_id)
+        if entry is None:
+            return None
+        if entry[1] <= self._clock():
+            del self._cache[package_id]
+            return None
+        self._cache.move_to_end(package_id)
+        return entry[0]
+
+    def _put(self, package: Package) -> None:
+        if not self._max_entries:
+            return
+        cache = self._cache
+        cache[package.id] = (package, self._clock() + self._ttl)
+        cache.move_to_end(package.id)
+        if len(cache) > self._max_entries:
+            cache.popitem(last=False)
+
+    def _invalidate(self, package_id: str) -> None:
+        self._written(package_id)
+        if self._cache.pop(package_id, None) is not None:
+            REPOSITORY_CACHE_INVALIDATIONS.inc()
+            logger.debug("CachingPackageRepository: Dropped stale package %s", package_id)
+
+    def _begin_load(self, package_id: str) -> None:
+        self._loading[package_id] = self._loading.get(package_id, 0) + 1
+
+    def _end_load(self, package_id: str) -> bool:
+        """
+        Ends a storage read of the package; False if the package was written
+        while it was in flight (the result may predate the write).
+        """
+        remaining = self._loading[package_id] - 1
+        if remaining:
+            self._loading[package_id] = remaining
+            return package_id not in self._written_while_loading
+        del self._loading[package_id]
+        if package_id in self._written_while_loading:
+            self._written_while_loading.discard(package_id)
+            return False
+        return True
+
+    def _written(self, package_id: str) -> None:
+        if package_id in self._loading:
+            self._written_while_loading.add(package_id)
@@ -0,0 +1,72 @@
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+
+class ChangeLog:
+    """
+    Version counter of a repository plus a bounded log of which package
+    each version changed, for single-process adapters.
+
+    Every mutation gets the next version. The counter starts at the current
+    time in microseconds rather than at 0, so versions keep growing across
+    restarts (as long as there are fewer than a million mutations per second
+    of uptime) and a version or ETag handed out before a restart is never
+    mistaken for one of the new process. Only the last max_entries changes
+    are kept; older versions are reported as unknown and callers must
+    re-read everything.
+    """
+
+    def __init__(self, max_entries: int = 100_000, clock: Callable[[], float] = time.time):
+        self._version = int(clock() * 1_000_000)
+        # Every change with a version above _floor is in _entries
+        self._floor = self._version
+        self._entries: Deque[Tuple[int, str]] = deque(maxlen=max_entries)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def record(self, package_id: str) -> int:
+        self._version += 1
+        entries = self._entries
+        if len(entries) == entries.maxlen:
+            self._floor = entries[0][0]
+        entries.append((self._version, package_id))
+        return self._version
+
+    def reset(self) -> None:
+        """
+        Forgets every logged change (e.g. the repository was emptied): any
+        earlier version is unknown from now on.
+        """
+        self._version += 1
+        self._floor = self._version
+        self._entries.clear()
+
+    def since(self, version: int, limit: int) -> Optional[Tuple[int, List[str]]]:
+        """
+        Ids of the packages changed after `version`, each once, in the order
+        of their last change, at most `limit` of them. Returns them with the
+        version they bring the caller up to (the current one unless limit cut
+        the list short), or None if `version` is not known to this log.
+        """
+        if not self._floor <= version <= self._version:
+            return None
+        # Polling clients are usually close to the head: walk back from it
+        tail: List[Tuple[int, str]] = []
+        for entry in reversed(self._entries):
+            if entry[0] <= version:
+                break
+            tail.append(entry)
+
+        changed: Dict[str, None] = {}
+        reached = version
+        for entry_version, package_id in reversed(tail):
+            if package_id in changed:
+                del changed[package_id]
+            elif len(changed) == limit:
+                break
+            changed[package_id] = None
+            reached = entry_version
+        return reached, list(changed)
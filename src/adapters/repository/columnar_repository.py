@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import uuid
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.adapters.repository.change_log import ChangeLog
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus, STATUS_CODES, STATUSES_BY_CODE
+from src.domain.exceptions import PackageNotFoundError, StaleStatusError
+from src.ports.repository import PackageRepository
+
+logger = logging.getLogger(__name__)
+
+# Bytes used by a UUID key in the id column
+_KEY_SIZE = 16
+
+class ColumnarPackageRepository(PackageRepository):
+    """
+    Memory-compact in-memory implementation of PackageRepository,
+    meant for nodes holding tens of millions of packages.
+
+    Packages are not kept as objects but as rows spread over columns:
+    - ids: 16-byte UUIDs packed in one bytearray,
+    - statuses: one status code byte per row,
+    - addresses: a 4-byte reference into a table of interned addresses.
+    A dict maps each 16-byte id to its row. Package objects are only built
+    when they are read, so callers always get a private copy.
+
+    Package ids must be UUIDs (which is what Package generates).
+    Like InMemoryPackageRepository, writers share one lock, reads are
+    lock-free and changes are tracked in a ChangeLog.
+    """
+
+    def __init__(self, change_log_size: int = 100_000):
+        self._reset_rows()
+        self._lock = asyncio.Lock()
+        self._changes = ChangeLog(change_log_size)
+
+    async def get_by_id(self, package_id: str) -> Package:
+        """
+        Returns the Package whose id matches package_id.
+        If it doesn't exist, throws PackageNotFoundError.
+        """
+        return self._materialize(self._row_of(package_id))
+
+    async def get_many(self, package_ids: Iterable[str]) -> Dict[str, Package]:
+        """
+        Returns the known Packages among package_ids, keyed by id.
+        """
+        found: Dict[str, Package] = {}
+        for package_id in package_ids:
+            row = self._index.get(_key(package_id))
+            if row is not None:
+                found[package_id] = self._materialize(row)
+        return found
+
+    async def save(self, package: Package) -> None:
+        """
+        Persists or updates the Package as a row of the columns.
+        """
+        async with self._lock:
+            self._store(package)
+            logger.debug("save: Package %s saved/updated (status=%s)", package.id, package.status)
+
+    async def transition(
+        self,
+        package_id: str,
+        expected_status: PackageStatus,
+        new_status: PackageStatus,
+    ) -> Package:
+        """
+        Compare-and-set on the status byte of the package's row.
+        """
+        async with self._lock:
+            row = self._row_of(package_id)
+            current_code = self._statuses[row]
+            if current_code != STATUS_CODES[expected_status]:
+                raise StaleStatusError(
+                    f"Package {package_id} is in status {STATUSES_BY_CODE[current_code]}, expected {expected_status}."
+                )
+            self._set_status(row, STATUS_CODES[new_status])
+            self._changes.record(package_id)
+            logger.debug("transition: Package %s %s -> %s", package_id, expected_status, new_status)
+            return self._materialize(row)
+
+    async def preload_packages(self, packages: List[Package]) -> None:
+        """
+        Helper method for preloading a list of Packages into memory.
+        """
+        for package in packages:
+            self._store(package)
+        logger.debug("preload_packages: Loaded %d packages", len(packages))
+
+    async def insert_missing(self, packages: List[Package]) -> List[str]:
+        """
+        Checks and stores each package in one synchronous pass, so no write
+        can slip in between the check and the insert.
+        """
+        index = self._index
+        existing: List[str] = []
+        for package in packages:
+            if _key(package.id) in index:
+                existing.append(package.id)
+            else:
+                self._store(package)
+        logger.debug("insert_missing: Loaded %d packages", len(packages) - len(existing))
+        return existing
+
+    async def clear(self) -> None:
+        """
+        Helper method that removes every stored package.
+        Useful for resetting state between tests.
+        """
+        self._reset_rows()
+        # The change log keeps its size, and the version keeps growing
+        self._changes.reset()
+        logger.info("clear: repository emptied")
+
+    async def list_all(self) -> List[Package]:
+        """
+        Returns a snapshot list of all Packages currently stored.
+        """
+        return [self._materialize(row) for row in range(len(self._statuses))]
+
+    async def list_by_status(self, status: PackageStatus) -> List[Package]:
+        """
+        Returns the packages in the given status, scanning the status column.
+        """
+        return [self._materialize(row) for row in self._rows_in_status(STATUS_CODES[status], 0)]
+
+    async def count_by_status(self) -> Dict[PackageStatus, int]:
+        """
+        Returns the number of packages per status in O(number of statuses).
+        """
+        return {STATUSES_BY_CODE[code]: count for code, count in enumerate(self._counts)}
+
+    async def current_version(self) -> Optional[int]:
+        return self._changes.version
+
+    async def changes_since(self, version: int, limit: int) -> Optional[Tuple[int, List[Package]]]:
+        """
+        Answered from the change log, then the columns; never awaits.
+        """
+        changes = self._changes.since(version, limit)
+        if changes is None:
+            return None
+        reached, package_ids = changes
+        return reached, [self._materialize(self._index[_key(package_id)]) for package_id in package_ids]
+
+    async def list_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        status: Optional[PackageStatus] = None,
+    ) -> List[Package]:
+        """
+        Returns up to limit packages in insertion (row) order, starting right
+        after the package whose id is `after`.
+        """
+        start = 0 if after is None else self._row_of(after) + 1
+        if status is None:
+            end = min(start + limit, len(self._statuses))
+            return [self._materialize(row) for row in range(start, end)]
+
+        page: List[Package] = []
+        for row in self._rows_in_status(STATUS_CODES[status], start):
+            page.append(self._materialize(row))
+            if len(page) == limit:
+                break
+        return page
+
+    def _reset_rows(self) -> None:
+        """
+        Empties the columns, the index and the interned addresses.
+        """
+        # Map 16-byte package id -> row number
+        self._index: Dict[bytes, int] = {}
+        self._ids = bytearray()
+        self._statuses = bytearray()
+        self._address_refs = array("I")
+        # Interned customer addresses and their position in _addresses
+        self._addresses: List[str] = []
+        self._address_refs_by_value: Dict[str, int] = {}
+        # Number of rows per status code
+        self._counts: List[int] = [0] * len(STATUSES_BY_CODE)
+
+    def _row_of(self, package_id: str) -> int:
+        row = self._index.get(_key(package_id))
+        if row is None:
+            logger.warning("Package %s not found", package_id)
+            raise PackageNotFoundError(f"Package with id {package_id} not found.")
+        return row
+
+    def _rows_in_status(self, code: int, start: int) -> Iterable[int]:
+        """
+        Yields the rows from `start` whose status is `code`, using
+        bytearray.find to skip non-matching rows at C speed.
+        """
+        statuses = self._statuses
+        row = statuses.find(code, start)
+        while row != -1:
+            yield row
+            row = statuses.find(code, row + 1)
+
+    def _materialize(self, row: int) -> Package:
+        offset = row * _KEY_SIZE
+        return Package(
+            customer_address=self._addresses[self._address_refs[row]],
+            status=STATUSES_BY_CODE[self._statuses[row]],
+            package_id=str(uuid.UUID(bytes=bytes(self._ids[offset:offset + _KEY_SIZE]))),
+        )
+
+    def _set_status(self, row: int, code: int) -> None:
+        self._counts[self._statuses[row]] -= 1
+        self._counts[code] += 1
+        self._statuses[row] = code
+
+    def _intern_address(self, address: str) -> int:
+        ref = self._address_refs_by_value.get(address)
+        if ref is None:
+            ref = len(self._addresses)
+            self._addresses.append(address)
+            self._address_refs_by_value[address] = ref
+        return ref
+
+    def _store(self, package: Package) -> None:
+        key = _key(package.id)
+        if key is None:
+            raise ValueError(f"ColumnarPackageRepository only stores UUID package ids, got {package.id!r}")
+        code = STATUS_CODES[package.status]
+        address_ref = self._intern_address(package.customer_address)
+
+        row = self._index.get(key)
+        if row is None:
+            self._index[key] = len(self._statuses)
+            self._ids += key
+            self._statuses.append(code)
+            self._address_refs.append(address_ref)
+            self._counts[code] += 1
+        else:
+            self._set_status(row, code)
+            self._address_refs[row] = address_ref
+        self._changes.record(package.id)
+
+
+def _key(package_id: str) -> Optional[bytes]:
+    """
+    16-byte form of a UUID package id, or None if package_id isn't a UUID.
+    """
+    try:
+        return uuid.UUID(package_id).bytes
+    except (ValueError, TypeError, AttributeError):
+        return None
@@ -0,0 +1,38 @@
+from src.config import settings
+from src.ports.repository import PackageRepository
+from src.adapters.repository.caching_repository import CachingPackageRepository
+
+
+def build_repository() -> PackageRepository:
+    """
+    Builds the repository adapter selected by settings.repository_backend,
+    behind a CachingPackageRepository when settings.repository_cache_size is set.
+    Shared by the API and the command-line tools, so both reach the same storage.
+    """
+    repository = _build_backend()
+    if settings.repository_cache_size > 0:
+        return CachingPackageRepository(
+            repository, max_entries=settings.repository_cache_size, ttl=settings.repository_cache_ttl
+        )
+    return repository
+
+
+def _build_backend() -> PackageRepository:
+    # Backends are imported when selected: a process only pays for the
+    # modules (and third-party drivers, e.g. aiosqlite) it uses
+    if settings.repository_backend == "columnar":
+        from src.adapters.repository.columnar_repository import ColumnarPackageRepository
+        return ColumnarPackageRepository(change_log_size=settings.change_log_size)
+    if settings.repository_backend == "sql":
+        from src.adapters.repository.sql_repository import SQLPackageRepository
+        return SQLPackageRepository(settings.sql_database, pool_size=settings.sql_pool_size)
+    if settings.repository_backend == "shared":
+        from src.adapters.repository.shared_memory_repository import SharedMemoryPackageRepository
+        return SharedMemoryPackageRepository(settings.shared_state_path, capacity=settings.shared_capacity)
+    from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
+    from src.adapters.repository.journal import PackageJournal
+    return InMemoryPackageRepository(
+        journal=PackageJournal(settings.data_dir) if settings.data_dir else None,
+        snapshot_every=settings.snapshot_every,
+        change_log_size=settings.change_log_size,
+    )
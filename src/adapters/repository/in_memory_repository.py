@@ -1,61 +1,400 @@
 import asyncio
 import logging
-from typing import Dict, List
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
 
+from src.adapters.repository.change_log import ChangeLog
+from src.adapters.repository.journal import PackageJournal
 from src.domain.entities import Package
-from src.domain.exceptions import PackageNotFoundError
+from src.domain.enums import PackageStatus
+from src.domain.exceptions import PackageNotFoundError, StaleStatusError
+from src.metrics import Histogram, LOCK_LATENCY_BUCKETS
 from src.ports.repository import PackageRepository
 
 logger = logging.getLogger(__name__)
 
+LOCK_WAIT_SECONDS = Histogram(
+    "repository_lock_wait_seconds",
+    "Time writers waited for the lock of the in-memory repository.",
+    buckets=LOCK_LATENCY_BUCKETS,
+)
+LOCK_HOLD_SECONDS = Histogram(
+    "repository_lock_hold_seconds",
+    "Time writers held the lock of the in-memory repository.",
+    buckets=LOCK_LATENCY_BUCKETS,
+)
+
+# Journal records replayed by open() between two yields to the event loop
+_REPLAY_CHUNK = 10_000
+
 class InMemoryPackageRepository(PackageRepository):
     """
     In-memory implementation of PackageRepository.
-    Uses an internal dictionary and asyncio.Lock to ensure
-    that operations are atomic in asynchronous environments.
+    Uses an internal dictionary and one asyncio.Lock for all writers.
+    Their critical sections never await (waiting for the journal happens
+    after releasing it), so on one event loop the lock is hardly ever
+    contended: per-package locks were measured ~30% slower on the bare
+    transition and no faster with the journal or through PATCH
+    (benchmarks/bench_repository_contention.py).
+
+    Reads don't take any lock: the event loop runs a single coroutine at a
+    time and dictionary reads/copies never await, so they always observe
+    a consistent state without blocking writers. The time writers wait for
+    and hold a lock is recorded in the repository_lock_* histograms.
+
+    With a PackageJournal, every write is also appended to the journal and
+    only acknowledged once it is on disk (group commit), a snapshot is taken
+    every snapshot_every records, and open() rebuilds the state from the
+    last snapshot plus the log tail. Changes are applied in memory and
+    journaled in the same synchronous step, so the log order always
+    matches the order in which changes became visible.
+
+    Every stored package also bumps the repository version and is recorded
+    in a ChangeLog of the last change_log_size changes.
     """
-   
-    def __init__(self):
+
+    def __init__(
+        self,
+        journal: Optional[PackageJournal] = None,
+        snapshot_every: int = 1_000_000,
+        change_log_size: int = 100_000,
+    ):
         # Map package_id -> Package
         self._storage: Dict[str, Package] = {}
-        # Lock to avoid race conditions in get/save
+        # Insertion order of package ids and each id's position in it,
+        # used as the stable order for cursor pagination (O(1) cursor seek)
+        self._order: List[str] = []
+        self._positions: Dict[str, int] = {}
+        # Secondary index: status -> ids of the packages currently in it
+        self._by_status: Dict[PackageStatus, Set[str]] = {
+            package_status: set() for package_status in PackageStatus
+        }
+        # Lock to avoid race conditions between writers
         self._lock = asyncio.Lock()
+        self._journal = journal
+        self._snapshot_every = snapshot_every
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._changes = ChangeLog(change_log_size)
+
+    async def open(self) -> None:
+        """
+        Rebuilds the state from the journal (last snapshot + log tail)
+        and starts journaling new writes. The replay yields to the event
+        loop every _REPLAY_CHUNK records, so the app keeps serving (e.g.
+        /health) while a large journal is read; nothing else may use the
+        repository until open() returns.
+        """
+        if self._journal is None:
+            return
+        started = time.perf_counter()
+        records = 0
+        storage = self._storage
+        skipped = 0
+        for kind, package_id, status, address in self._journal.replay():
+            records += 1
+            if records % _REPLAY_CHUNK == 0:
+                await asyncio.sleep(0)
+            if kind == "T":
+                current = storage.get(package_id)
+                if current is None:
+                    skipped += 1
+                    continue
+                self._store(current.with_status(status))
+            elif kind == "C":
+                self._clear()
+            else:
+                self._store(Package(customer_address=address, status=status, package_id=package_id))
+        if skipped:
+            logger.warning("open: skipped %d journal transitions of unknown packages", skipped)
+        # Recovered packages are not changes clients could have missed
+        self._changes.reset()
+        await self._journal.open()
+        logger.info(
+            "open: recovered %d packages from %d journal records in %.3fs",
+            len(storage), records, time.perf_counter() - started,
+        )
+
+    async def close(self) -> None:
+        """
+        Takes a final snapshot and closes the journal.
+        """
+        if self._journal is None:
+            return
+        if self._snapshot_task is not None:
+            await self._snapshot_task
+        await self.snapshot()
+        await self._journal.close()
+
+    async def snapshot(self) -> None:
+        """
+        Writes a snapshot of the current state and drops the log segments it
+        replaces. The state is captured synchronously at the rotation point,
+        so writes made while the snapshot is being written go to the new
+        segment and are not lost.
+        """
+        if self._journal is None:
+            return
+        segment, rotated = self._journal.rotate()
+        packages = list(self._storage.values())
+        await rotated
+        await self._journal.write_snapshot(segment, packages)
 
     async def get_by_id(self, package_id: str) -> Package:
         """
         Returns the Package whose id matches package_id.
         If it doesn't exist, throws PackageNotFoundError.
         """
-        async with self._lock:
-            package = self._storage.get(package_id)
-            if package is None:
-                logger.warning("get_by_id: Package %s not found", package_id)
-                raise PackageNotFoundError(f"Package with id {package_id} not found.")
-            logger.debug("get_by_id: returning package %s (status=%s)", package_id, package.status)
-            return package
-        
+        package = self._storage.get(package_id)
+        if package is None:
+            logger.warning("get_by_id: Package %s not found", package_id)
+            raise PackageNotFoundError(f"Package with id {package_id} not found.")
+        logger.debug("get_by_id: returning package %s (status=%s)", package_id, package.status)
+        return package
+
     async def save(self, package: Package) -> None:
         """
         Persists or updates the Package object in in-memory storage.
         """
+        requested = time.perf_counter()
+        async with self._lock:
+            acquired = time.perf_counter()
+            LOCK_WAIT_SECONDS.observe(acquired - requested)
+            self._store(package)
+            commit = self._journal.append_put(package) if self._journal else None
+            logger.debug("save: Package %s saved/updated (status=%s)", package.id, package.status)
+            LOCK_HOLD_SECONDS.observe(time.perf_counter() - acquired)
+        await self._durable(commit)
+
+    async def transition(
+        self,
+        package_id: str,
+        expected_status: PackageStatus,
+        new_status: PackageStatus,
+    ) -> Package:
+        """
+        Compare-and-set status change done in a single critical section.
+        The stored Package is replaced by an updated copy, so instances
+        handed out earlier are never mutated behind the caller's back.
+        """
+        requested = time.perf_counter()
         async with self._lock:
-            self._storage[package.id] = package
-            logger.info("save: Package %s saved/updated (status=%s)", package.id, package.status)
+            acquired = time.perf_counter()
+            LOCK_WAIT_SECONDS.observe(acquired - requested)
+            try:
+                current = self._storage.get(package_id)
+                if current is None:
+                    logger.warning("transition: Package %s not found", package_id)
+                    raise PackageNotFoundError(f"Package with id {package_id} not found.")
+                if current.status != expected_status:
+                    raise StaleStatusError(
+                        f"Package {package_id} is in status {current.status}, expected {expected_status}."
+                    )
+                updated = current.with_status(new_status)
+                self._store(updated)
+                commit = self._journal.append_transition(package_id, new_status) if self._journal else None
+                logger.debug("transition: Package %s %s -> %s", package_id, expected_status, new_status)
+            finally:
+                LOCK_HOLD_SECONDS.observe(time.perf_counter() - acquired)
+        await self._durable(commit)
+        return updated
+
+    async def get_many(self, package_ids: Iterable[str]) -> Dict[str, Package]:
+        """
+        Returns the known Packages among package_ids, keyed by id.
+        """
+        storage = self._storage
+        return {package_id: storage[package_id] for package_id in package_ids if package_id in storage}
+
+    async def transition_many(
+        self,
+        transitions: Sequence[Tuple[str, PackageStatus, PackageStatus]],
+    ) -> List[Union[Package, Exception]]:
+        """
+        Applies a batch of compare-and-set transitions in one pass, under
+        a single acquisition of the lock.
+        """
+        results: List[Union[Package, Exception]] = []
+        storage = self._storage
+        applied = 0
+        commit = None
+        requested = time.perf_counter()
+        async with self._lock:
+            acquired = time.perf_counter()
+            LOCK_WAIT_SECONDS.observe(acquired - requested)
+            for package_id, expected_status, new_status in transitions:
+                current = storage.get(package_id)
+                if current is None:
+                    results.append(PackageNotFoundError(f"Package with id {package_id} not found."))
+                elif current.status != expected_status:
+                    results.append(StaleStatusError(
+                        f"Package {package_id} is in status {current.status}, expected {expected_status}."
+                    ))
+                else:
+                    updated = current.with_status(new_status)
+                    self._store(updated)
+                    if self._journal:
+                        commit = self._journal.append_transition(package_id, new_status)
+                    results.append(updated)
+                    applied += 1
+            LOCK_HOLD_SECONDS.observe(time.perf_counter() - acquired)
+
+        # Batches are written in order, so the last one covers all of them
+        await self._durable(commit)
+
+        logger.debug("transition_many: applied %d/%d transitions", applied, len(transitions))
+        return results
 
     async def preload_packages(self, packages: List[Package]) -> None:
         """
         Helper method for preloading a list of Packages into memory.
-        Useful for initializing sample data when the app starts.
+        Useful for initializing sample data when the app starts, and used
+        chunk by chunk as the bulk insert of manifest ingestion.
         """
-        async with self._lock:
-            for package in packages:
-                self._storage[package.id] = package
-                logger.info("preload_packages: Loaded package %s (address=%s)", package.id, package.customer_address)
+        commit = None
+        for package in packages:
+            self._store(package)
+            if self._journal:
+                commit = self._journal.append_put(package)
+        logger.debug("preload_packages: Loaded %d packages", len(packages))
+        await self._durable(commit)
+
+    async def insert_missing(self, packages: List[Package]) -> List[str]:
+        """
+        Checks and stores each package in one synchronous pass, so no write
+        can slip in between the check and the insert.
+        """
+        storage = self._storage
+        existing: List[str] = []
+        commit = None
+        for package in packages:
+            if package.id in storage:
+                existing.append(package.id)
+                continue
+            self._store(package)
+            if self._journal:
+                commit = self._journal.append_put(package)
+        logger.debug("insert_missing: Loaded %d packages", len(packages) - len(existing))
+        await self._durable(commit)
+        return existing
+
+    async def clear(self) -> None:
+        """
+        Helper method that removes every stored package.
+        Useful for resetting state between tests. Journaled, so the
+        packages don't come back after a restart.
+        """
+        self._clear()
+        commit = self._journal.append_clear() if self._journal else None
+        logger.info("clear: repository emptied")
+        await self._durable(commit)
 
     async def list_all(self) -> List[Package]:
         """
-        Returns a list of all Packages currently in memory.
+        Returns a snapshot list of all Packages currently in memory.
         """
-        async with self._lock:
-            logger.debug("list_all: returning %d packages", len(self._storage))
-            return list(self._storage.values())
\ No newline at end of file
+        logger.debug("list_all: returning %d packages", len(self._storage))
+        return list(self._storage.values())
+
+    async def list_by_status(self, status: PackageStatus) -> List[Package]:
+        """
+        Returns the packages in the given status using the status index,
+        without scanning the whole storage.
+        """
+        storage = self._storage
+        return [storage[package_id] for package_id in self._by_status[status]]
+
+    async def count_by_status(self) -> Dict[PackageStatus, int]:
+        """
+        Returns the number of packages per status in O(number of statuses).
+        """
+        return {package_status: len(ids) for package_status, ids in self._by_status.items()}
+
+    async def current_version(self) -> Optional[int]:
+        return self._changes.version
+
+    async def changes_since(self, version: int, limit: int) -> Optional[Tuple[int, List[Package]]]:
+        """
+        Answered from the change log, then the storage; never awaits, so the
+        packages are consistent with the returned version.
+        """
+        changes = self._changes.since(version, limit)
+        if changes is None:
+            return None
+        reached, package_ids = changes
+        storage = self._storage
+        return reached, [storage[package_id] for package_id in package_ids]
+
+    async def list_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        status: Optional[PackageStatus] = None,
+    ) -> List[Package]:
+        """
+        Returns up to limit packages in insertion order, starting right after
+        the package whose id is `after`. Without a status filter this only
+        touches the requested slice; with one it scans forward until the page
+        is full.
+        """
+        start = 0
+        if after is not None:
+            position = self._positions.get(after)
+            if position is None:
+                raise PackageNotFoundError(f"Package with id {after} not found.")
+            start = position + 1
+
+        storage = self._storage
+        order = self._order
+        if status is None:
+            return [storage[package_id] for package_id in order[start:start + limit]]
+
+        page: List[Package] = []
+        for index in range(start, len(order)):
+            package = storage[order[index]]
+            if package.status == status:
+                page.append(package)
+                if len(page) == limit:
+                    break
+        return page
+
+    async def _durable(self, commit: Optional[asyncio.Future]) -> None:
+        """
+        Waits until a journal write is on disk, then takes a snapshot in the
+        background if enough records piled up since the last one.
+        """
+        if commit is None:
+            return
+        await commit
+        if (
+            self._journal.records_since_snapshot >= self._snapshot_every
+            and (self._snapshot_task is None or self._snapshot_task.done())
+        ):
+            self._snapshot_task = asyncio.create_task(self.snapshot())
+
+    def _clear(self) -> None:
+        self._storage.clear()
+        self._order.clear()
+        self._positions.clear()
+        for ids in self._by_status.values():
+            ids.clear()
+        self._changes.reset()
+
+    def _store(self, package: Package) -> None:
+        """
+        Inserts or replaces a package, keeping the pagination order and the
+        status index up to date. Never awaits, so callers see both the storage
+        and the index change atomically.
+        """
+        previous = self._storage.get(package.id)
+        if previous is None:
+            self._positions[package.id] = len(self._order)
+            self._order.append(package.id)
+        elif previous is package:
+            # The stored instance was mutated in place, so its old status is unknown
+            for ids in self._by_status.values():
+                ids.discard(package.id)
+        elif previous.status != package.status:
+            self._by_status[previous.status].discard(package.id)
+        self._by_status[package.status].add(package.id)
+        self._storage[package.id] = package
+        self._changes.record(package.id)
@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import os
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus, STATUS_CODES, STATUSES_BY_CODE
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_RE = re.compile(r"^journal-(\d{10})\.log$")
+_SNAPSHOT_RE = re.compile(r"^snapshot-(\d{10})\.dat$")
+
+# Sentinel queued between records to switch to the next log segment
+_ROTATE = object()
+
+# A replayed record: ("P", id, status, address) for a full package write,
+# ("T", id, status, None) for a status transition, ("C", None, None, None)
+# when every package was removed
+JournalRecord = Tuple[str, Optional[str], Optional[PackageStatus], Optional[str]]
+
+
+class PackageJournal:
+    """
+    Durable storage for an in-memory repository: an append-only log of
+    package writes plus periodic compact snapshots, all under one directory.
+
+    - journal-<n>.log: log segments, one record per line. Package writes are
+      "P<TAB>id<TAB>status_code<TAB>address", transitions "T<TAB>id<TAB>status_code",
+      and "C" stands for removing every package.
+    - snapshot-<n>.dat: every package as a "P" line, i.e. the full state at the
+      start of segment n. Recovery loads the newest snapshot and replays the
+      segments from n onwards.
+
+    Writes use group commit: append() only buffers the record and returns a
+    future; a writer task waits commit_interval seconds to gather concurrent
+    records, then writes and fsyncs the whole batch in a worker thread and
+    resolves every future of the batch at once. One fsync is thus shared by
+    all the PATCHes that arrived in the same window, and the event loop never
+    blocks on disk I/O.
+
+    Status codes are positions in PackageStatus, so new statuses must be
+    added at the end of the enum to keep existing journals readable.
+    """
+
+    def __init__(self, directory: str, *, commit_interval: float = 0.002):
+        self._directory = directory
+        self._commit_interval = commit_interval
+        self._segment = 0
+        self._file = None
+        self._buffer: List[Union[str, object]] = []
+        self._batch_future: Optional[asyncio.Future] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        # Records appended since the last snapshot, used to decide when to take one
+        self.records_since_snapshot = 0
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def replay(self) -> Iterator[JournalRecord]:
+        """
+        Yields the records needed to rebuild the state: the newest snapshot,
+        then every later log segment in order. A torn last line (crash in the
+        middle of a write) is ignored.
+        """
+        os.makedirs(self._directory, exist_ok=True)
+        snapshots = self._numbered(_SNAPSHOT_RE)
+        first_segment = snapshots[-1] if snapshots else 0
+        if snapshots:
+            yield from _read_records(self._path("snapshot", first_segment))
+        self.records_since_snapshot = 0
+        for segment in self._numbered(_SEGMENT_RE):
+            if segment >= first_segment:
+                for record in _read_records(self._path("journal", segment)):
+                    self.records_since_snapshot += 1
+                    yield record
+
+    async def open(self) -> None:
+        """
+        Opens a fresh log segment after the existing ones and starts the
+        group-commit writer. Call after replay().
+        """
+        os.makedirs(self._directory, exist_ok=True)
+        existing = self._numbered(_SEGMENT_RE) + self._numbered(_SNAPSHOT_RE)
+        self._segment = max(existing, default=0) + 1
+        self._file = open(self._path("journal", self._segment), "ab")
+        self._wakeup = asyncio.Event()
+        self._writer = asyncio.create_task(self._run(), name="package-journal")
+        logger.info("PackageJournal: writing to segment %d in %s", self._segment, self._directory)
+
+    async def close(self) -> None:
+        """
+        Flushes pending records and closes the current segment.
+        """
+        if self._writer is None:
+            return
+        if self._batch_future is not None:
+            await asyncio.shield(self._batch_future)
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self._writer = None
+        self._file.close()
+        self._file = None
+
+    def append_put(self, package: Package) -> asyncio.Future:
+        """
+        Buffers a full package write. The returned future resolves once the
+        record is on disk.
+        """
+        return self._append(
+            f"P\t{package.id}\t{STATUS_CODES[package.status]}\t{_escape(package.customer_address)}\n"
+        )
+
+    def append_transition(self, package_id: str, status: PackageStatus) -> asyncio.Future:
+        """
+        Buffers a status transition. The returned future resolves once the
+        record is on disk.
+        """
+        return self._append(f"T\t{package_id}\t{STATUS_CODES[status]}\n")
+
+    def append_clear(self) -> asyncio.Future:
+        """
+        Buffers the removal of every package. The returned future resolves
+        once the record is on disk.
+        """
+        return self._append("C\n")
+
+    def rotate(self) -> Tuple[int, asyncio.Future]:
+        """
+        Starts a new log segment right after the records buffered so far.
+        Returns the new segment number, and a future resolving once the
+        previous segment is fully written and closed.
+        """
+        self._segment += 1
+        future = self._append(_ROTATE)
+        self.records_since_snapshot = 0
+        return self._segment, future
+
+    async def write_snapshot(self, segment: int, packages: List[Package]) -> None:
+        """
+        Writes the given packages (the full state at the start of `segment`)
+        as a snapshot, then deletes the segments and snapshots it supersedes.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write_snapshot_file, segment, packages)
+        for old in self._numbered(_SEGMENT_RE):
+            if old < segment:
+                os.remove(self._path("journal", old))
+        for old in self._numbered(_SNAPSHOT_RE):
+            if old < segment:
+                os.remove(self._path("snapshot", old))
+        logger.info("PackageJournal: snapshot %d written (%d packages)", segment, len(packages))
+
+    def _append(self, entry: Union[str, object]) -> asyncio.Future:
+        if self._writer is None:
+            raise RuntimeError("PackageJournal is not open")
+        self._buffer.append(entry)
+        if entry is not _ROTATE:
+            self.records_since_snapshot += 1
+        if self._batch_future is None:
+            self._batch_future = asyncio.get_running_loop().create_future()
+            self._wakeup.set()
+        return self._batch_future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if self._commit_interval:
+                await asyncio.sleep(self._commit_interval)
+            batch, self._buffer = self._buffer, []
+            future, self._batch_future = self._batch_future, None
+            try:
+                await loop.run_in_executor(None, self._write_batch, batch)
+            except Exception as e:
+                logger.exception("PackageJournal: failed to write %d records", len(batch))
+                future.set_exception(e)
+            else:
+                future.set_result(None)
+
+    def _write_batch(self, batch: List[Union[str, object]]) -> None:
+        """
+        Runs in a worker thread: writes the lines, switching segment on each
+        rotation marker, and fsyncs every file it touched.
+        """
+        lines: List[str] = []
+        for entry in batch:
+            if entry is _ROTATE:
+                self._flush(lines)
+                lines = []
+                self._file.close()
+                self._file = open(self._path("journal", self._segment_after(self._file.name)), "ab")
+            else:
+                lines.append(entry)
+        self._flush(lines)
+
+    def _flush(self, lines: List[str]) -> None:
+        if lines:
+            self._file.write("".join(lines).encode("utf-8"))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _write_snapshot_file(self, segment: int, packages: List[Package]) -> None:
+        path = self._path("snapshot", segment)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            chunk: List[str] = []
+            for package in packages:
+                chunk.append(
+                    f"P\t{package.id}\t{STATUS_CODES[package.status]}\t{_escape(package.customer_address)}\n"
+                )
+                if len(chunk) == 10_000:
+                    f.write("".join(chunk).encode("utf-8"))
+                    chunk = []
+            f.write("".join(chunk).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _segment_after(self, path: str) -> int:
+        return int(_SEGMENT_RE.match(os.path.basename(path)).group(1)) + 1
+
+    def _numbered(self, pattern: "re.Pattern") -> List[int]:
+        numbers = []
+        for name in os.listdir(self._directory):
+            match = pattern.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _path(self, kind: str, number: int) -> str:
+        extension = "log" if kind == "journal" else "dat"
+        return os.path.join(self._directory, f"{kind}-{number:010d}.{extension}")
+
+
+def _read_records(path: str) -> Iterable[JournalRecord]:
+    with open(path, "r", encoding="utf-8", newline="\n") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                # Torn write at the end of the file
+                return
+            fields = line[:-1].split("\t")
+            if fields[0] == "C":
+                yield "C", None, None, None
+            elif fields[0] == "T":
+                yield "T", fields[1], STATUSES_BY_CODE[int(fields[2])], None
+            else:
+                address = fields[3]
+                yield "P", fields[1], STATUSES_BY_CODE[int(fields[2])], _unescape(address) if "\\" in address else address
+
+
+def _escape(value: str) -> str:
+    if "\\" not in value and "\t" not in value and "\n" not in value and "\r" not in value:
+        return value
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r"\\(.)", lambda m: {"t": "\t", "n": "\n", "r": "\r"}.get(m.group(1), m.group(1)), value)
@@ -0,0 +1,464 @@
+import asyncio
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus, STATUS_CODES, STATUSES_BY_CODE
+from src.domain.exceptions import PackageNotFoundError, StaleStatusError
+from src.ports.repository import PackageRepository
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"PKGSHM01"
+# magic, capacity, count, generation (bumped by clear())
+_HEADER = struct.Struct("<8sQQQ")
+_HEADER_SIZE = 64
+# Count and generation are updated in place, one aligned 8-byte field each
+_FIELD = struct.Struct("<Q")
+_COUNT_OFFSET = 16
+_GENERATION_OFFSET = 24
+_KEY_SIZE = 16
+# Each address slot is a 2-byte length followed by up to 126 bytes of UTF-8
+_ADDRESS_SLOT = 128
+_ADDRESS_LENGTH = struct.Struct("<H")
+MAX_ADDRESS_BYTES = _ADDRESS_SLOT - _ADDRESS_LENGTH.size
+# Spins on an odd row version before yielding the CPU to the writer
+_SPINS_BEFORE_YIELD = 100
+
+
+class SharedMemoryPackageRepository(PackageRepository):
+    """
+    PackageRepository whose state lives in a memory-mapped file, so several
+    worker processes (uvicorn --workers N) serve the same packages.
+
+    The file holds a header and fixed-size columns, one row per package in
+    insertion order:
+    - ids: 16-byte UUIDs,
+    - statuses: one status code byte,
+    - versions: a 4-byte counter per row, odd while the row is being written,
+    - addresses: a length-prefixed 128-byte slot.
+
+    Cross-process consistency:
+    - Writers take an fcntl record lock on the row's status byte, so a
+      transition's compare-and-set is atomic across processes. Appends and
+      clear() take a lock on the header. Locks are requested without
+      blocking and retried after yielding to the event loop. Once it has the
+      row lock, a writer checks the generation and the row's id again, and
+      looks the package up anew if a clear() reused the row meanwhile.
+    - Readers take no lock: they read a row between two reads of its version
+      (seqlock) and retry if a writer was in the middle of it.
+    - Each process keeps its own id -> row dict and catches up with rows
+      appended by other processes from the count in the header; the
+      generation number tells it to start over after a clear().
+
+    Like ColumnarPackageRepository, package ids must be UUIDs. The capacity
+    is fixed when the file is created; the file is sparse, so unused rows
+    cost no memory. Put it on a tmpfs (/dev/shm) to keep it off the disk.
+    """
+
+    def __init__(self, path: str, capacity: int = 1_000_000):
+        self._path = path
+        self._capacity = capacity
+        self._fd: Optional[int] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._versions: Optional[memoryview] = None
+        # Local index, in sync with the first _known rows of generation _generation
+        self._index: Dict[bytes, int] = {}
+        self._known = 0
+        self._generation = -1
+
+    async def open(self) -> None:
+        """
+        Maps the state file, creating and sizing it if this is the first
+        process to open it.
+        """
+        if self._mm is not None:
+            return
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(fd, fcntl.LOCK_EX, 1, 0)
+        try:
+            if os.fstat(fd).st_size == 0:
+                os.ftruncate(fd, _file_size(self._capacity))
+                os.pwrite(fd, _HEADER.pack(_MAGIC, self._capacity, 0, 0), 0)
+                logger.info("SharedMemoryPackageRepository: created %s (capacity=%d)", self._path, self._capacity)
+            magic, capacity, _, _ = _HEADER.unpack(os.pread(fd, _HEADER.size, 0))
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN, 1, 0)
+        if magic != _MAGIC:
+            os.close(fd)
+            raise ValueError(f"{self._path} is not a package state file")
+        if capacity != self._capacity:
+            logger.warning(
+                "SharedMemoryPackageRepository: %s was created with capacity %d, ignoring %d",
+                self._path, capacity, self._capacity,
+            )
+        self._capacity = capacity
+        self._fd = fd
+        self._mm = mmap.mmap(fd, _file_size(capacity))
+        self._ids_offset = _HEADER_SIZE
+        self._statuses_offset = self._ids_offset + capacity * _KEY_SIZE
+        versions_offset = self._statuses_offset + capacity
+        self._versions = memoryview(self._mm)[versions_offset:versions_offset + capacity * 4].cast("I")
+        self._addresses_offset = versions_offset + capacity * 4
+        self._sync()
+        logger.info("SharedMemoryPackageRepository: opened %s with %d packages", self._path, self._known)
+
+    async def close(self) -> None:
+        """
+        Unmaps the state file. The state itself stays in the file.
+        """
+        if self._mm is None:
+            return
+        self._versions.release()
+        self._versions = None
+        self._mm.close()
+        self._mm = None
+        os.close(self._fd)
+        self._fd = None
+
+    async def get_by_id(self, package_id: str) -> Package:
+        """
+        Returns the Package whose id matches package_id.
+        If it doesn't exist, throws PackageNotFoundError.
+        """
+        return self._read(self._row_of(package_id))
+
+    async def get_many(self, package_ids: Iterable[str]) -> Dict[str, Package]:
+        """
+        Returns the known Packages among package_ids, keyed by id.
+        """
+        self._sync()
+        found: Dict[str, Package] = {}
+        for package_id in package_ids:
+            row = self._index.get(_key(package_id))
+            if row is not None:
+                found[package_id] = self._read(row)
+        return found
+
+    async def save(self, package: Package) -> None:
+        """
+        Persists or updates the Package; new packages are appended under the
+        header lock.
+        """
+        key, code, address = _encode(package)
+        while True:
+            self._sync()
+            row = self._index.get(key)
+            if row is None:
+                await self._acquire(0)
+                try:
+                    row = self._append_locked(key, code, address)
+                finally:
+                    self._release(0)
+                if row is not None:
+                    logger.debug("save: Package %s saved (status=%s)", package.id, package.status)
+                    return
+                row = self._index[key]
+            generation = self._generation
+            lock_offset = self._statuses_offset + row
+            await self._acquire(lock_offset)
+            if self._holds(row, key, generation):
+                break
+            self._release(lock_offset)
+        try:
+            self._write_row(row, code, address)
+        finally:
+            self._release(lock_offset)
+        logger.debug("save: Package %s updated (status=%s)", package.id, package.status)
+
+    async def transition(
+        self,
+        package_id: str,
+        expected_status: PackageStatus,
+        new_status: PackageStatus,
+    ) -> Package:
+        """
+        Compare-and-set on the row's status byte, under the row's record lock.
+        """
+        key = _key(package_id)
+        while True:
+            row = self._row_of(package_id)
+            generation = self._generation
+            lock_offset = self._statuses_offset + row
+            await self._acquire(lock_offset)
+            if self._holds(row, key, generation):
+                break
+            self._release(lock_offset)
+        try:
+            current_code = self._mm[lock_offset]
+            if current_code != STATUS_CODES[expected_status]:
+                raise StaleStatusError(
+                    f"Package {package_id} is in status {STATUSES_BY_CODE[current_code]}, expected {expected_status}."
+                )
+            self._write_row(row, STATUS_CODES[new_status], None)
+            updated = self._read(row)
+        finally:
+            self._release(lock_offset)
+        logger.debug("transition: Package %s %s -> %s", package_id, expected_status, new_status)
+        return updated
+
+    async def preload_packages(self, packages: List[Package]) -> None:
+        """
+        Helper method for preloading a list of Packages, appended under one
+        header lock.
+        """
+        await self._acquire(0)
+        try:
+            self._preload_locked(packages)
+        finally:
+            self._release(0)
+        logger.debug("preload_packages: Loaded %d packages", len(packages))
+
+    async def insert_missing(self, packages: List[Package]) -> List[str]:
+        """
+        Appends the packages whose id is unknown under one header lock;
+        rows already there (in this process or another) are left untouched.
+        """
+        existing: List[str] = []
+        await self._acquire(0)
+        try:
+            for package in packages:
+                key, code, address = _encode(package)
+                if self._append_locked(key, code, address) is None:
+                    existing.append(package.id)
+        finally:
+            self._release(0)
+        logger.debug("insert_missing: Loaded %d packages", len(packages) - len(existing))
+        return existing
+
+    async def preload_if_empty(self, packages: List[Package]) -> bool:
+        """
+        Check and load under the header lock, so that of several workers
+        starting at once only the first one preloads.
+        """
+        await self._acquire(0)
+        try:
+            self._sync()
+            if self._known:
+                return False
+            self._preload_locked(packages)
+        finally:
+            self._release(0)
+        logger.info("preload_if_empty: Loaded %d packages", len(packages))
+        return True
+
+    async def clear(self) -> None:
+        """
+        Helper method that removes every stored package, for every process.
+        Useful for resetting state between tests.
+        """
+        await self._acquire(0)
+        try:
+            (generation,) = _FIELD.unpack_from(self._mm, _GENERATION_OFFSET)
+            _FIELD.pack_into(self._mm, _COUNT_OFFSET, 0)
+            _FIELD.pack_into(self._mm, _GENERATION_OFFSET, generation + 1)
+        finally:
+            self._release(0)
+        self._sync()
+        logger.info("clear: repository emptied")
+
+    async def list_all(self) -> List[Package]:
+        """
+        Returns a snapshot list of all Packages currently stored.
+        """
+        self._sync()
+        return [self._read(row) for row in range(self._known)]
+
+    async def list_by_status(self, status: PackageStatus) -> List[Package]:
+        """
+        Returns the packages in the given status, scanning the status column.
+        """
+        self._sync()
+        return [self._read(row) for row in self._rows_in_status(STATUS_CODES[status], 0)]
+
+    async def count_by_status(self) -> Dict[PackageStatus, int]:
+        """
+        Counts the status column in one pass per status.
+        """
+        self._sync()
+        statuses = self._mm[self._statuses_offset:self._statuses_offset + self._known]
+        return {status: statuses.count(code) for status, code in STATUS_CODES.items()}
+
+    async def list_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        status: Optional[PackageStatus] = None,
+    ) -> List[Package]:
+        """
+        Returns up to limit packages in insertion (row) order, starting right
+        after the package whose id is `after`.
+        """
+        start = 0 if after is None else self._row_of(after) + 1
+        self._sync()
+        if status is None:
+            return [self._read(row) for row in range(start, min(start + limit, self._known))]
+        page: List[Package] = []
+        for row in self._rows_in_status(STATUS_CODES[status], start):
+            page.append(self._read(row))
+            if len(page) == limit:
+                break
+        return page
+
+    def _sync(self) -> None:
+        """
+        Brings the local id -> row index up to date with the shared header.
+        """
+        if self._mm is None:
+            raise RuntimeError("SharedMemoryPackageRepository is not open")
+        (count,) = _FIELD.unpack_from(self._mm, _COUNT_OFFSET)
+        (generation,) = _FIELD.unpack_from(self._mm, _GENERATION_OFFSET)
+        if generation != self._generation:
+            self._index = {}
+            self._known = 0
+            self._generation = generation
+        if count > self._known:
+            mm, offset, index = self._mm, self._ids_offset, self._index
+            for row in range(self._known, count):
+                start = offset + row * _KEY_SIZE
+                index[mm[start:start + _KEY_SIZE]] = row
+            self._known = count
+
+    def _row_of(self, package_id: str) -> int:
+        key = _key(package_id)
+        row = self._index.get(key)
+        self._sync()
+        if row is None or row >= self._known:
+            row = self._index.get(key)
+        if row is None:
+            logger.warning("Package %s not found", package_id)
+            raise PackageNotFoundError(f"Package with id {package_id} not found.")
+        return row
+
+    def _holds(self, row: int, key: bytes, generation: int) -> bool:
+        """
+        Whether the row still holds the package it was looked up for, once
+        its lock is taken. While waiting for the lock, another process may
+        have run clear() and appended other packages into the same rows:
+        the caller then releases the lock and looks the package up again.
+        """
+        (current,) = _FIELD.unpack_from(self._mm, _GENERATION_OFFSET)
+        id_offset = self._ids_offset + row * _KEY_SIZE
+        if current != generation or self._mm[id_offset:id_offset + _KEY_SIZE] != key:
+            logger.debug("Row %d changed hands while waiting for its lock, looking it up again", row)
+            return False
+        return True
+
+    def _rows_in_status(self, code: int, start: int) -> Iterable[int]:
+        mm, offset, end = self._mm, self._statuses_offset, self._statuses_offset + self._known
+        needle = bytes((code,))
+        position = mm.find(needle, offset + start, end)
+        while position != -1:
+            yield position - offset
+            position = mm.find(needle, position + 1, end)
+
+    def _read(self, row: int) -> Package:
+        """
+        Reads a consistent copy of a row (seqlock: retry while a writer in
+        another process is changing it).
+        """
+        mm, versions = self._mm, self._versions
+        spins = 0
+        while True:
+            version = versions[row]
+            if not version & 1:
+                code = mm[self._statuses_offset + row]
+                slot = self._addresses_offset + row * _ADDRESS_SLOT
+                (length,) = _ADDRESS_LENGTH.unpack_from(mm, slot)
+                address = mm[slot + 2:slot + 2 + length]
+                if versions[row] == version:
+                    break
+            spins += 1
+            if spins % _SPINS_BEFORE_YIELD == 0:
+                os.sched_yield()
+        id_offset = self._ids_offset + row * _KEY_SIZE
+        return Package(
+            customer_address=address.decode("utf-8"),
+            status=STATUSES_BY_CODE[code],
+            package_id=str(uuid.UUID(bytes=mm[id_offset:id_offset + _KEY_SIZE])),
+        )
+
+    def _write_row(self, row: int, code: int, address: Optional[bytes]) -> None:
+        """
+        Writes a row the caller holds the lock of, bracketed by version bumps.
+        """
+        versions = self._versions
+        versions[row] = (versions[row] + 1) & 0xFFFFFFFF
+        self._mm[self._statuses_offset + row] = code
+        if address is not None:
+            slot = self._addresses_offset + row * _ADDRESS_SLOT
+            _ADDRESS_LENGTH.pack_into(self._mm, slot, len(address))
+            self._mm[slot + 2:slot + 2 + len(address)] = address
+        versions[row] = (versions[row] + 1) & 0xFFFFFFFF
+
+    def _append_locked(self, key: bytes, code: int, address: bytes) -> Optional[int]:
+        """
+        Appends a new row; the caller holds the header lock. Returns None if
+        another process appended the same id in the meantime.
+        """
+        self._sync()
+        if key in self._index:
+            return None
+        row = self._known
+        if row >= self._capacity:
+            raise RuntimeError(f"SharedMemoryPackageRepository: {self._path} is full ({self._capacity} packages)")
+        id_offset = self._ids_offset + row * _KEY_SIZE
+        self._mm[id_offset:id_offset + _KEY_SIZE] = key
+        self._write_row(row, code, address)
+        # Publishing the new count makes the row visible to other processes
+        _FIELD.pack_into(self._mm, _COUNT_OFFSET, row + 1)
+        self._index[key] = row
+        self._known = row + 1
+        return row
+
+    def _preload_locked(self, packages: List[Package]) -> None:
+        for package in packages:
+            key, code, address = _encode(package)
+            if self._append_locked(key, code, address) is None:
+                self._write_row(self._index[key], code, address)
+
+    async def _acquire(self, offset: int) -> None:
+        """
+        Takes the exclusive record lock on one byte of the file. Never blocks
+        the event loop: while another process holds it, yields and retries.
+        """
+        while True:
+            try:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset)
+                return
+            except (BlockingIOError, PermissionError):
+                await asyncio.sleep(0)
+
+    def _release(self, offset: int) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, offset)
+
+
+def _file_size(capacity: int) -> int:
+    return _HEADER_SIZE + capacity * (_KEY_SIZE + 1 + 4 + _ADDRESS_SLOT)
+
+
+def _key(package_id: str) -> Optional[bytes]:
+    """
+    16-byte form of a UUID package id, or None if package_id isn't a UUID.
+    """
+    try:
+        return uuid.UUID(package_id).bytes
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def _encode(package: Package):
+    key = _key(package.id)
+    if key is None:
+        raise ValueError(f"SharedMemoryPackageRepository only stores UUID package ids, got {package.id!r}")
+    address = package.customer_address.encode("utf-8")
+    if len(address) > MAX_ADDRESS_BYTES:
+        raise ValueError(
+            f"Customer address of package {package.id} is {len(address)} bytes, the limit is {MAX_ADDRESS_BYTES}"
+        )
+    return key, STATUS_CODES[package.status], address
@@ -0,0 +1,312 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+import aiosqlite
+
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.domain.exceptions import PackageNotFoundError, StaleStatusError
+from src.ports.repository import PackageRepository
+
+logger = logging.getLogger(__name__)
+
+# SQLite's default limit on host parameters per statement is 999
+_MAX_PARAMETERS = 900
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS packages (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        id TEXT NOT NULL UNIQUE,
+        status TEXT NOT NULL,
+        customer_address TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS packages_status_seq ON packages (status, seq)",
+)
+
+# Statements are module constants so every connection's statement cache
+# (sqlite3 keeps prepared statements keyed by SQL text) reuses them.
+_SELECT_BY_ID = "SELECT id, status, customer_address FROM packages WHERE id = ?"
+_UPSERT = (
+    "INSERT INTO packages (id, status, customer_address) VALUES (?, ?, ?) "
+    "ON CONFLICT (id) DO UPDATE SET status = excluded.status, customer_address = excluded.customer_address"
+)
+_TRANSITION = (
+    "UPDATE packages SET status = ? WHERE id = ? AND status = ? "
+    "RETURNING id, status, customer_address"
+)
+_INSERT_MISSING = (
+    "INSERT INTO packages (id, status, customer_address) VALUES {rows} "
+    "ON CONFLICT (id) DO NOTHING RETURNING id"
+)
+_SELECT_STATUS = "SELECT status FROM packages WHERE id = ?"
+_ANY_PACKAGE = "SELECT 1 FROM packages LIMIT 1"
+_SELECT_ALL = "SELECT id, status, customer_address FROM packages ORDER BY seq"
+_SELECT_BY_STATUS = "SELECT id, status, customer_address FROM packages WHERE status = ? ORDER BY seq"
+_COUNT_BY_STATUS = "SELECT status, COUNT(*) FROM packages GROUP BY status"
+_SEQ_OF = "SELECT seq FROM packages WHERE id = ?"
+_PAGE = "SELECT seq, id, status, customer_address FROM packages WHERE seq > ? ORDER BY seq LIMIT ?"
+_PAGE_BY_STATUS = (
+    "SELECT seq, id, status, customer_address FROM packages "
+    "WHERE status = ? AND seq > ? ORDER BY seq LIMIT ?"
+)
+
+
+class SQLPackageRepository(PackageRepository):
+    """
+    SQL implementation of PackageRepository on SQLite (through aiosqlite).
+
+    - A fixed pool of connections is opened once and shared by all requests;
+      the database runs in WAL mode so readers don't block the writer.
+    - Transitions are a single conditional statement
+      (UPDATE ... WHERE id = ? AND status = ? RETURNING ...) instead of a
+      read-modify-write; the extra lookup needed to tell "not found" from
+      "stale" only runs when no row matched.
+    - Listing uses keyset pagination on an autoincrement column (seq), so
+      pages are stable and never use OFFSET.
+    - Preloads and batches run as one executemany / one transaction.
+    """
+
+    def __init__(self, database: str, pool_size: int = 4, busy_timeout_ms: int = 5_000):
+        self._database = database
+        self._pool_size = pool_size
+        self._busy_timeout_ms = busy_timeout_ms
+        self._pool: Optional["asyncio.Queue[aiosqlite.Connection]"] = None
+        self._connections: List[aiosqlite.Connection] = []
+
+    async def open(self) -> None:
+        """
+        Opens the connection pool and creates the schema if needed.
+        """
+        if self._pool is not None:
+            return
+        self._pool = asyncio.Queue()
+        for _ in range(self._pool_size):
+            connection = await aiosqlite.connect(self._database, cached_statements=256)
+            await connection.execute("PRAGMA journal_mode = WAL")
+            await connection.execute("PRAGMA synchronous = NORMAL")
+            await connection.execute(f"PRAGMA busy_timeout = {int(self._busy_timeout_ms)}")
+            self._connections.append(connection)
+            self._pool.put_nowait(connection)
+        async with self._connection() as connection:
+            for statement in _SCHEMA:
+                await connection.execute(statement)
+            await connection.commit()
+        logger.info("SQLPackageRepository: opened %s with %d connections", self._database, self._pool_size)
+
+    async def close(self) -> None:
+        """
+        Closes every pooled connection.
+        """
+        for connection in self._connections:
+            await connection.close()
+        self._connections = []
+        self._pool = None
+
+    async def get_by_id(self, package_id: str) -> Package:
+        async with self._connection() as connection:
+            async with connection.execute(_SELECT_BY_ID, (package_id,)) as cursor:
+                row = await cursor.fetchone()
+        if row is None:
+            logger.warning("get_by_id: Package %s not found", package_id)
+            raise PackageNotFoundError(f"Package with id {package_id} not found.")
+        return _to_package(row)
+
+    async def get_many(self, package_ids: Iterable[str]) -> Dict[str, Package]:
+        ids = list(dict.fromkeys(package_ids))
+        found: Dict[str, Package] = {}
+        async with self._connection() as connection:
+            for start in range(0, len(ids), _MAX_PARAMETERS):
+                chunk = ids[start:start + _MAX_PARAMETERS]
+                query = (
+                    "SELECT id, status, customer_address FROM packages "
+                    f"WHERE id IN ({', '.join('?' * len(chunk))})"
+                )
+                async with connection.execute(query, chunk) as cursor:
+                    for row in await cursor.fetchall():
+                        found[row[0]] = _to_package(row)
+        return found
+
+    async def save(self, package: Package) -> None:
+        async with self._connection() as connection:
+            await connection.execute(_UPSERT, (package.id, package.status.value, package.customer_address))
+            await connection.commit()
+        logger.debug("save: Package %s saved/updated (status=%s)", package.id, package.status)
+
+    async def preload_packages(self, packages: List[Package]) -> None:
+        """
+        Bulk-inserts the packages with one executemany in one transaction.
+        """
+        async with self._connection() as connection:
+            await connection.executemany(
+                _UPSERT,
+                [(p.id, p.status.value, p.customer_address) for p in packages],
+            )
+            await connection.commit()
+        logger.debug("preload_packages: Loaded %d packages", len(packages))
+
+    async def insert_missing(self, packages: List[Package]) -> List[str]:
+        """
+        Multi-row INSERT ... ON CONFLICT (id) DO NOTHING RETURNING id, in one
+        transaction: the database tells which rows it inserted, the others
+        were already there and keep their status.
+        """
+        inserted: Set[str] = set()
+        rows_per_statement = _MAX_PARAMETERS // 3
+        async with self._connection() as connection:
+            for start in range(0, len(packages), rows_per_statement):
+                chunk = packages[start:start + rows_per_statement]
+                query = _INSERT_MISSING.format(rows=", ".join(["(?, ?, ?)"] * len(chunk)))
+                parameters = [value for p in chunk for value in (p.id, p.status.value, p.customer_address)]
+                async with connection.execute(query, parameters) as cursor:
+                    inserted.update(row[0] for row in await cursor.fetchall())
+            await connection.commit()
+        logger.debug("insert_missing: Loaded %d packages", len(inserted))
+        return [package.id for package in packages if package.id not in inserted]
+
+    async def preload_if_empty(self, packages: List[Package]) -> bool:
+        """
+        Checks for packages and inserts in one write transaction: BEGIN
+        IMMEDIATE takes the database's write lock before the check, so of
+        several workers sharing the file only the first one loads.
+        """
+        async with self._connection() as connection:
+            await connection.execute("BEGIN IMMEDIATE")
+            async with connection.execute(_ANY_PACKAGE) as cursor:
+                found = await cursor.fetchone() is not None
+            if found:
+                await connection.rollback()
+                return False
+            await connection.executemany(
+                _UPSERT,
+                [(p.id, p.status.value, p.customer_address) for p in packages],
+            )
+            await connection.commit()
+        logger.info("preload_if_empty: Loaded %d packages", len(packages))
+        return True
+
+    async def transition(
+        self,
+        package_id: str,
+        expected_status: PackageStatus,
+        new_status: PackageStatus,
+    ) -> Package:
+        async with self._connection() as connection:
+            result = await self._transition(connection, package_id, expected_status, new_status)
+            await connection.commit()
+        if isinstance(result, Exception):
+            raise result
+        logger.debug("transition: Package %s %s -> %s", package_id, expected_status, new_status)
+        return result
+
+    async def transition_many(
+        self,
+        transitions: Sequence[Tuple[str, PackageStatus, PackageStatus]],
+    ) -> List[Union[Package, Exception]]:
+        """
+        Runs every conditional update in one transaction (one commit).
+        """
+        results: List[Union[Package, Exception]] = []
+        async with self._connection() as connection:
+            for package_id, expected_status, new_status in transitions:
+                results.append(await self._transition(connection, package_id, expected_status, new_status))
+            await connection.commit()
+        logger.debug(
+            "transition_many: applied %d/%d transitions",
+            sum(not isinstance(r, Exception) for r in results), len(transitions),
+        )
+        return results
+
+    async def list_all(self) -> List[Package]:
+        async with self._connection() as connection:
+            async with connection.execute(_SELECT_ALL) as cursor:
+                return [_to_package(row) for row in await cursor.fetchall()]
+
+    async def list_by_status(self, status: PackageStatus) -> List[Package]:
+        async with self._connection() as connection:
+            async with connection.execute(_SELECT_BY_STATUS, (status.value,)) as cursor:
+                return [_to_package(row) for row in await cursor.fetchall()]
+
+    async def count_by_status(self) -> Dict[PackageStatus, int]:
+        counts = {package_status: 0 for package_status in PackageStatus}
+        async with self._connection() as connection:
+            async with connection.execute(_COUNT_BY_STATUS) as cursor:
+                for status_value, count in await cursor.fetchall():
+                    counts[PackageStatus(status_value)] = count
+        return counts
+
+    async def list_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        status: Optional[PackageStatus] = None,
+    ) -> List[Package]:
+        """
+        Keyset pagination: WHERE seq > <seq of `after`> ORDER BY seq LIMIT n.
+        """
+        async with self._connection() as connection:
+            after_seq = 0
+            if after is not None:
+                async with connection.execute(_SEQ_OF, (after,)) as cursor:
+                    row = await cursor.fetchone()
+                if row is None:
+                    raise PackageNotFoundError(f"Package with id {after} not found.")
+                after_seq = row[0]
+            if status is None:
+                query, parameters = _PAGE, (after_seq, limit)
+            else:
+                query, parameters = _PAGE_BY_STATUS, (status.value, after_seq, limit)
+            async with connection.execute(query, parameters) as cursor:
+                return [_to_package(row[1:]) for row in await cursor.fetchall()]
+
+    async def clear(self) -> None:
+        """
+        Helper method that removes every stored package.
+        Useful for resetting state between tests.
+        """
+        async with self._connection() as connection:
+            await connection.execute("DELETE FROM packages")
+            await connection.commit()
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        if self._pool is None:
+            raise RuntimeError("SQLPackageRepository is not open")
+        connection = await self._pool.get()
+        try:
+            yield connection
+        except BaseException:
+            await connection.rollback()
+            raise
+        finally:
+            self._pool.put_nowait(connection)
+
+    async def _transition(
+        self,
+        connection: aiosqlite.Connection,
+        package_id: str,
+        expected_status: PackageStatus,
+        new_status: PackageStatus,
+    ) -> Union[Package, Exception]:
+        async with connection.execute(
+            _TRANSITION, (new_status.value, package_id, expected_status.value)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is not None:
+            return _to_package(row)
+
+        async with connection.execute(_SELECT_STATUS, (package_id,)) as cursor:
+            current = await cursor.fetchone()
+        if current is None:
+            return PackageNotFoundError(f"Package with id {package_id} not found.")
+        return StaleStatusError(
+            f"Package {package_id} is in status {current[0]}, expected {expected_status}."
+        )
+
+
+def _to_package(row: Tuple[str, str, str]) -> Package:
+    package_id, status_value, customer_address = row
+    return Package(customer_address=customer_address, status=PackageStatus(status_value), package_id=package_id)
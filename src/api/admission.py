@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Hashable, Tuple
+
+from src.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total",
+    "Requests shed before reaching the use case, by reason (rate_limited or overloaded).",
+    ["reason"],
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight",
+    "Status updates running under the concurrency limiter.",
+)
+ADMISSION_QUEUED = Gauge(
+    "admission_queued",
+    "Status updates waiting for a slot of the concurrency limiter.",
+)
+ADMISSION_QUEUE_SECONDS = Histogram(
+    "admission_queue_seconds",
+    "Time status updates waited for a slot of the concurrency limiter.",
+)
+_RATE_LIMITED = ADMISSION_REJECTIONS.labels("rate_limited")
+_OVERLOADED = ADMISSION_REJECTIONS.labels("overloaded")
+
+
+class AdmissionRejectedError(Exception):
+    """
+    Raised when a request is shed; retry_after is the number of seconds
+    after which a retry may be admitted.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucketLimiter:
+    """
+    One token bucket per key (e.g. a client on a route), refilled at `rate`
+    tokens per second up to `burst`. Buckets are kept for the max_keys most
+    recently seen keys: a forgotten key starts again with a full bucket.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be above 0 and burst at least 1")
+        self._rate = rate
+        self._burst = burst
+        self._max_keys = max_keys
+        self._clock = clock
+        # key -> (tokens, time of the last refill), least recently used first
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: Hashable) -> None:
+        """
+        Takes a token from the key's bucket.
+        Throws AdmissionRejectedError, with the time until the next token,
+        when the bucket is empty.
+        """
+        now = self._clock()
+        buckets = self._buckets
+        entry = buckets.get(key)
+        if entry is None:
+            tokens = self._burst
+        else:
+            tokens = min(self._burst, entry[0] + (now - entry[1]) * self._rate)
+            buckets.move_to_end(key)
+
+        if tokens < 1:
+            buckets[key] = (tokens, now)
+            _RATE_LIMITED.inc()
+            raise AdmissionRejectedError(
+                f"Rate limit of {self._rate:g} requests/s exceeded", (1 - tokens) / self._rate
+            )
+        buckets[key] = (tokens - 1, now)
+        if len(buckets) > self._max_keys:
+            buckets.popitem(last=False)
+
+
+class ConcurrencyLimiter:
+    """
+    Global bound on the status updates running at once. Past
+    max_concurrency, requests wait for a slot in FIFO order, for at most
+    max_queue_delay seconds and with at most max_queue of them waiting;
+    beyond either bound they are shed with AdmissionRejectedError, so the
+    time a request queues (and the memory of those queued) stays bounded
+    however far the load exceeds the capacity.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, max_queue_delay: float):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self._max_concurrency = max_concurrency
+        self._max_queue = max_queue
+        self._max_queue_delay = max_queue_delay
+        self._in_flight = 0
+        self._waiters: "Deque[asyncio.Future[None]]" = deque()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Holds one of the max_concurrency slots while the block runs.
+        """
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self) -> None:
+        if self._in_flight < self._max_concurrency and not self._waiters:
+            self._in_flight += 1
+            ADMISSION_IN_FLIGHT.set(self._in_flight)
+            return
+        if len(self._waiters) >= self._max_queue:
+            self._reject("queue full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUED.set(len(self._waiters))
+        started = time.perf_counter()
+        try:
+            # The slot is handed over by _release(), in_flight unchanged
+            await asyncio.wait_for(waiter, self._max_queue_delay)
+        except asyncio.TimeoutError:
+            self._reject(f"waited {self._max_queue_delay:g}s for a slot")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as the request went away: pass it on
+                self._release()
+            raise
+        finally:
+            if waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    # Already skipped by _release()
+                    pass
+            ADMISSION_QUEUED.set(len(self._waiters))
+            ADMISSION_QUEUE_SECONDS.observe(time.perf_counter() - started)
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+        ADMISSION_IN_FLIGHT.set(self._in_flight)
+
+    def _reject(self, reason: str) -> None:
+        _OVERLOADED.inc()
+        logger.warning(
+            "Admission: Shedding a status update (%s; %d in flight, %d queued)",
+            reason,
+            self._in_flight,
+            len(self._waiters),
+        )
+        raise AdmissionRejectedError(f"Server overloaded: {reason}", self._max_queue_delay)
@@ -0,0 +1,104 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from starlette.requests import HTTPConnection
+
+from src.adapters.events.broadcaster import StatusBroadcaster
+from src.adapters.history.in_memory_history import HOUR, InMemoryTransitionHistory
+from src.adapters.notification.notification_stub import NotificationStub
+from src.adapters.outbox.dispatcher import OutboxDispatcher
+from src.adapters.outbox.file_outbox import FileOutbox
+from src.adapters.repository.factory import build_repository
+from src.api.admission import ConcurrencyLimiter, TokenBucketLimiter
+from src.api.idempotency import IdempotencyCache
+from src.api.serialization import PackageEncoder
+from src.config import settings
+from src.ports.history import TransitionHistory
+from src.ports.notification import NotificationPort
+from src.ports.outbox import Outbox
+from src.ports.repository import PackageRepository
+from src.use_cases.ingest_packages import IngestPackagesUseCase
+from src.use_cases.update_package_status import UpdatePackageStatusUseCase
+
+
+@dataclass
+class AppContainer:
+    """
+    The adapters one application instance works with, and the use cases
+    wired to them. Built once per app by create_app() (or handed to it,
+    e.g. by tests and benchmarks injecting their own adapters) and reached
+    by the routes through get_container().
+    """
+    repository: PackageRepository
+    notification_adapter: NotificationPort
+    outbox: Outbox
+    broadcaster: StatusBroadcaster
+    history: TransitionHistory
+    package_encoder: PackageEncoder
+    idempotency_cache: IdempotencyCache
+    # None when rate limiting is disabled
+    rate_limiter: Optional[TokenBucketLimiter]
+    concurrency_limiter: ConcurrencyLimiter
+    use_case: UpdatePackageStatusUseCase = field(init=False)
+    ingest_use_case: IngestPackagesUseCase = field(init=False)
+    outbox_dispatcher: OutboxDispatcher = field(init=False)
+
+    def __post_init__(self):
+        self.use_case = UpdatePackageStatusUseCase(
+            self.repository, listeners=[self.broadcaster, self.history, self.outbox]
+        )
+        self.ingest_use_case = IngestPackagesUseCase(self.repository, chunk_size=settings.ingest_chunk_size)
+        self.outbox_dispatcher = OutboxDispatcher(
+            self.outbox, self.notification_adapter, batch_size=settings.notification_batch_size
+        )
+
+
+def build_container(
+    repository: Optional[PackageRepository] = None,
+    notification_adapter: Optional[NotificationPort] = None,
+    history: Optional[TransitionHistory] = None,
+    outbox: Optional[Outbox] = None,
+) -> AppContainer:
+    """
+    AppContainer with the given adapters, and the ones selected by settings
+    for the rest. Only builds objects: connecting, recovering state and
+    loading data happen in the app's lifespan.
+    """
+    if notification_adapter is None:
+        if settings.notification_webhook_url:
+            # Imported here so that httpx is only loaded when it is used
+            from src.adapters.notification.webhook_notifier import WebhookNotifier
+            notification_adapter = WebhookNotifier(settings.notification_webhook_url)
+        else:
+            notification_adapter = NotificationStub()
+    return AppContainer(
+        repository=repository if repository is not None else build_repository(),
+        notification_adapter=notification_adapter,
+        outbox=(
+            outbox
+            if outbox is not None
+            else FileOutbox(settings.outbox_path, max_in_memory=settings.outbox_max_in_memory)
+        ),
+        broadcaster=StatusBroadcaster(queue_size=settings.event_queue_size),
+        history=history if history is not None else InMemoryTransitionHistory(retention=settings.history_retention_hours * HOUR),
+        package_encoder=PackageEncoder(settings.package_json_cache_size),
+        idempotency_cache=IdempotencyCache(settings.idempotency_cache_size, settings.idempotency_ttl),
+        rate_limiter=(
+            TokenBucketLimiter(settings.rate_limit_per_second, settings.rate_limit_burst)
+            if settings.rate_limit_per_second > 0
+            else None
+        ),
+        concurrency_limiter=ConcurrencyLimiter(
+            settings.admission_max_concurrency,
+            settings.admission_max_queue,
+            settings.admission_max_queue_delay,
+        ),
+    )
+
+
+def get_container(connection: HTTPConnection) -> AppContainer:
+    """
+    FastAPI dependency: the AppContainer of the app serving the request
+    (HTTP or WebSocket).
+    """
+    return connection.app.state.container
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Generic, Hashable, Tuple, TypeVar
+
+from src.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total",
+    "Requests carrying an Idempotency-Key, by result (executed or replayed).",
+    ["result"],
+)
+_EXECUTED = IDEMPOTENCY_REQUESTS.labels("executed")
+_REPLAYED = IDEMPOTENCY_REQUESTS.labels("replayed")
+
+
+class IdempotencyKeyReusedError(Exception):
+    """
+    Raised when an Idempotency-Key is sent again with a different request.
+    """
+    pass
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "expires_at", "outcome")
+
+    def __init__(self, fingerprint: Hashable, expires_at: float, outcome: "asyncio.Future[Any]"):
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        self.outcome = outcome
+
+
+class IdempotencyCache(Generic[T]):
+    """
+    Bounded LRU/TTL cache of request outcomes keyed by Idempotency-Key.
+
+    Each entry keeps a fingerprint of the request that first used the key and
+    a future with its outcome, so a duplicate that arrives while the first
+    request is still running awaits the same outcome instead of executing
+    the operation again. Entries live `ttl` seconds; past `max_entries` the
+    least recently used one is evicted.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: Hashable,
+        operation: Callable[[], Awaitable[T]],
+        cacheable: Callable[[T], bool] = lambda outcome: True,
+    ) -> Tuple[T, bool]:
+        """
+        Returns (outcome, replayed). The first request with `key` runs
+        `operation`; later ones with the same fingerprint get its outcome
+        back with replayed=True, without running it.
+
+        Outcomes rejected by `cacheable`, and exceptions, are handed to the
+        duplicates already waiting but are not kept: the next retry runs the
+        operation again.
+
+        Throws:
+        - IdempotencyKeyReusedError if `key` was used with another fingerprint.
+        """
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            del self._entries[key]
+            entry = None
+
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                raise IdempotencyKeyReusedError(
+                    f"Idempotency-Key {key} was already used with a different request."
+                )
+            self._entries.move_to_end(key)
+            logger.debug("Idempotency: Replaying the outcome of key %s", key)
+            _REPLAYED.inc()
+            # shield(): a cancelled duplicate must not cancel the first request
+            return await asyncio.shield(entry.outcome), True
+
+        entry = _Entry(fingerprint, now + self._ttl, asyncio.get_running_loop().create_future())
+        self._entries[key] = entry
+        self._evict(now)
+        _EXECUTED.inc()
+
+        try:
+            outcome = await operation()
+        except asyncio.CancelledError:
+            self._discard(key, entry)
+            entry.outcome.cancel()
+            raise
+        except Exception as e:
+            self._discard(key, entry)
+            entry.outcome.set_exception(e)
+            # Mark it retrieved: there may be no duplicate waiting for it
+            entry.outcome.exception()
+            raise
+
+        entry.outcome.set_result(outcome)
+        if not cacheable(outcome):
+            self._discard(key, entry)
+        return outcome, False
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _discard(self, key: str, entry: _Entry) -> None:
+        # The entry may already be evicted or replaced by a newer request
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+
+    def _evict(self, now: float) -> None:
+        entries = self._entries
+        while len(entries) > self._max_entries:
+            entries.popitem(last=False)
+        # Opportunistic TTL cleanup from the least recently used end
+        while entries:
+            if next(iter(entries.values())).expires_at > now:
+                break
+            entries.popitem(last=False)
@@ -0,0 +1,63 @@
+import time
+from typing import Callable, Coroutine
+
+from fastapi import HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+
+from src.metrics import Counter, Gauge, Histogram
+
+REQUEST_LATENCY_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling a request, by method and route.",
+    ["method", "route"],
+)
+REQUESTS = Counter(
+    "http_requests_total",
+    "Requests handled, by method, route and status code.",
+    ["method", "route", "status"],
+)
+REPOSITORY_PACKAGES = Gauge(
+    "repository_packages",
+    "Packages stored in the repository, by status (refreshed on each scrape).",
+    ["status"],
+)
+
+
+class InstrumentedRoute(APIRoute):
+    """
+    APIRoute that records the latency and status code of every request.
+
+    Routes are labelled with their path template (/packages/{package_id}/status),
+    not the concrete path, so the number of series stays bounded. The latency
+    histogram child is resolved once per route, when the handler is built.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[None, None, Response]]:
+        handler = super().get_route_handler()
+        method = ",".join(sorted(self.methods))
+        route = self.path
+        latency = REQUEST_LATENCY_SECONDS.labels(method, route)
+        counters = {}
+
+        async def instrumented_handler(request: Request) -> Response:
+            started = time.perf_counter()
+            status_code = 500
+            try:
+                response = await handler(request)
+                status_code = response.status_code
+                return response
+            except HTTPException as e:
+                status_code = e.status_code
+                raise
+            except RequestValidationError:
+                status_code = 422
+                raise
+            finally:
+                latency.observe(time.perf_counter() - started)
+                counter = counters.get(status_code)
+                if counter is None:
+                    counter = counters[status_code] = REQUESTS.labels(method, route, status_code)
+                counter.inc()
+
+        return instrumented_handler
@@ -1,51 +1,104 @@
 import os
 import logging
-from fastapi import FastAPI, Request
+from typing import Optional
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 from src.logger import setup_logging
-from src.api.routers import router, repository
+from src.metrics import CONTENT_TYPE, REGISTRY
+from src.api.dependencies import AppContainer, build_container, get_container
+from src.api.instrumentation import REPOSITORY_PACKAGES
+from src.api.routers import router
+from src.api.warmup import Warmup
 from src.config import settings
-from src.domain.entities import Package
-
-log_path = os.getenv("LOG_FILE", "logs/app.log")
-
-# Make sure the folder exists
-os.makedirs(os.path.dirname(log_path), exist_ok=True)
-
-#We configure logging: console + file
-setup_logging(log_file=log_path)
 
 logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
-    Lifespan manager. Runs before the server boots and allows for initialization tasks (preload).
+    Lifespan manager. Opens the adapters, then starts the warm-up (recovery
+    of the repository, preload and seed manifest) in the background: the
+    server accepts connections right away and /health reports when it is
+    ready.
     """
-    # Startup: precharge memory packages
-    logger.info("Starting up: preloading packages into memory")
-    packages_to_preload = [
-        Package(customer_address=addr)
-        for addr in settings.preload_addresses
-    ]
-
-    await repository.preload_packages(packages_to_preload)
-    logger.info(
-        "Finished preloading %d packages", len(settings.preload_addresses)
-    )
+    container: AppContainer = app.state.container
+    warmup: Warmup = app.state.warmup
+
+    # Startup: recover undelivered notifications and start delivering them;
+    # the packages are recovered and loaded while the app already serves
+    await container.outbox.open()
+    await container.notification_adapter.start()
+    container.outbox_dispatcher.start()
+    warmup.start()
 
     yield
 
-app = FastAPI(
-    title=settings.app_name,
-    version="1.0.0",
-    lifespan=lifespan
-)
+    # Shutdown: stop loading, end the live streams, deliver the pending
+    # notifications (what is left stays in the outbox) and persist the
+    # final state
+    await warmup.stop()
+    container.broadcaster.close()
+    await container.outbox_dispatcher.stop()
+    await container.notification_adapter.stop()
+    await container.outbox.close()
+    # A repository left half recovered must not be persisted
+    if warmup.recovered:
+        await container.repository.close()
+
+
+def create_app(container: Optional[AppContainer] = None, configure_logging: bool = True) -> FastAPI:
+    """
+    Application factory. Builds the adapters selected by settings unless a
+    container is given (tests and benchmarks inject their own), and sets up
+    logging (console + LOG_FILE) unless configure_logging is False.
+    Nothing is opened or loaded until the app's lifespan starts.
+    """
+    if configure_logging:
+        log_path = os.getenv("LOG_FILE", "logs/app.log")
+        # Make sure the folder exists
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        setup_logging(log_file=log_path)
+
+    if container is None:
+        container = build_container()
+
+    app = FastAPI(
+        title=settings.app_name,
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    app.state.container = container
+    app.state.warmup = Warmup(
+        container.repository,
+        settings.preload_addresses,
+        seed_manifest=settings.seed_manifest,
+        chunk_size=settings.warmup_chunk_size,
+    )
+    app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.include_router(router)
+    app.add_api_route(
+        "/health",
+        healthcheck,
+        methods=["GET"],
+        status_code=200,
+        responses={503: {"description": "Still loading the initial packages, or loading them failed"}},
+    )
+    app.add_api_route("/metrics", metrics, methods=["GET"], status_code=200)
+    return app
+
+
+def __getattr__(name: str):
+    # `app` (uvicorn src.api.main:app) is built on first access, so that
+    # importing this module has no side effects
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-@app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """
     Captures validation errors (HTTP 422) produced by Pydantic,
@@ -65,13 +118,28 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={"detail": exc.errors()},
     )
 
-app.include_router(router)
 
-@app.get("/health", status_code=200)
-async def healthcheck():
+async def healthcheck(request: Request):
     """
     Healthcheck endpoint. Used to quickly verify
-    that the server is up and running.
+    that the server is up and running: 200 once the warm-up recovered and
+    loaded the initial packages, 503 until then with status "recovering"
+    (replaying persisted state) then "starting" (or "failed").
+    """
+    logger.debug("Healthcheck requested")
+    warmup: Warmup = request.app.state.warmup
+    if not warmup.ready:
+        return JSONResponse(status_code=503, content={"status": warmup.state})
+    return {"status": "ok"}
+
+
+async def metrics(request: Request, container: AppContainer = Depends(get_container)):
+    """
+    Metrics endpoint in the Prometheus text format: request latencies,
+    repository lock times, use-case outcomes, notification outbox
+    backlog, and repository size by status (once the repository is recovered).
     """
-    logger.info("Healthcheck requested")
-    return {"status": "ok"}
\ No newline at end of file
+    if not request.app.state.warmup.recovering:
+        for package_status, count in (await container.repository.count_by_status()).items():
+            REPOSITORY_PACKAGES.labels(package_status.value).set(count)
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
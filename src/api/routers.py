@@ -1,19 +1,79 @@
-from fastapi import APIRouter, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query, Request, Response, WebSocket
+from fastapi.requests import HTTPConnection
+from fastapi.responses import StreamingResponse
+from starlette.websockets import WebSocketDisconnect
+import asyncio
 import logging
-from typing import List
+import math
+import orjson
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional
+
+from src.use_cases.update_package_status import StatusUpdateOutcome
+from src.adapters.manifest import PARSERS_BY_MEDIA_TYPE
+from src.adapters.events.broadcaster import (
+    SHUTTING_DOWN,
+    SLOW_SUBSCRIBER,
+    StatusBroadcaster,
+    Subscription,
+    SubscriptionClosedError,
+)
+from src.api.admission import AdmissionRejectedError
+from src.api.dependencies import AppContainer, get_container
+from src.api.idempotency import IdempotencyKeyReusedError
+from src.api.instrumentation import InstrumentedRoute
+from src.api.serialization import ORJSONResponse
+from src.api.schemas import (
+    PackageStatusUpdateRequest,
+    PackageResponse,
+    BatchStatusUpdateRequest,
+    BatchStatusUpdateResponse,
+    BatchStatusUpdateItemResult,
+    PackageStatsResponse,
+    PackageChangesResponse,
+    PackageHistoryResponse,
+    PackageLookupRequest,
+    PackageLookupResponse,
+    StatusTransitionResponse,
+    HourlyTransitionCounts,
+    TransitionCountsResponse,
+    BulkIngestionError,
+    BulkIngestionResponse,
+)
+from src.config import settings
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.domain.exceptions import PackageNotFoundError
+from src.metrics import Counter
+
+def _require_recovered(connection: HTTPConnection) -> None:
+    """
+    Dependency of every route here: answers 503 with Retry-After until the
+    warm-up has recovered the repository's persisted state, so that nothing
+    reads a half-replayed state or writes ahead of the replay.
+    """
+    if connection.app.state.warmup.recovering:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Recovering the persisted packages, try again shortly",
+            headers={RETRY_AFTER_HEADER: "1"},
+        )
 
-from src.use_cases.update_package_status import UpdatePackageStatusUseCase
-from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
-from src.adapters.notification.notification_stub import NotificationStub
-from src.api.schemas import PackageStatusUpdateRequest, PackageResponse
-from src.domain.exceptions import PackageNotFoundError, InvalidStateTransitionError
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute, dependencies=[Depends(_require_recovered)])
 logger = logging.getLogger(__name__)  
 
-repository = InMemoryPackageRepository()
-notification_adapter = NotificationStub()
-use_case = UpdatePackageStatusUseCase(repository)
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+RETRY_AFTER_HEADER = "Retry-After"
+ETAG_HEADER = "ETag"
+
+OUTBOX_COMMIT_FAILURES = Counter(
+    "outbox_commit_failures_total",
+    "Status updates applied and answered although their notification could not be written to the outbox file.",
+)
 
 
 @router.get(
@@ -21,54 +81,611 @@ use_case = UpdatePackageStatusUseCase(repository)
     response_model=List[PackageResponse],
     status_code=status.HTTP_200_OK
 )
-async def list_packages():
-    logger.info("Router: GET /packages called")
-    all_packages = await repository.list_all()
-    return all_packages
+async def list_packages(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.page_max_limit),
+    after: Optional[str] = None,
+    status_filter: Optional[PackageStatus] = Query(None, alias="status"),
+    container: AppContainer = Depends(get_container),
+):
+    """
+    Lists packages.
+    - Without `limit`, returns every package (optionally filtered by `status`).
+    - With `limit`, returns one page; when more packages follow, the cursor to
+      pass as `after` for the next page is sent in the X-Next-Cursor header.
+    - With `Accept: application/x-ndjson`, streams every matching package as one
+      JSON document per line, reading the storage chunk by chunk.
+    Packages are encoded by the container's package_encoder, which reuses the bytes of
+    packages that did not change since the previous listing.
+    When the repository tracks changes, the response carries an ETag made of
+    the repository version, and a request whose If-None-Match still matches
+    it gets an empty 304: nothing changed since the client's copy.
+    """
+    logger.debug("Router: GET /packages called (limit=%s, after=%s, status=%s)", limit, after, status_filter)
+
+    streaming = NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+    repository, package_encoder = container.repository, container.package_encoder
+
+    # Read before listing: a change made meanwhile leaves the ETag older than
+    # the content, which only costs the client one more full response
+    headers: Dict[str, str] = {}
+    version = await repository.current_version()
+    if version is not None:
+        etag = f'"{version}-ndjson"' if streaming else f'"{version}"'
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            logger.debug("Router: GET /packages not modified since version %d", version)
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={ETAG_HEADER: etag})
+        headers[ETAG_HEADER] = etag
+
+    if not streaming and limit is None and after is None:
+        if status_filter is None:
+            packages = await repository.list_all()
+        else:
+            packages = await repository.list_by_status(status_filter)
+        return ORJSONResponse(package_encoder.encode_array(packages), headers=headers)
+
+    # One extra package tells whether there is a next page
+    page_size = settings.stream_chunk_size if streaming else (limit or settings.page_max_limit)
+    try:
+        page = await repository.list_page(page_size + 1, after=after, status=status_filter)
+    except PackageNotFoundError:
+        logger.warning("Router: Unknown pagination cursor %s, returning 400", after)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown cursor: {after}"
+        )
+
+    if streaming:
+        return StreamingResponse(
+            _stream_packages_ndjson(container, page, status_filter),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=headers
+        )
+
+    if len(page) > page_size:
+        page = page[:page_size]
+        headers[NEXT_CURSOR_HEADER] = page[-1].id
+    return ORJSONResponse(package_encoder.encode_array(page), headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against our ETag.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+@router.get(
+    "/packages/changes",
+    response_model=PackageChangesResponse,
+    status_code=status.HTTP_200_OK
+)
+async def package_changes(
+    since: int,
+    limit: int = Query(settings.changes_max_limit, ge=1, le=settings.changes_max_limit),
+    container: AppContainer = Depends(get_container),
+):
+    """
+    Packages changed after version `since` (the version in a listing's ETag,
+    or returned by the previous call), in their current state.
+    - 410 when `since` is older than the change log: re-read GET /packages.
+    - 501 when the storage backend does not track changes.
+    """
+    logger.debug("Router: GET /packages/changes called (since=%d, limit=%d)", since, limit)
+    repository = container.repository
+
+    try:
+        changes = await repository.changes_since(since, limit)
+    except NotImplementedError as e:
+        logger.warning("Router: %s, returning 501", e)
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"The {settings.repository_backend} backend does not track changes"
+        )
+    if changes is None:
+        logger.info("Router: Changes since version %d are no longer known, returning 410", since)
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Changes since version {since} are not available; re-read GET /packages"
+        )
+
+    version, packages = changes
+    more = version < await repository.current_version()
+    return ORJSONResponse(
+        b'{"version":%d,"more":%s,"packages":%s}'
+        % (version, b"true" if more else b"false", container.package_encoder.encode_array(packages))
+    )
+
+
+@router.get(
+    "/packages/events",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK
+)
+async def package_events(
+    package_ids: List[str] = Query([], alias="package_id", max_length=settings.events_max_package_ids),
+    statuses: List[PackageStatus] = Query([], alias="status"),
+    container: AppContainer = Depends(get_container),
+):
+    """
+    Live status changes as Server-Sent Events: one `status` event per
+    transition, its data the package in its new state plus previous_status.
+    Repeat `package_id` and/or `status` to receive only the transitions of
+    those packages and/or into those statuses.
+    The stream starts with a `: subscribed` comment, sends `: keep-alive`
+    comments while idle, and ends with a `close` event when the client
+    falls too far behind or the server shuts down: reconnect and catch up
+    with GET /packages/changes.
+    """
+    logger.debug("Router: GET /packages/events called (package_ids=%d, statuses=%s)", len(package_ids), statuses)
+    return StreamingResponse(
+        _stream_events_sse(container.broadcaster, package_ids, statuses),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream_events_sse(
+    broadcaster: StatusBroadcaster,
+    package_ids: List[str],
+    statuses: List[PackageStatus],
+) -> AsyncIterator[bytes]:
+    # Subscribing here rather than in the endpoint ties the subscription to
+    # the generator, whose finally always runs once it has started
+    subscription = broadcaster.subscribe(package_ids, statuses)
+    try:
+        yield b": subscribed\n\n"
+        while True:
+            try:
+                event = await subscription.get(timeout=settings.event_keepalive_interval)
+            except SubscriptionClosedError as e:
+                yield b"event: close\ndata: %s\n\n" % e.reason.encode()
+                return
+            if event is None:
+                yield b": keep-alive\n\n"
+            else:
+                yield b"event: status\ndata: %s\n\n" % event
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+# WebSocket close codes for the reasons the broadcaster ends a subscription
+_WEBSOCKET_CLOSE_CODES = {
+    SLOW_SUBSCRIBER: 1013,  # Try again later
+    SHUTTING_DOWN: 1001,  # Going away
+}
+
+
+@router.websocket("/packages/events/ws")
+async def package_events_websocket(
+    websocket: WebSocket,
+    package_ids: List[str] = Query([], alias="package_id", max_length=settings.events_max_package_ids),
+    statuses: List[PackageStatus] = Query([], alias="status"),
+    container: AppContainer = Depends(get_container),
+):
+    """
+    The stream of GET /packages/events over a WebSocket: one text message
+    (a JSON object) per transition, with the same filters. The connection
+    is closed with 1013 when the client falls too far behind and 1001 when
+    the server shuts down.
+    """
+    await websocket.accept()
+    broadcaster = container.broadcaster
+    subscription = broadcaster.subscribe(package_ids, statuses)
+    # Clients send nothing: reading only tells when they go away
+    watcher = asyncio.create_task(_unsubscribe_on_disconnect(websocket, broadcaster, subscription))
+    try:
+        while True:
+            try:
+                event = await subscription.get()
+            except SubscriptionClosedError as e:
+                if not watcher.done():
+                    await websocket.close(code=_WEBSOCKET_CLOSE_CODES.get(e.reason, 1000), reason=e.reason)
+                return
+            await websocket.send_text(event.decode())
+    except WebSocketDisconnect:
+        logger.debug("Router: Live stream WebSocket client went away")
+    finally:
+        watcher.cancel()
+        broadcaster.unsubscribe(subscription)
+
+
+async def _unsubscribe_on_disconnect(
+    websocket: WebSocket,
+    broadcaster: StatusBroadcaster,
+    subscription: Subscription,
+) -> None:
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+    broadcaster.unsubscribe(subscription)
+
+
+@router.get(
+    "/packages/stats",
+    response_model=PackageStatsResponse,
+    status_code=status.HTTP_200_OK
+)
+async def package_stats(container: AppContainer = Depends(get_container)):
+    """
+    Number of packages per status, answered from the repository's status index.
+    """
+    logger.debug("Router: GET /packages/stats called")
+    counts = await container.repository.count_by_status()
+    return PackageStatsResponse(total=sum(counts.values()), by_status=counts)
+
+
+def _utc(moment: datetime) -> datetime:
+    """
+    Naive datetimes in query parameters are taken as UTC.
+    """
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment
+
+
+def _from_timestamp(seconds: float) -> datetime:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+@router.get(
+    "/packages/history/hourly",
+    response_model=TransitionCountsResponse,
+    status_code=status.HTTP_200_OK
+)
+async def transition_counts_by_hour(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    container: AppContainer = Depends(get_container),
+):
+    """
+    Number of transitions into each status per hour, for the hours
+    overlapping [start, end) (ISO 8601, UTC when no offset is given; by
+    default the last 24 hours), read from per-hour counters rather than
+    from the history itself. The window spans at most
+    settings.history_max_window_hours (31 days).
+    Only the transitions applied by the API process answering are counted,
+    since it started and within settings.history_retention_hours: with
+    several workers, each one answers for its own, and the history is not
+    rebuilt after a restart. recorded_since tells from when the counts are
+    complete.
+    """
+    end = _utc(end) if end is not None else datetime.now(timezone.utc)
+    start = _utc(start) if start is not None else end - timedelta(hours=24)
+    logger.debug("Router: GET /packages/history/hourly called (start=%s, end=%s)", start, end)
+
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    if end - start > timedelta(hours=settings.history_max_window_hours):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The window cannot be wider than {settings.history_max_window_hours} hours"
+        )
+
+    counts_by_hour = await container.history.count_by_hour(start.timestamp(), end.timestamp())
+    totals: Dict[PackageStatus, int] = {}
+    hours: List[HourlyTransitionCounts] = []
+    for hour, counts in sorted(counts_by_hour.items()):
+        for package_status, count in counts.items():
+            totals[package_status] = totals.get(package_status, 0) + count
+        hours.append(HourlyTransitionCounts(hour=_from_timestamp(hour), total=sum(counts.values()), by_status=counts))
+    return TransitionCountsResponse(
+        start=start, end=end, total=sum(totals.values()), by_status=totals, hours=hours,
+        recorded_since=_from_timestamp(container.history.recorded_since()),
+    )
+
+
+@router.get(
+    "/packages/{package_id}/history",
+    response_model=PackageHistoryResponse,
+    status_code=status.HTTP_200_OK
+)
+async def package_history(
+    package_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    container: AppContainer = Depends(get_container),
+):
+    """
+    Status transitions of a package, oldest first, optionally only those
+    in [start, end) (ISO 8601, UTC when no offset is given). They are
+    recorded by this process, in memory, since it started, and kept for
+    settings.history_retention_hours: with several workers, each one only
+    knows the transitions it applied, and a restart forgets them. This is
+    not an audit trail: recorded_since tells from when the list is complete.
+    """
+    logger.debug("Router: GET /packages/%s/history called (start=%s, end=%s)", package_id, start, end)
+    try:
+        package = await container.repository.get_by_id(package_id)
+    except PackageNotFoundError as e:
+        logger.error("Router: Package %s not found, returning 404", package_id)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    transitions = await container.history.get_package_history(
+        package_id,
+        start=_utc(start).timestamp() if start is not None else None,
+        end=_utc(end).timestamp() if end is not None else None,
+    )
+    return PackageHistoryResponse(
+        package_id=package_id,
+        status=package.status,
+        transitions=[
+            StatusTransitionResponse(
+                from_status=t.from_status, to_status=t.to_status, at=_from_timestamp(t.at)
+            )
+            for t in transitions
+        ],
+        recorded_since=_from_timestamp(container.history.recorded_since()),
+    )
+
+
+@router.post(
+    "/packages:bulk",
+    response_model=BulkIngestionResponse,
+    status_code=status.HTTP_200_OK
+)
+async def ingest_packages(request: Request, container: AppContainer = Depends(get_container)):
+    """
+    Creates the packages of a manifest sent as the request body, either NDJSON
+    (Content-Type: application/x-ndjson, one object per line) or CSV
+    (Content-Type: text/csv, with a header row). The body is parsed while it
+    streams in and stored in chunks; invalid records and ids that already
+    exist are rejected and reported without aborting the load.
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    parser = PARSERS_BY_MEDIA_TYPE.get(media_type)
+    if parser is None:
+        logger.warning("Router: Unsupported manifest media type %r, returning 415", media_type)
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Type must be one of: {', '.join(PARSERS_BY_MEDIA_TYPE)}"
+        )
+
+    logger.debug("Router: POST /packages:bulk called with a %s manifest", media_type)
+    report = await container.ingest_use_case.execute(parser(request.stream()))
+    return BulkIngestionResponse(
+        received=report.received,
+        inserted=report.inserted,
+        rejected=report.rejected,
+        elapsed_seconds=report.elapsed_seconds,
+        packages_per_second=report.packages_per_second,
+        errors=[BulkIngestionError(line=e.line, detail=str(e)) for e in report.errors],
+    )
+
+
+@router.post(
+    "/packages:lookup",
+    response_model=PackageLookupResponse,
+    status_code=status.HTTP_200_OK
+)
+async def lookup_packages(body: PackageLookupRequest, container: AppContainer = Depends(get_container)):
+    """
+    Current state of the given packages, read with a single get_many()
+    (one dictionary lookup per id in the in-memory adapters) instead of
+    listing the fleet.
+    """
+    logger.debug("Router: POST /packages:lookup called with %d ids", len(body.ids))
+    package_ids = list(dict.fromkeys(body.ids))
+    found = await container.repository.get_many(package_ids)
+    return ORJSONResponse(
+        b'{"packages":%s,"missing":%s}' % (
+            container.package_encoder.encode_array([found[package_id] for package_id in package_ids if package_id in found]),
+            orjson.dumps([package_id for package_id in package_ids if package_id not in found]),
+        )
+    )
+
+
+@router.get(
+    "/packages/{package_id}",
+    response_model=PackageResponse,
+    status_code=status.HTTP_200_OK
+)
+async def get_package(package_id: str, container: AppContainer = Depends(get_container)):
+    """
+    Current state of one package, read with get_by_id() (lock-free in the
+    in-memory adapters). Registered after the fixed /packages/... paths.
+    """
+    logger.debug("Router: GET /packages/%s called", package_id)
+    try:
+        package = await container.repository.get_by_id(package_id)
+    except PackageNotFoundError as e:
+        logger.warning("Router: Package %s not found, returning 404", package_id)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return ORJSONResponse(container.package_encoder.encode(package))
+
+
+async def _stream_packages_ndjson(
+    container: AppContainer,
+    chunk: List[Package],
+    status_filter: Optional[PackageStatus],
+) -> AsyncIterator[bytes]:
+    """
+    Encodes packages chunk by chunk, starting from an already fetched chunk,
+    so memory stays flat regardless of fleet size.
+    """
+    while chunk:
+        yield container.package_encoder.encode_lines(chunk)
+        if len(chunk) < settings.stream_chunk_size:
+            return
+        chunk = await container.repository.list_page(
+            settings.stream_chunk_size, after=chunk[-1].id, status=status_filter
+        )
+
+
+def _enforce_rate_limit(request: Request, container: AppContainer = Depends(get_container)) -> None:
+    """
+    Dependency of the PATCH routes: takes a token from the bucket of the
+    client on this route, or answers 429 with Retry-After.
+    """
+    if container.rate_limiter is None:
+        return
+    client = None
+    if settings.rate_limit_client_header:
+        client = request.headers.get(settings.rate_limit_client_header)
+    if client is None:
+        client = request.client.host if request.client else ""
+    try:
+        container.rate_limiter.acquire((request.scope["route"].path, client))
+    except AdmissionRejectedError as e:
+        logger.info("Router: Rate limit exceeded by %s on %s, returning 429", client, request.url.path)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={RETRY_AFTER_HEADER: _retry_after(e)},
+        )
+
+
+def _overloaded(e: AdmissionRejectedError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={RETRY_AFTER_HEADER: _retry_after(e)},
+    )
+
+
+def _retry_after(e: AdmissionRejectedError) -> str:
+    # Retry-After takes whole seconds
+    return str(max(1, math.ceil(e.retry_after)))
+
+
+# HTTP status of each use-case outcome, for the single-item PATCH and for
+# each item of a batch
+_OUTCOME_STATUS_CODES = {
+    StatusUpdateOutcome.UPDATED: status.HTTP_200_OK,
+    StatusUpdateOutcome.UNCHANGED: status.HTTP_200_OK,
+    StatusUpdateOutcome.NOT_FOUND: status.HTTP_404_NOT_FOUND,
+    StatusUpdateOutcome.INVALID_TRANSITION: status.HTTP_400_BAD_REQUEST,
+    StatusUpdateOutcome.CONFLICT: status.HTTP_409_CONFLICT,
+}
+
+async def _committed(container: AppContainer) -> None:
+    """
+    Waits until the notifications recorded so far are persisted by the
+    outbox. When writing them fails the transitions are applied all the
+    same, and their notifications still pending in memory: the failure is
+    logged and counted, and the request is answered as usual.
+    """
+    try:
+        await container.outbox.committed()
+    except Exception:
+        OUTBOX_COMMIT_FAILURES.inc()
+        logger.exception("Router: status change applied, but its notification could not be persisted")
+
+
+@router.patch(
+    "/packages/status:batch",
+    response_model=BatchStatusUpdateResponse,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(_enforce_rate_limit)],
+)
+async def update_package_status_batch(
+    body: BatchStatusUpdateRequest,
+    container: AppContainer = Depends(get_container),
+):
+    """
+    Applies many status transitions in one request. Each item is reported
+    with the HTTP status it would have got as a single PATCH. Shed with 429
+    or 503 like the single-item PATCH, and answered, like it, once the
+    notifications of the transitions are recorded in the outbox.
+    """
+    logger.debug("Router: PATCH /packages/status:batch called with %d items", len(body.items))
+
+    try:
+        async with container.concurrency_limiter.slot():
+            results = await container.use_case.execute_many([(item.package_id, item.status) for item in body.items])
+            if any(r.outcome == StatusUpdateOutcome.UPDATED for r in results):
+                await _committed(container)
+    except AdmissionRejectedError as e:
+        raise _overloaded(e)
+
+    updated_pkgs = [r.package for r in results if r.outcome == StatusUpdateOutcome.UPDATED]
+    unchanged = sum(r.outcome == StatusUpdateOutcome.UNCHANGED for r in results)
+
+    return BatchStatusUpdateResponse(
+        updated=len(updated_pkgs),
+        unchanged=unchanged,
+        failed=len(results) - len(updated_pkgs) - unchanged,
+        results=[
+            BatchStatusUpdateItemResult(
+                package_id=r.package_id,
+                status_code=_OUTCOME_STATUS_CODES[r.outcome],
+                package=PackageResponse.model_validate(r.package) if r.package else None,
+                detail=r.error,
+            )
+            for r in results
+        ],
+    )
 
 
 @router.patch(
     "/packages/{package_id}/status",
     response_model=PackageResponse,
-    status_code=status.HTTP_200_OK
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(_enforce_rate_limit)],
 )
 async def update_package_status(
     package_id: str,
     body: PackageStatusUpdateRequest,
-    background_tasks: BackgroundTasks
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255),
+    container: AppContainer = Depends(get_container),
 ):
-    logger.info(
+    """
+    Changes the status of a package. Asking for the status the package
+    already has is a no-op answered with 200. A change is answered once its
+    notification is recorded in the outbox (on disk with OUTBOX_PATH); if
+    writing the outbox file fails, the change is applied all the same and
+    answered with 200, its notification pending in memory, and the failure
+    is counted in outbox_commit_failures_total.
+    With an Idempotency-Key header, retries of the same request get the
+    outcome of the first one (marked with Idempotent-Replayed: true) without
+    touching the repository or sending the notification again.
+    Under overload the request is shed before reaching the repository:
+    429 when the client exceeds its rate limit, 503 when too many updates
+    are already running and queued; both carry Retry-After. A retry whose
+    Idempotency-Key outcome is cached is answered even then, unless its
+    client is over the rate limit.
+    """
+    logger.debug(
         "Router: PATCH /packages/%s/status called with new status %s",
         package_id,
         body.status
     )
 
-    try:
-        updated_pkg = await use_case.execute(package_id, body.status)
+    use_case = container.use_case
 
-        background_tasks.add_task(
-            notification_adapter.notify_status_changed,
-            updated_pkg
-        )
-        logger.info("Router: Scheduled notification for package %s", package_id)
+    async def admitted_update():
+        async with container.concurrency_limiter.slot():
+            result = await use_case.execute_one(package_id, body.status)
+            if result.outcome == StatusUpdateOutcome.UPDATED:
+                # Answered once the notification is on disk
+                await _committed(container)
+            return result
 
-        return updated_pkg
+    try:
+        if idempotency_key is None:
+            result, replayed = await admitted_update(), False
+        else:
+            # Checked before admission: a retry whose outcome is cached (or
+            # still running) is answered without taking a slot, so it is
+            # not shed under overload
+            result, replayed = await container.idempotency_cache.run(
+                idempotency_key,
+                (package_id, body.status),
+                admitted_update,
+                # A conflict may clear up: let the retry run it again
+                cacheable=lambda r: r.outcome != StatusUpdateOutcome.CONFLICT,
+            )
 
-    except PackageNotFoundError as e:
-        logger.error("Router: Package %s not found, returning 404", package_id)
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
+    except AdmissionRejectedError as e:
+        raise _overloaded(e)
 
-    except InvalidStateTransitionError as e:
-        logger.warning(
-            "Router: Invalid transition for package %s: %s",
-            package_id,
-            e
-        )
+    except IdempotencyKeyReusedError as e:
+        logger.warning("Router: %s Returning 422", e)
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=str(e)
         )
 
@@ -81,4 +698,30 @@ async def update_package_status(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
-        )
\ No newline at end of file
+        )
+
+    if replayed:
+        response.headers[IDEMPOTENT_REPLAYED_HEADER] = "true"
+
+    if result.outcome == StatusUpdateOutcome.NOT_FOUND:
+        logger.error("Router: Package %s not found, returning 404", package_id)
+    elif result.outcome == StatusUpdateOutcome.INVALID_TRANSITION:
+        logger.warning(
+            "Router: Invalid transition for package %s: %s",
+            package_id,
+            result.error
+        )
+    elif result.outcome == StatusUpdateOutcome.CONFLICT:
+        logger.warning(
+            "Router: Concurrent updates on package %s, returning 409: %s",
+            package_id,
+            result.error
+        )
+    if result.package is None:
+        raise HTTPException(
+            status_code=_OUTCOME_STATUS_CODES[result.outcome],
+            detail=result.error,
+            headers={IDEMPOTENT_REPLAYED_HEADER: "true"} if replayed else None,
+        )
+
+    return result.package
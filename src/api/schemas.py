@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from src.config import settings
 from src.domain.enums import PackageStatus
 
 
@@ -11,5 +14,110 @@ class PackageResponse(BaseModel):
     status: PackageStatus
     customer_address: str
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BatchStatusUpdateItem(BaseModel):
+    package_id: str
+    status: PackageStatus
+
+
+class BatchStatusUpdateRequest(BaseModel):
+    items: List[BatchStatusUpdateItem] = Field(
+        min_length=1, max_length=settings.batch_max_items
+    )
+
+
+class BatchStatusUpdateItemResult(BaseModel):
+    package_id: str
+    # HTTP status the item would have got as a single PATCH (200, 404, 400, 409);
+    # 200 as well for items already in the requested status
+    status_code: int
+    package: Optional[PackageResponse] = None
+    detail: Optional[str] = None
+
+
+class BatchStatusUpdateResponse(BaseModel):
+    updated: int
+    # Items already in the requested status: nothing was written
+    unchanged: int = 0
+    failed: int
+    results: List[BatchStatusUpdateItemResult]
+
+
+class PackageLookupRequest(BaseModel):
+    ids: List[str] = Field(
+        min_length=1, max_length=settings.batch_max_items
+    )
+
+
+class PackageLookupResponse(BaseModel):
+    # Found packages, in the order of the requested ids (each once)
+    packages: List[PackageResponse]
+    # Requested ids that match no package
+    missing: List[str]
+
+
+class PackageStatsResponse(BaseModel):
+    total: int
+    by_status: Dict[PackageStatus, int]
+
+
+class PackageChangesResponse(BaseModel):
+    # Pass it as `since` in the next call
+    version: int
+    # True when `limit` cut the list: call again right away with `version`
+    more: bool
+    packages: List[PackageResponse]
+
+
+class BulkIngestionError(BaseModel):
+    line: int
+    detail: str
+
+
+class BulkIngestionResponse(BaseModel):
+    received: int
+    inserted: int
+    rejected: int
+    elapsed_seconds: float
+    packages_per_second: float
+    # The first rejected records, at most 100
+    errors: List[BulkIngestionError]
+
+
+class StatusTransitionResponse(BaseModel):
+    from_status: PackageStatus
+    to_status: PackageStatus
+    at: datetime
+
+
+class PackageHistoryResponse(BaseModel):
+    package_id: str
+    # Current status
+    status: PackageStatus
+    # Oldest first
+    transitions: List[StatusTransitionResponse]
+    # Only transitions from then on are known: those applied by the process
+    # answering since it started, within the retention
+    recorded_since: datetime
+
+
+class HourlyTransitionCounts(BaseModel):
+    # Start of the hour (UTC)
+    hour: datetime
+    total: int
+    # Transitions into each status during the hour
+    by_status: Dict[PackageStatus, int]
+
+
+class TransitionCountsResponse(BaseModel):
+    start: datetime
+    end: datetime
+    total: int
+    by_status: Dict[PackageStatus, int]
+    # Only the hours with transitions, oldest first
+    hours: List[HourlyTransitionCounts]
+    # Only transitions from then on are counted: those applied by the
+    # process answering since it started, within the retention
+    recorded_since: datetime
@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from typing import Sequence, Tuple
+
+import orjson
+from fastapi import Response
+
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.metrics import Counter
+
+PACKAGE_ENCODINGS = Counter(
+    "package_encodings_total",
+    "Packages serialized for listings, by whether the cached bytes were reused (hit) or not (miss).",
+    ["result"],
+)
+_HITS = PACKAGE_ENCODINGS.labels("hit")
+_MISSES = PACKAGE_ENCODINGS.labels("miss")
+
+
+class ORJSONResponse(Response):
+    """
+    JSON response whose content is already encoded bytes, or anything
+    orjson can encode.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content)
+
+
+class PackageEncoder:
+    """
+    Encodes packages straight to the JSON bytes of PackageResponse, without
+    building one pydantic model per package, and keeps the bytes of each
+    package keyed by id.
+
+    A cached entry is reused only while the package still has the status and
+    address it was encoded with (its version, as far as the response is
+    concerned): the status is an enum member, compared by identity, and the
+    address usually is the very same string object, so checking costs far
+    less than encoding.
+
+    Past max_entries the least recently used entries are dropped, except
+    while encoding a listing larger than the cache: cycling through it would
+    evict every entry before the next listing reads it, so its misses are
+    cached only while there is room, and the next listings hit on those.
+    """
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        # package id -> (status, customer_address, encoded bytes), least
+        # recently used first
+        self._cache: "OrderedDict[str, Tuple[PackageStatus, str, bytes]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def encode(self, package: Package) -> bytes:
+        cached = self._cache.get(package.id)
+        if cached is not None and cached[0] is package.status and cached[1] == package.customer_address:
+            _HITS.inc()
+            self._cache.move_to_end(package.id)
+            return cached[2]
+        _MISSES.inc()
+        return self._store(package, evict=True)
+
+    def encode_many(self, packages: Sequence[Package]) -> list:
+        """
+        encode() for many packages, with the hot loop kept free of attribute
+        lookups and metric updates (counted once at the end).
+        """
+        cache_get = self._cache.get
+        move_to_end = self._cache.move_to_end
+        store = self._store
+        evict = len(packages) <= self._max_entries
+        encoded = []
+        append = encoded.append
+        misses = 0
+        for package in packages:
+            cached = cache_get(package.id)
+            if cached is not None and cached[0] is package.status and cached[1] == package.customer_address:
+                move_to_end(package.id)
+                append(cached[2])
+            else:
+                misses += 1
+                append(store(package, evict))
+        _MISSES.inc(misses)
+        _HITS.inc(len(encoded) - misses)
+        return encoded
+
+    def encode_array(self, packages: Sequence[Package]) -> bytes:
+        """
+        JSON array of the packages, as List[PackageResponse] would render it.
+        """
+        return b"[" + b",".join(self.encode_many(packages)) + b"]"
+
+    def encode_lines(self, packages: Sequence[Package]) -> bytes:
+        """
+        One JSON document per line (NDJSON), each line ended by a newline.
+        """
+        encoded = self.encode_many(packages)
+        if not encoded:
+            return b""
+        return b"\n".join(encoded) + b"\n"
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def _store(self, package: Package, evict: bool) -> bytes:
+        # orjson hands back its whole write buffer (about 1 KiB, whatever the
+        # output size): copy it into an exact-size object before caching it
+        encoded = memoryview(orjson.dumps({
+            "id": package.id,
+            "status": package.status.value,
+            "customer_address": package.customer_address,
+        })).tobytes()
+        cache = self._cache
+        if package.id in cache:
+            cache.move_to_end(package.id)
+        elif len(cache) >= self._max_entries:
+            if not (evict and self._max_entries):
+                return encoded
+            cache.popitem(last=False)
+        cache[package.id] = (package.status, package.customer_address, encoded)
+        return encoded
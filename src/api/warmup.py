@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from src.adapters.manifest import PARSERS_BY_MEDIA_TYPE, media_type_for_path, read_file_blocks
+from src.domain.entities import Package
+from src.ports.repository import PackageRepository
+from src.use_cases.ingest_packages import IngestPackagesUseCase
+
+logger = logging.getLogger(__name__)
+
+RECOVERING = "recovering"
+STARTING = "starting"
+READY = "ok"
+FAILED = "failed"
+
+
+class Warmup:
+    """
+    Loads the initial packages in a background task, once the app serves
+    requests, instead of holding up the server's startup:
+    - the persisted state, by opening the repository (e.g. the journal
+      replay, which yields to the event loop between chunks of records);
+      while `recovering` the package routes answer 503,
+    - the preload_addresses packages, when the repository is empty and no
+      seed_manifest is given,
+    - or, when given instead, the seed_manifest file (NDJSON or CSV),
+      through the ingest use case, which stores it chunk_size packages at a
+      time and yields to the event loop between chunks.
+    Only the first worker to start loads anything when the state is shared:
+    the others find the repository not empty. `state` goes from RECOVERING
+    to STARTING to READY, or to FAILED when loading raised.
+    """
+
+    def __init__(
+        self,
+        repository: PackageRepository,
+        preload_addresses: List[str],
+        seed_manifest: Optional[str] = None,
+        chunk_size: int = 1_000,
+    ):
+        self._repository = repository
+        self._ingest_use_case = IngestPackagesUseCase(repository, chunk_size=chunk_size)
+        self._preload_addresses = preload_addresses
+        self._seed_manifest = seed_manifest
+        self._task: Optional[asyncio.Task] = None
+        self.state = RECOVERING
+        self.recovered = False
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    @property
+    def recovering(self) -> bool:
+        """
+        True from start() until the repository is open (for good if opening
+        it failed): its state must not be read or written meanwhile.
+        """
+        return self._task is not None and not self.recovered
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def wait(self) -> None:
+        """
+        Waits until the warm-up is over, whether it succeeded or not.
+        """
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def stop(self) -> None:
+        """
+        Cancels a warm-up still running (e.g. the server stops while seeding).
+        """
+        if self._task is None or self._task.done():
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        started = time.perf_counter()
+        try:
+            await self._repository.open()
+            self.recovered = True
+            self.state = STARTING
+            logger.info("Repository recovered in %.2fs", time.perf_counter() - started)
+            await self._load()
+        except asyncio.CancelledError:
+            logger.warning("Warm-up cancelled after %.2fs", time.perf_counter() - started)
+            raise
+        except Exception:
+            self.state = FAILED
+            logger.exception("Warm-up failed after %.2fs", time.perf_counter() - started)
+            return
+        self.state = READY
+        logger.info("Warm-up finished in %.2fs, ready to serve", time.perf_counter() - started)
+
+    async def _load(self) -> None:
+        if self._seed_manifest is None:
+            packages = [Package(customer_address=address) for address in self._preload_addresses]
+            if not await self._repository.preload_if_empty(packages):
+                logger.info("Starting up: recovered packages found, skipping preload")
+                return
+            logger.info("Finished preloading %d packages", len(packages))
+            return
+
+        media_type = media_type_for_path(self._seed_manifest)
+        if media_type is None:
+            raise ValueError(f"Cannot tell the format of seed manifest {self._seed_manifest} from its extension")
+        report = await self._ingest_use_case.execute(
+            PARSERS_BY_MEDIA_TYPE[media_type](read_file_blocks(self._seed_manifest)),
+            only_if_empty=True,
+        )
+        if report is None:
+            logger.info("Starting up: recovered packages found, skipping the seed manifest")
+            return
+        logger.info(
+            "Seeded %d packages from %s (%d rejected) in %.2fs",
+            report.inserted,
+            self._seed_manifest,
+            report.rejected,
+            report.elapsed_seconds,
+        )
@@ -1,12 +1,98 @@
-from typing import List
+import os
+from typing import List, Optional
 
 class Settings:
     app_name: str = "Paack Assignment API"
+    # Storage adapter: "memory" (InMemoryPackageRepository),
+    # "columnar" (ColumnarPackageRepository, compact for very large fleets),
+    # "sql" (SQLPackageRepository on the SQLite file sql_database)
+    # or "shared" (SharedMemoryPackageRepository, shared by uvicorn workers)
+    repository_backend: str = os.getenv("REPOSITORY_BACKEND", "memory")
+    sql_database: str = os.getenv("SQL_DATABASE", "packages.db")
+    sql_pool_size: int = int(os.getenv("SQL_POOL_SIZE", "4"))
+    # Memory-mapped state file of the "shared" backend and its capacity
+    # (fixed when the file is created)
+    shared_state_path: str = os.getenv("SHARED_STATE_PATH", "packages.shm")
+    shared_capacity: int = int(os.getenv("SHARED_CAPACITY", "1000000"))
+    # When set, the in-memory repository journals every write under this
+    # directory and recovers its state from it at startup
+    data_dir: Optional[str] = os.getenv("DATA_DIR") or None
+    # When above 0, the repository is wrapped in a CachingPackageRepository
+    # keeping up to this many recently used packages, each for
+    # repository_cache_ttl seconds (how stale a package written by another
+    # process can be read)
+    repository_cache_size: int = int(os.getenv("REPOSITORY_CACHE_SIZE", "0"))
+    repository_cache_ttl: float = float(os.getenv("REPOSITORY_CACHE_TTL", "5"))
+    # Journal records between two automatic snapshots
+    snapshot_every: int = int(os.getenv("SNAPSHOT_EVERY", "1000000"))
+    # When set, status changes are POSTed in batches to this webhook
+    # (WebhookNotifier); otherwise NotificationStub only logs them
+    notification_webhook_url: Optional[str] = os.getenv("NOTIFICATION_WEBHOOK_URL") or None
+    notification_batch_size: int = int(os.getenv("NOTIFICATION_BATCH_SIZE", "100"))
+    # Status changes wait in an outbox until the notifier delivered them.
+    # When outbox_path is set it is also written to that file (path.1,
+    # path.2, ... for further workers), so undelivered changes survive a
+    # restart; at most outbox_max_in_memory of them are held in memory,
+    # the rest stay on disk (or are dropped when there is no file)
+    outbox_path: Optional[str] = os.getenv("OUTBOX_PATH") or None
+    outbox_max_in_memory: int = int(os.getenv("OUTBOX_MAX_IN_MEMORY", "100000"))
+    # Outcomes of PATCH requests sent with an Idempotency-Key are kept this
+    # many seconds (up to this many keys) to answer retries
+    idempotency_cache_size: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "100000"))
+    idempotency_ttl: float = float(os.getenv("IDEMPOTENCY_TTL", "600"))
     preload_addresses: List[str] = [
         "Calle Prueba 123 4 3A, Madrid",
         "Avenida Siempre Viva 456 4C, Barcelona",
         "Calle del Naranjo 10 Bajo B, Valencia",
         "Calle de la Zamburiña 124 5A, Galicia"
     ]
+    # Manifest file (NDJSON or CSV) loaded in the background at startup when
+    # the repository is empty; /health answers 503 until it is stored
+    seed_manifest: Optional[str] = os.getenv("SEED_MANIFEST") or None
+    # Packages stored per chunk by that background load: smaller than
+    # ingest_chunk_size, as every chunk holds up the requests served meanwhile
+    warmup_chunk_size: int = int(os.getenv("WARMUP_CHUNK_SIZE", "1000"))
+    # Token bucket per client and route on the PATCH endpoints: up to
+    # rate_limit_burst requests at once, refilled at rate_limit_per_second
+    # (0 disables it). Clients are told apart by the rate_limit_client_header
+    # header when set (e.g. a scanner id set by the gateway), by their
+    # address otherwise
+    rate_limit_per_second: float = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))
+    rate_limit_burst: int = int(os.getenv("RATE_LIMIT_BURST", "100"))
+    rate_limit_client_header: Optional[str] = os.getenv("RATE_LIMIT_CLIENT_HEADER") or None
+    # Status updates running at once; beyond that up to admission_max_queue
+    # wait for admission_max_queue_delay seconds at most, then get 503
+    admission_max_concurrency: int = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "64"))
+    admission_max_queue: int = int(os.getenv("ADMISSION_MAX_QUEUE", "1000"))
+    admission_max_queue_delay: float = float(os.getenv("ADMISSION_MAX_QUEUE_DELAY", "0.5"))
+    # Upper bound on the number of items accepted by PATCH /packages/status:batch
+    batch_max_items: int = 10_000
+    # Largest page accepted by GET /packages?limit=
+    page_max_limit: int = 1_000
+    # Packages read from the repository per chunk when streaming NDJSON
+    stream_chunk_size: int = 1_000
+    # Changes kept by the memory and columnar backends for
+    # GET /packages/changes; older versions get 410 and must re-list
+    change_log_size: int = int(os.getenv("CHANGE_LOG_SIZE", "100000"))
+    # Largest number of packages returned by one GET /packages/changes
+    changes_max_limit: int = 10_000
+    # Packages whose encoded JSON is kept between listings, about 290 bytes
+    # each (0 disables the cache)
+    package_json_cache_size: int = int(os.getenv("PACKAGE_JSON_CACHE_SIZE", "100000"))
+    # Packages stored per repository call by POST /packages:bulk and the
+    # manifest loader; other requests are served between chunks
+    ingest_chunk_size: int = int(os.getenv("INGEST_CHUNK_SIZE", "5000"))
+    # Widest window (in hours) of GET /packages/history/hourly
+    history_max_window_hours: int = 24 * 31
+    # Hours of transitions kept by each process's in-memory history; older
+    # ones are dropped to keep its memory bounded
+    history_retention_hours: int = int(os.getenv("HISTORY_RETENTION_HOURS", str(24 * 31)))
+    # Events queued per live stream subscriber (SSE / WebSocket); one that
+    # falls further behind is disconnected
+    event_queue_size: int = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+    # Seconds of silence after which an SSE stream gets a keep-alive comment
+    event_keepalive_interval: float = float(os.getenv("EVENT_KEEPALIVE_INTERVAL", "15"))
+    # Largest number of package_id filters of one live stream subscription
+    events_max_package_ids: int = 1_000
 
 settings = Settings()
\ No newline at end of file
@@ -1,4 +1,5 @@
 import uuid
+from typing import Optional
 from .enums import PackageStatus
 
 class Package: 
@@ -6,12 +7,54 @@ class Package:
     Entity 'Package' in the domain.
     Each package has a unique ID (UUID4),
     a client address, and a state.
+    Uses __slots__ (no per-instance __dict__) to keep millions of
+    instances affordable in memory.
     """
 
-    def __init__(self, customer_address: str, status: PackageStatus = PackageStatus.READY):
-        self.id: str = str(uuid.uuid4())
+    __slots__ = ("id", "customer_address", "status")
+
+    def __init__(
+        self,
+        customer_address: str,
+        status: PackageStatus = PackageStatus.READY,
+        package_id: Optional[str] = None,
+    ):
+        self.id: str = package_id or str(uuid.uuid4())
         self.customer_address = customer_address
         self.status: PackageStatus = status
 
+    def with_status(self, status: PackageStatus) -> "Package":
+        """
+        Returns a copy of this package in the given status.
+        Used by repositories to publish a new version instead of
+        mutating an instance other coroutines may still be reading.
+        """
+        return Package(customer_address=self.customer_address, status=status, package_id=self.id)
+
+    def __repr__(self):
+        return f"<Package id={self.id} status={self.status} address={self.customer_address}>"
+
+
+class StatusTransition:
+    """
+    One status change of a package: from_status -> to_status at `at`
+    (seconds since the epoch, UTC).
+    """
+
+    __slots__ = ("package_id", "from_status", "to_status", "at")
+
+    def __init__(self, package_id: str, from_status: PackageStatus, to_status: PackageStatus, at: float):
+        self.package_id = package_id
+        self.from_status = from_status
+        self.to_status = to_status
+        self.at = at
+
+    def __eq__(self, other):
+        if not isinstance(other, StatusTransition):
+            return NotImplemented
+        return (self.package_id, self.from_status, self.to_status, self.at) == (
+            other.package_id, other.from_status, other.to_status, other.at
+        )
+
     def __repr__(self):
-        return f"<Package id={self.id} status={self.status} address={self.customer_address}>"
\ No newline at end of file
+        return f"<StatusTransition id={self.package_id} {self.from_status} -> {self.to_status} at={self.at}>"
@@ -1,6 +1,16 @@
 from enum import Enum
+from typing import Dict, Tuple
 
 class PackageStatus(str, Enum):
     READY = "READY"
     IN_TRANSIT = "IN_TRANSIT"
-    DELIVERED = "DELIVERED"
\ No newline at end of file
+    DELIVERED = "DELIVERED"
+    # New statuses go at the end: their position is their storage code
+    RETURNED = "RETURNED"
+    FAILED_ATTEMPT = "FAILED_ATTEMPT"
+    LOST = "LOST"
+
+# Compact 1-byte codes for each status, used by storage that keeps
+# statuses in byte arrays instead of enum references.
+STATUSES_BY_CODE: Tuple[PackageStatus, ...] = tuple(PackageStatus)
+STATUS_CODES: Dict[PackageStatus, int] = {status: code for code, status in enumerate(STATUSES_BY_CODE)}
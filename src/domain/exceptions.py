@@ -8,4 +8,21 @@ class PackageNotFoundError(Exception):
     """
     Domain Exception: Thrown when a package cannot be found by its ID.
     """
-    pass
\ No newline at end of file
+    pass
+
+class StaleStatusError(Exception):
+    """
+    Domain Exception: Thrown when a conditional transition finds the package
+    in a different status than the one the caller validated against.
+    """
+    pass
+
+class InvalidPackageRecordError(Exception):
+    """
+    Domain Exception: Thrown (or reported) when a record of a package manifest
+    cannot be turned into a Package. `line` is its 1-based line number.
+    """
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
@@ -1,32 +1,107 @@
+from operator import add
+from typing import Dict, FrozenSet, Iterable, Sequence
+
 from .entities import Package
-from .enums import PackageStatus
+from .enums import PackageStatus, STATUS_CODES, STATUSES_BY_CODE
 from .exceptions import InvalidStateTransitionError
+from .transitions import TRANSITIONS
+
+# The transition table compiled once at import:
+# - _SUCCESSORS: status -> frozenset of allowed next statuses (single checks),
+# - _ALLOWED: status x status matrix as a bytes translation table, indexed by
+#   current_code * len(statuses) + new_code, 1 where the transition is allowed,
+# - _ROW_OFFSETS: translation table turning a status code into the index of
+#   its row in _ALLOWED.
+_SUCCESSORS: Dict[PackageStatus, FrozenSet[PackageStatus]] = {
+    status: frozenset(TRANSITIONS.get(status, ())) for status in PackageStatus
+}
+_STATUS_COUNT = len(STATUSES_BY_CODE)
+if _STATUS_COUNT * _STATUS_COUNT > 256:
+    raise ValueError("The transition matrix must fit in a byte translation table")
+_ALLOWED = bytes(
+    1 if STATUSES_BY_CODE[index % _STATUS_COUNT] in _SUCCESSORS.get(STATUSES_BY_CODE[index // _STATUS_COUNT], ())
+    else 0
+    for index in range(_STATUS_COUNT * _STATUS_COUNT)
+).ljust(256, b"\0")
+_ROW_OFFSETS = bytes(
+    code * _STATUS_COUNT if code < _STATUS_COUNT else 0 for code in range(256)
+)
+
 
 class PackageDomainService:
     """
     Domain Service: Contains the business logic that
     validates and enforces a Package's state transitions.
+    The rules are the TRANSITIONS table, precompiled into lookups.
     """
 
     @staticmethod
-    def change_status(package: Package, new_status: PackageStatus) -> None:
+    def can_transition(current: PackageStatus, new_status: PackageStatus) -> bool:
+        """
+        Non-raising check of a single status change (one dict lookup and one
+        set membership test).
+        """
+        return new_status in _SUCCESSORS[current]
+
+    @staticmethod
+    def can_transition_many(
+        current_statuses: Iterable[PackageStatus],
+        new_statuses: Iterable[PackageStatus],
+    ) -> bytes:
+        """
+        Checks many status changes at once, pairing the two sequences item
+        by item. Returns one byte per pair: 1 if allowed, 0 otherwise.
+        Statuses are turned into code bytes and looked up in the transition
+        matrix with bytes.translate, so the per-item work runs in C.
+        """
+        current_codes = bytes(map(STATUS_CODES.__getitem__, current_statuses))
+        new_codes = bytes(map(STATUS_CODES.__getitem__, new_statuses))
+        if len(current_codes) != len(new_codes):
+            raise ValueError("current_statuses and new_statuses must have the same length")
+        cells = bytes(map(add, current_codes.translate(_ROW_OFFSETS), new_codes))
+        return cells.translate(_ALLOWED)
+
+    @staticmethod
+    def invalid_transition_error(current: PackageStatus, new_status: PackageStatus) -> InvalidStateTransitionError:
+        """
+        Builds (without raising) the error describing a rejected status change.
         """
-        Validates and applies a status change.
-        The rules are:
-        READY -> IN_TRANSIT -> DELIVERED
-        Any other combination should be considered invalid.
+        return InvalidStateTransitionError(
+            f"Transición inválida de estado: {current} -> {new_status}"
+        )
+
+    @staticmethod
+    def validate_transition(current: PackageStatus, new_status: PackageStatus) -> None:
+        """
+        Validates a status change without applying it.
+        Throws InvalidStateTransitionError if TRANSITIONS doesn't allow it.
         """
 
-        current = package.status
+        if new_status not in _SUCCESSORS[current]:
+            raise PackageDomainService.invalid_transition_error(current, new_status)
 
-        if current == PackageStatus.READY and new_status == PackageStatus.IN_TRANSIT:
-            package.status = new_status
-            return
+    @staticmethod
+    def validate_transitions(
+        current_statuses: Sequence[PackageStatus],
+        new_statuses: Sequence[PackageStatus],
+    ) -> None:
+        """
+        Validates a whole batch of status changes at once.
+        Throws InvalidStateTransitionError for the first rejected pair.
+        """
 
-        if current == PackageStatus.IN_TRANSIT and new_status == PackageStatus.DELIVERED:
-            package.status = new_status
-            return
+        allowed = PackageDomainService.can_transition_many(current_statuses, new_statuses)
+        rejected = allowed.find(0)
+        if rejected != -1:
+            raise PackageDomainService.invalid_transition_error(
+                current_statuses[rejected], new_statuses[rejected]
+            )
 
-        raise InvalidStateTransitionError(
-            f"Transición inválida de estado: {current} -> {new_status}"
-        )
\ No newline at end of file
+    @staticmethod
+    def change_status(package: Package, new_status: PackageStatus) -> None:
+        """
+        Validates and applies a status change on the given package.
+        """
+
+        PackageDomainService.validate_transition(package.status, new_status)
+        package.status = new_status
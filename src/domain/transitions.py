@@ -0,0 +1,29 @@
+from typing import Dict, Tuple
+
+from .enums import PackageStatus
+
+# Declarative state machine: status -> statuses a package may move to from it.
+# Statuses missing from the table (or mapped to ()) are terminal.
+#
+#   READY -> IN_TRANSIT -> DELIVERED
+#               |  ^
+#               v  |
+#          FAILED_ATTEMPT -> RETURNED
+#
+# and IN_TRANSIT / FAILED_ATTEMPT -> LOST.
+TRANSITIONS: Dict[PackageStatus, Tuple[PackageStatus, ...]] = {
+    PackageStatus.READY: (PackageStatus.IN_TRANSIT,),
+    PackageStatus.IN_TRANSIT: (
+        PackageStatus.DELIVERED,
+        PackageStatus.FAILED_ATTEMPT,
+        PackageStatus.LOST,
+    ),
+    PackageStatus.FAILED_ATTEMPT: (
+        PackageStatus.IN_TRANSIT,
+        PackageStatus.RETURNED,
+        PackageStatus.LOST,
+    ),
+    PackageStatus.DELIVERED: (),
+    PackageStatus.RETURNED: (),
+    PackageStatus.LOST: (),
+}
@@ -1,33 +1,123 @@
+import atexit
+import json
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import List, Optional
 import os
 
-def setup_logging(log_file: Optional[str] = None, level: Optional[str] = None) -> None:
+from src.metrics import Gauge
+
+# Policies when the log queue is full:
+# - "drop": discard the new record
+# - "drop_oldest": discard the oldest queued record to make room
+# - "block": wait for room (never loses records, may stall the caller)
+OVERFLOW_POLICIES = ("drop", "drop_oldest", "block")
+
+_listener: Optional[QueueListener] = None
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler over a bounded queue, applying an overflow policy instead
+    of growing without limit when the listener thread falls behind.
+    Counts the records it had to discard in `dropped`.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]", overflow: str = "drop"):
+        super().__init__(log_queue)
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown log overflow policy {overflow!r}, expected one of {OVERFLOW_POLICIES}")
+        self.overflow = overflow
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        self.dropped += 1
+        if self.overflow == "drop_oldest":
+            try:
+                self.queue.get_nowait()
+                self.queue.task_done()
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                pass
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line, for log collectors.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+def setup_logging(
+    log_file: Optional[str] = None,
+    level: Optional[str] = None,
+    log_format: Optional[str] = None,
+    queue_size: Optional[int] = None,
+    overflow: Optional[str] = None,
+) -> None:
     """
     Configure logging to output to the console and, optionally, to a file.
     - log_file: Path to the file where logs will be saved. If None, a FileHandler is not created.
     - level: Logging level ("DEBUG", "INFO", "WARNING", "ERROR"). If None, it is taken from LOG_LEVEL or the default is "INFO".
+    - log_format: "text" or "json". If None, it is taken from LOG_FORMAT or the default is "text".
+    - queue_size: Maximum number of records waiting to be written. If None, it is taken from LOG_QUEUE_SIZE or the default is 10000.
+    - overflow: What to do when the queue is full ("drop", "drop_oldest", "block"). If None, it is taken from LOG_OVERFLOW or the default is "drop".
+
+    The console and file handlers don't run on the caller's thread: the root
+    logger only gets a QueueHandler, and a QueueListener thread does the
+    actual I/O, so the event loop never blocks on stdout or disk.
     """
 
+    global _listener
+
     log_level = level.upper() if level else None
     if log_level is None:
         log_level = (os.getenv("LOG_LEVEL") or "INFO").upper()
+    log_format = (log_format or os.getenv("LOG_FORMAT") or "text").lower()
+    queue_size = queue_size or int(os.getenv("LOG_QUEUE_SIZE") or 10_000)
+    overflow = (overflow or os.getenv("LOG_OVERFLOW") or "drop").lower()
 
-    formatter = logging.Formatter(
-        fmt="%(asctime)s %(levelname)s [%(name)s] %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    if log_format == "json":
+        formatter: logging.Formatter = JsonFormatter(datefmt="%Y-%m-%dT%H:%M:%S%z")
+    else:
+        formatter = logging.Formatter(
+            fmt="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
 
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, log_level, logging.INFO))
 
+    # If the queue handler was already added, don't start a second pipeline (avoid duplication)
+    if any(isinstance(h, BoundedQueueHandler) for h in root_logger.handlers):
+        return
+
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-
-    if not any(isinstance(h, logging.StreamHandler) for h in root_logger.handlers):
-        root_logger.addHandler(console_handler)
+    handlers: List[logging.Handler] = [console_handler]
 
     if log_file:
         file_handler = RotatingFileHandler(
@@ -35,6 +125,37 @@ def setup_logging(log_file: Optional[str] = None, level: Optional[str] = None) -
             encoding="utf-8",
         )
         file_handler.setFormatter(formatter)
-        # If the file handler already added does not exist, (avoid duplication)
-        if not any(isinstance(h, RotatingFileHandler) for h in root_logger.handlers):
-            root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+    root_logger.addHandler(BoundedQueueHandler(log_queue, overflow=overflow))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """
+    Writes out the records still queued and stops the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_log_records() -> int:
+    """
+    Number of records discarded so far because the log queue was full.
+    """
+    return sum(
+        h.dropped for h in logging.getLogger().handlers if isinstance(h, BoundedQueueHandler)
+    )
+
+
+LOG_RECORDS_DROPPED = Gauge(
+    "log_records_dropped",
+    "Log records discarded so far because the log queue was full.",
+)
+LOG_RECORDS_DROPPED.set_function(dropped_log_records)
@@ -0,0 +1,220 @@
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Buckets (in seconds) for HTTP request latencies
+REQUEST_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Buckets (in seconds) for in-process critical sections, which take microseconds
+LOCK_LATENCY_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+
+class MetricsRegistry:
+    """
+    Holds the metrics exposed by /metrics and renders them in the
+    Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        lines.append("")
+        return "\n".join(lines)
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Metric:
+    """
+    Base of Counter, Gauge and Histogram. A metric with label names holds one
+    child per combination of label values (see labels()); a metric without
+    labels is its own single child.
+
+    Updates are plain attribute writes without locking: they happen on the
+    event loop thread, so they never interleave.
+    """
+
+    kind = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[MetricsRegistry] = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self._labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values: str, **kwargs: str) -> "_Metric":
+        """
+        Returns the child for these label values, creating it on first use.
+        Hot paths should keep the child instead of calling labels() each time.
+        """
+        if kwargs:
+            values = tuple(kwargs[name] for name in self._labelnames)
+        if len(values) != len(self._labelnames):
+            raise ValueError(f"{self.name} expects labels {self._labelnames}, got {values}")
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self) -> Iterator[str]:
+        if not self._labelnames:
+            yield from self._child_samples("")
+            return
+        for values, child in list(self._children.items()):
+            label_text = ",".join(
+                f'{name}="{_escape(value)}"' for name, value in zip(self._labelnames, values)
+            )
+            yield from child._child_samples(label_text)
+
+    def _new_child(self) -> "_Metric":
+        child = object.__new__(type(self))
+        child.name = self.name
+        child._init_child(self)
+        return child
+
+    def _init_child(self, parent: "_Metric") -> None:
+        raise NotImplementedError
+
+    def _child_samples(self, label_text: str) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing value, e.g. number of requests.
+    By convention its name ends in _total.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs):
+        super().__init__(name, documentation, labelnames, **kwargs)
+        self.value = 0.0
+
+    def _init_child(self, parent: "_Metric") -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def _child_samples(self, label_text: str) -> Iterator[str]:
+        yield f"{self.name}{_braces(label_text)} {_format(self.value)}"
+
+
+class Gauge(_Metric):
+    """
+    Value that goes up and down, e.g. a queue depth. With set_function()
+    the value is read from a callback when the metrics are rendered.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs):
+        super().__init__(name, documentation, labelnames, **kwargs)
+        self._init_child(self)
+
+    def _init_child(self, parent: "_Metric") -> None:
+        self.value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set_function(self, function: Optional[Callable[[], float]]) -> None:
+        self._function = function
+
+    def _child_samples(self, label_text: str) -> Iterator[str]:
+        value = self._function() if self._function is not None else self.value
+        yield f"{self.name}{_braces(label_text)} {_format(value)}"
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values over fixed buckets, e.g. latencies.
+    observe() is a binary search plus two additions.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = REQUEST_LATENCY_BUCKETS,
+        **kwargs,
+    ):
+        self._upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, **kwargs)
+        self._init_child(self)
+
+    def _init_child(self, parent: "_Metric") -> None:
+        self._upper_bounds = parent._upper_bounds
+        # One count per bucket plus the +Inf bucket, not cumulative
+        self._counts = [0] * (len(self._upper_bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self._upper_bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def _child_samples(self, label_text: str) -> Iterator[str]:
+        prefix = f"{label_text}," if label_text else ""
+        cumulative = 0
+        for bound, count in zip(self._upper_bounds + (math.inf,), self._counts):
+            cumulative += count
+            yield f'{self.name}_bucket{{{prefix}le="{_format(bound)}"}} {cumulative}'
+        yield f"{self.name}_sum{_braces(label_text)} {_format(self.sum)}"
+        yield f"{self.name}_count{_braces(label_text)} {cumulative}"
+
+
+def _braces(label_text: str) -> str:
+    return f"{{{label_text}}}" if label_text else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
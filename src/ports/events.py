@@ -0,0 +1,19 @@
+from abc import ABC, abstractmethod
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+
+class TransitionListener(ABC):
+    """
+    Interface (port) for in-process consumers of status transitions, such
+    as live streams to clients.
+    UpdatePackageStatusUseCase calls it on the event loop right after a
+    transition is stored, so implementations must neither block nor await:
+    anything slow has to be queued and done elsewhere.
+    """
+
+    @abstractmethod
+    def on_status_changed(self, package: Package, previous_status: PackageStatus) -> None:
+        """
+        The package (in its new state) just left previous_status.
+        """
+        ...
@@ -0,0 +1,45 @@
+from abc import abstractmethod
+from typing import Dict, List, Optional
+from src.domain.entities import StatusTransition
+from src.domain.enums import PackageStatus
+from src.ports.events import TransitionListener
+
+class TransitionHistory(TransitionListener):
+    """
+    Interface (port) for the audit trail of status transitions.
+    Registered as a TransitionListener of UpdatePackageStatusUseCase, it
+    records every transition it is told about with the time it happened,
+    and answers per-package and per-hour queries over them.
+    """
+
+    @abstractmethod
+    def recorded_since(self) -> float:
+        """
+        Earliest time (seconds since the epoch) the history answers for:
+        transitions before it were not recorded, or are no longer kept.
+        """
+        ...
+
+    @abstractmethod
+    async def get_package_history(
+        self,
+        package_id: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> List[StatusTransition]:
+        """
+        Transitions of a package, oldest first, optionally only those at or
+        after `start` and before `end` (seconds since the epoch).
+        Empty for a package that never changed status.
+        """
+        ...
+
+    @abstractmethod
+    async def count_by_hour(self, start: float, end: float) -> Dict[int, Dict[PackageStatus, int]]:
+        """
+        Number of transitions into each status per hour, for the hours
+        overlapping [start, end). Keyed by the hour's start (seconds since
+        the epoch, a multiple of 3600); hours without transitions are
+        missing, and so are statuses nobody moved into.
+        """
+        ...
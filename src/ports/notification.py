@@ -0,0 +1,49 @@
+from abc import ABC, abstractmethod
+from typing import List
+from src.ports.outbox import OutboxEvent
+
+class NotificationDeliveryError(Exception):
+    """
+    Raised when the receiving system did not accept a batch of
+    notifications; the caller is expected to send it again later.
+    """
+
+
+class NotificationRejectedError(NotificationDeliveryError):
+    """
+    Raised when the receiving system refused a batch for good (e.g. it
+    answered 400): sending the same batch again would fail the same way.
+    """
+
+
+class NotificationPort(ABC):
+    """
+    Interface (port) for notifying external systems about status changes.
+    Any implementation (stub, webhook, message queue, etc.)
+    must inherit from this class and provide the methods declared here.
+    """
+
+    async def start(self) -> None:
+        """
+        Starts any background machinery (workers, connection pools).
+        Called once at application startup. No-op by default.
+        """
+
+    async def stop(self) -> None:
+        """
+        Releases resources. Called once at application shutdown, after the
+        outbox dispatcher stopped. No-op by default.
+        """
+
+    @abstractmethod
+    async def deliver_status_changes(self, events: List[OutboxEvent]) -> None:
+        """
+        Delivers a batch of status changes, as recorded in the outbox (with
+        their sequence, previous status and time), in one attempt and returns once
+        the receiving system accepted it; raises (NotificationDeliveryError
+        or any other error) when it did not, NotificationRejectedError when
+        retrying is pointless. The outbox dispatcher is the only caller: it
+        relies on this to deliver every change at least once, and does the
+        batching and retrying.
+        """
+        ...
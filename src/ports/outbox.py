@@ -0,0 +1,87 @@
+from abc import abstractmethod
+from typing import List, NamedTuple
+from src.domain.enums import PackageStatus
+from src.ports.events import TransitionListener
+
+
+class OutboxEvent(NamedTuple):
+    """
+    One status change waiting to be notified, as it was when it happened:
+    later changes to the package don't alter it. `sequence` numbers the
+    events of an outbox in the order they were recorded, `at` is in
+    seconds since the epoch.
+    """
+    sequence: int
+    package_id: str
+    status: PackageStatus
+    previous_status: PackageStatus
+    customer_address: str
+    at: float
+
+
+class Outbox(TransitionListener):
+    """
+    Interface (port) for the queue of status changes still to be notified.
+    Registered as a TransitionListener of UpdatePackageStatusUseCase, it
+    records an OutboxEvent for every transition; a dispatcher reads them
+    back in sequence order with next_batch() and acknowledges them with
+    ack() once delivered. Events not acknowledged are handed out again,
+    including after a restart for outboxes that persist them; the ones the
+    receiver refuses for good are set aside with dead_letter().
+    """
+
+    async def open(self) -> None:
+        """
+        Recovers the events left undelivered and starts any background
+        machinery. Called once at application startup. No-op by default.
+        """
+
+    async def close(self) -> None:
+        """
+        Persists what is buffered and releases resources. Called once at
+        application shutdown. No-op by default.
+        """
+
+    async def committed(self) -> None:
+        """
+        Returns once every event recorded so far is persisted, so that a
+        request can answer only after its notification is safe. Returns
+        at once by default, for outboxes that don't persist events.
+        """
+
+    @abstractmethod
+    async def next_batch(self, max_events: int) -> List[OutboxEvent]:
+        """
+        Waits until there are unacknowledged events, then returns up to
+        max_events of the oldest ones, in sequence order.
+        """
+        ...
+
+    @abstractmethod
+    def ack(self, sequence: int) -> None:
+        """
+        Marks every event up to `sequence` as delivered.
+        """
+        ...
+
+    @abstractmethod
+    def pending(self) -> int:
+        """
+        Number of events recorded and not acknowledged yet.
+        """
+        ...
+
+    @abstractmethod
+    def lag(self) -> float:
+        """
+        Age in seconds of the oldest unacknowledged event, 0 when none.
+        """
+        ...
+
+    async def dead_letter(self, events: List[OutboxEvent], reason: str) -> None:
+        """
+        Sets aside the oldest unacknowledged events, which the receiver
+        refused for good, and acknowledges them so that the ones behind go
+        out. By default they are dropped.
+        """
+        self.ack(events[-1].sequence)
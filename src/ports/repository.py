@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.domain.exceptions import PackageNotFoundError, StaleStatusError
 
 class PackageRepository(ABC):
     """
@@ -9,6 +11,18 @@ class PackageRepository(ABC):
     must inherit from this class and provide the methods declared here.
     """
 
+    async def open(self) -> None:
+        """
+        Prepares the storage (connections, recovery of persisted state).
+        Called once at application startup. No-op by default.
+        """
+
+    async def close(self) -> None:
+        """
+        Flushes and releases the storage. Called once at application
+        shutdown. No-op by default.
+        """
+
     @abstractmethod
     async def get_by_id(self, package_id: str) -> Package:
         """
@@ -24,8 +38,187 @@ class PackageRepository(ABC):
         """
         ...
 
+    @abstractmethod
+    async def transition(
+        self,
+        package_id: str,
+        expected_status: PackageStatus,
+        new_status: PackageStatus,
+    ) -> Package:
+        """
+        Atomically moves a Package from expected_status to new_status
+        (compare-and-set) and returns the updated Package.
+        Must throw a PackageNotFoundError exception if it doesn't exist,
+        and a StaleStatusError if its current status is not expected_status.
+        """
+        ...
+
+    async def preload_packages(self, packages: List[Package]) -> None:
+        """
+        Stores a list of Packages, e.g. sample data at startup.
+        Adapters should override this with a bulk insert.
+        """
+        for package in packages:
+            await self.save(package)
+
+    async def insert_missing(self, packages: List[Package]) -> List[str]:
+        """
+        Stores the packages whose id is not stored yet and leaves the
+        others untouched. Returns the ids that were already stored, i.e.
+        skipped. Adapters should override this with one atomic
+        insert-if-absent: this default checks then inserts, so a package
+        written in between would be overwritten.
+        """
+        existing = await self.get_many([package.id for package in packages])
+        missing = [package for package in packages if package.id not in existing]
+        if missing:
+            await self.preload_packages(missing)
+        return list(existing)
+
+    async def preload_if_empty(self, packages: List[Package]) -> bool:
+        """
+        Stores the packages only if the repository holds none, and returns
+        whether it did. Adapters shared by several processes must override
+        this to make the check and the load atomic.
+        """
+        if sum((await self.count_by_status()).values()):
+            return False
+        await self.preload_packages(packages)
+        return True
+
+    async def get_many(self, package_ids: Iterable[str]) -> Dict[str, Package]:
+        """
+        Gets several Packages at once, keyed by id.
+        Unknown ids are simply missing from the result.
+        Adapters should override this with a single round trip.
+        """
+        found: Dict[str, Package] = {}
+        for package_id in package_ids:
+            try:
+                found[package_id] = await self.get_by_id(package_id)
+            except PackageNotFoundError:
+                pass
+        return found
+
+    async def refresh(self, package_id: str) -> Optional[Package]:
+        """
+        Reads the package again from the storage, for decisions that no
+        conditional update will check (asking for the status it already
+        has, or for a transition that is not allowed). Returns None when
+        get_by_id() always reads the storage (the default); adapters that
+        may answer it from a cache drop the cached copy and return the
+        stored package. Throws PackageNotFoundError if it is gone.
+        """
+        return None
+
+    async def transition_many(
+        self,
+        transitions: Sequence[Tuple[str, PackageStatus, PackageStatus]],
+    ) -> List[Union[Package, Exception]]:
+        """
+        Applies several (package_id, expected_status, new_status) compare-and-set
+        transitions in order. Returns, per item, either the updated Package or the
+        exception that transition() would have raised (PackageNotFoundError,
+        StaleStatusError), like asyncio.gather(..., return_exceptions=True).
+        Adapters should override this with a single round trip.
+        """
+        results: List[Union[Package, Exception]] = []
+        for package_id, expected_status, new_status in transitions:
+            try:
+                results.append(await self.transition(package_id, expected_status, new_status))
+            except (PackageNotFoundError, StaleStatusError) as e:
+                results.append(e)
+        return results
+
     @abstractmethod
     async def list_all(self) -> List[Package]:
         """
         Returns all stored packages.
-        """
\ No newline at end of file
+        """
+        ...
+
+    async def list_by_status(self, status: PackageStatus) -> List[Package]:
+        """
+        Returns every package currently in the given status.
+        Adapters should override this with an indexed lookup.
+        """
+        return [package for package in await self.list_all() if package.status == status]
+
+    async def count_by_status(self) -> Dict[PackageStatus, int]:
+        """
+        Returns how many packages are in each status (every status is present,
+        with 0 when no package is in it).
+        Adapters should override this with an indexed lookup.
+        """
+        counts = {package_status: 0 for package_status in PackageStatus}
+        for package in await self.list_all():
+            counts[package.status] += 1
+        return counts
+
+    async def list_page(
+        self,
+        limit: int,
+        after: Optional[str] = None,
+        status: Optional[PackageStatus] = None,
+    ) -> List[Package]:
+        """
+        Returns up to limit packages (optionally only those in the given status)
+        that come after the package whose id is `after` in the adapter's stable
+        listing order. The id of the last returned package is the cursor for the
+        next page. Must throw a PackageNotFoundError if `after` is unknown.
+        Adapters should override this to avoid materializing the whole storage.
+        """
+        packages = await self.list_all()
+        start = 0
+        if after is not None:
+            ids = [package.id for package in packages]
+            if after not in ids:
+                raise PackageNotFoundError(f"Package with id {after} not found.")
+            start = ids.index(after) + 1
+        page: List[Package] = []
+        for package in packages[start:]:
+            if status is None or package.status == status:
+                page.append(package)
+                if len(page) == limit:
+                    break
+        return page
+
+    async def current_version(self) -> Optional[int]:
+        """
+        Version of the whole repository: grows on every mutation, so two
+        equal versions mean nothing changed in between. None when the
+        adapter does not track changes (the default): it may be written by
+        other processes it cannot see.
+        """
+        return None
+
+    async def changes_since(self, version: int, limit: int) -> Optional[Tuple[int, List[Package]]]:
+        """
+        The packages (current state) changed after `version`, at most limit,
+        in the order of their last change, with the version they bring the
+        caller up to. Returns None when `version` is too old (or unknown) for
+        the adapter's change log, meaning the caller must re-read everything.
+        Only adapters whose current_version() is not None implement it.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not track changes")
+
+    async def iter_all(
+        self,
+        status: Optional[PackageStatus] = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[List[Package]]:
+        """
+        Yields all packages (optionally only those in the given status) in chunks
+        of at most chunk_size, page by page, so callers never hold the whole
+        storage in memory. Each chunk is consistent on its own; packages changed
+        while iterating show up in whatever state they have when their chunk is read.
+        """
+        after: Optional[str] = None
+        while True:
+            page = await self.list_page(chunk_size, after=after, status=status)
+            if not page:
+                return
+            yield page
+            if len(page) < chunk_size:
+                return
+            after = page[-1].id
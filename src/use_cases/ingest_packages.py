@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterable, Dict, List, Optional, Tuple, Union
+
+from src.ports.repository import PackageRepository
+from src.domain.entities import Package
+from src.domain.exceptions import InvalidPackageRecordError
+from src.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+PACKAGES_INGESTED = Counter(
+    "packages_ingested_total",
+    "Manifest records handled by bulk ingestion, by result (inserted or rejected).",
+    ["result"],
+)
+_INSERTED = PACKAGES_INGESTED.labels("inserted")
+_REJECTED = PACKAGES_INGESTED.labels("rejected")
+
+
+@dataclass
+class IngestionReport:
+    """
+    Outcome of one bulk load. errors holds the first max_errors rejections.
+    """
+    received: int = 0
+    inserted: int = 0
+    rejected: int = 0
+    elapsed_seconds: float = 0.0
+    errors: List[InvalidPackageRecordError] = field(default_factory=list)
+
+    @property
+    def packages_per_second(self) -> float:
+        return self.inserted / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+class IngestPackagesUseCase:
+    """
+    Use case: Store the packages of a manifest.
+    Receives via dependency injection:
+    - A repository that implements PackageRepository.
+    """
+
+    def __init__(self, repository: PackageRepository, chunk_size: int = 5_000, max_errors: int = 100):
+        self._repository = repository
+        self._chunk_size = chunk_size
+        self._max_errors = max_errors
+
+    async def execute(
+        self,
+        records: AsyncIterable[Tuple[int, Union[Package, InvalidPackageRecordError]]],
+        *,
+        only_if_empty: bool = False,
+    ) -> Optional[IngestionReport]:
+        """
+        Consumes (line, Package or the error that rejected the line) records
+        as the parser yields them and stores the packages chunk_size at a
+        time with the repository's bulk insert, yielding to the event loop
+        between chunks so a load never blocks other requests for more than
+        one chunk.
+        Packages whose id is already stored (e.g. a manifest loaded twice)
+        are rejected rather than overwritten, so their status is kept.
+        With only_if_empty, the first chunk is stored with the repository's
+        preload_if_empty(), and nothing is loaded (None is returned) when
+        the repository already held packages: of several workers seeding
+        the same shared state, only the first one loads the manifest.
+
+        Never throws for per-record failures: they are counted in the report.
+        """
+        report = IngestionReport()
+        started = time.perf_counter()
+        # package id -> (line, package)
+        chunk: Dict[str, Tuple[int, Package]] = {}
+        claim = only_if_empty
+
+        async for line, record in records:
+            report.received += 1
+            if isinstance(record, InvalidPackageRecordError):
+                self._reject(report, record)
+                continue
+            if record.id in chunk:
+                self._reject(report, InvalidPackageRecordError(line, f"duplicate id {record.id}"))
+                continue
+            chunk[record.id] = (line, record)
+            if len(chunk) >= self._chunk_size:
+                if not await self._insert(report, chunk, claim):
+                    return None
+                chunk, claim = {}, False
+        if chunk and not await self._insert(report, chunk, claim):
+            return None
+
+        report.elapsed_seconds = time.perf_counter() - started
+        logger.info(
+            "UseCase: Ingested %d packages (%d rejected) in %.2fs, %.0f packages/s",
+            report.inserted,
+            report.rejected,
+            report.elapsed_seconds,
+            report.packages_per_second,
+        )
+        return report
+
+    async def _insert(self, report: IngestionReport, chunk: Dict[str, Tuple[int, Package]], claim: bool) -> bool:
+        """
+        Stores the chunk, or with `claim` only if the repository is empty;
+        returns False when that claim failed and nothing was stored.
+        """
+        packages = [package for _, package in chunk.values()]
+        if claim:
+            if not await self._repository.preload_if_empty(packages):
+                return False
+            existing = []
+        else:
+            # One insert-if-absent: a package stored meanwhile by someone
+            # else is reported as existing, never overwritten
+            existing = await self._repository.insert_missing(packages)
+        for package_id in existing:
+            line, _ = chunk[package_id]
+            self._reject(report, InvalidPackageRecordError(line, f"package {package_id} already exists"))
+        inserted = len(chunk) - len(existing)
+        report.inserted += inserted
+        _INSERTED.inc(inserted)
+        logger.debug("UseCase: Stored a chunk of %d packages", inserted)
+        # Let requests queued behind this chunk run before the next one
+        await asyncio.sleep(0)
+        return True
+
+    def _reject(self, report: IngestionReport, error: InvalidPackageRecordError) -> None:
+        report.rejected += 1
+        _REJECTED.inc()
+        if len(report.errors) < self._max_errors:
+            report.errors.append(error)
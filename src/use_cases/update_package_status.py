@@ -1,49 +1,299 @@
 import logging
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
+from src.ports.events import TransitionListener
 from src.ports.repository import PackageRepository
+from src.domain.entities import Package
 from src.domain.services import PackageDomainService
 from src.domain.enums import PackageStatus
-from src.domain.exceptions import PackageNotFoundError, InvalidStateTransitionError
+from src.domain.exceptions import PackageNotFoundError, InvalidStateTransitionError, StaleStatusError
+from src.metrics import Counter
 
 logger = logging.getLogger(__name__) 
 
+# How many times a transition is re-validated when another writer changed
+# the package between our read and the conditional update.
+MAX_TRANSITION_ATTEMPTS = 3
+
+class StatusUpdateOutcome(str, Enum):
+    UPDATED = "updated"
+    # The package was already in the requested status: nothing was written
+    UNCHANGED = "unchanged"
+    NOT_FOUND = "not_found"
+    INVALID_TRANSITION = "invalid_transition"
+    CONFLICT = "conflict"
+
+
+STATUS_UPDATES = Counter(
+    "package_status_updates_total",
+    "Status updates handled by the use case, by outcome.",
+    ["outcome"],
+)
+STATUS_UPDATE_RETRIES = Counter(
+    "package_status_update_retries_total",
+    "Transitions re-validated because another writer changed the package first.",
+)
+_OUTCOME_COUNTERS = {outcome: STATUS_UPDATES.labels(outcome.value) for outcome in StatusUpdateOutcome}
+
+
+@dataclass(frozen=True)
+class StatusUpdateResult:
+    """
+    Outcome of one status update.
+    package is set only when outcome is UPDATED or UNCHANGED; error holds
+    the message of the domain exception otherwise.
+    """
+    package_id: str
+    outcome: StatusUpdateOutcome
+    package: Optional[Package] = None
+    error: Optional[str] = None
+
+
 class UpdatePackageStatusUseCase:
     """
     Use case: Update the status of a package.
     Receives via dependency injection:
     - A repository that implements PackageRepository.
+    - Optionally, TransitionListeners told of every transition it stores.
     """
 
-    def __init__(self, repository: PackageRepository):
+    def __init__(self, repository: PackageRepository, listeners: Sequence[TransitionListener] = ()):
         self._repository = repository
+        self._listeners = tuple(listeners)
 
     async def execute(self, package_id: str, new_status: PackageStatus):
         """
         1. Gets the existing package from the repository.
-        2. Validates and applies the state change using the domain service.
-        3. Persists the updated package.
-        4. Returns the package with the new state.
+        2. If it is already in new_status (e.g. a retried request), returns
+           it as is: nothing is written.
+        3. Validates the state change using the domain service.
+        4. Applies it with a conditional (compare-and-set) transition,
+           re-reading and re-validating if a concurrent writer won the race.
+        5. Returns the package with the new state.
 
         Throws:
         - PackageNotFoundError if the repository cannot find the package.
         - InvalidStateTransitionError if the state change is invalid.
+        - StaleStatusError if the package kept changing under us.
         """
 
-        logger.info("UseCase: Updating package %s to status %s", package_id, new_status)
+        package, _ = await self._execute(package_id, new_status)
+        return package
 
+    async def execute_one(self, package_id: str, new_status: PackageStatus) -> StatusUpdateResult:
+        """
+        Same as execute(), but reports the outcome instead of throwing, and
+        tells an applied change (UPDATED) from a no-op (UNCHANGED).
+        """
         try:
-            package = await self._repository.get_by_id(package_id)
-        except PackageNotFoundError:
-            logger.error("UseCase: Package %s not found", package_id)
-            raise
-    
-        try:
-            PackageDomainService.change_status(package, new_status)
-            logger.info("UseCase: State changed for package %s (new status=%s)", package_id, new_status)
+            package, outcome = await self._execute(package_id, new_status)
+        except PackageNotFoundError as e:
+            return StatusUpdateResult(package_id, StatusUpdateOutcome.NOT_FOUND, error=str(e))
         except InvalidStateTransitionError as e:
-            logger.warning("UseCase: Invalid state transition for package %s: %s", package_id, e)
-            raise
+            return StatusUpdateResult(package_id, StatusUpdateOutcome.INVALID_TRANSITION, error=str(e))
+        except StaleStatusError as e:
+            return StatusUpdateResult(package_id, StatusUpdateOutcome.CONFLICT, error=str(e))
+        return StatusUpdateResult(package_id, outcome, package=package)
+
+    async def _execute(self, package_id: str, new_status: PackageStatus) -> Tuple[Package, StatusUpdateOutcome]:
+        logger.debug("UseCase: Updating package %s to status %s", package_id, new_status)
+
+        for attempt in range(1, MAX_TRANSITION_ATTEMPTS + 1):
+            try:
+                package = await self._repository.get_by_id(package_id)
+                if package.status == new_status or not PackageDomainService.can_transition(package.status, new_status):
+                    # No conditional update will check these answers: take
+                    # them on the stored package, not on a cached copy
+                    package = await self._repository.refresh(package_id) or package
+            except PackageNotFoundError:
+                logger.error("UseCase: Package %s not found", package_id)
+                _OUTCOME_COUNTERS[StatusUpdateOutcome.NOT_FOUND].inc()
+                raise
+
+            if package.status == new_status:
+                logger.debug("UseCase: Package %s already in status %s", package_id, new_status)
+                _OUTCOME_COUNTERS[StatusUpdateOutcome.UNCHANGED].inc()
+                return package, StatusUpdateOutcome.UNCHANGED
+
+            if not PackageDomainService.can_transition(package.status, new_status):
+                e = PackageDomainService.invalid_transition_error(package.status, new_status)
+                logger.warning("UseCase: Invalid state transition for package %s: %s", package_id, e)
+                _OUTCOME_COUNTERS[StatusUpdateOutcome.INVALID_TRANSITION].inc()
+                raise e
+
+            try:
+                updated = await self._repository.transition(package_id, package.status, new_status)
+            except StaleStatusError:
+                logger.info(
+                    "UseCase: Package %s changed concurrently (attempt %d/%d), retrying",
+                    package_id,
+                    attempt,
+                    MAX_TRANSITION_ATTEMPTS,
+                )
+                STATUS_UPDATE_RETRIES.inc()
+                continue
+
+            logger.debug("UseCase: State changed for package %s (new status=%s)", package_id, new_status)
+            _OUTCOME_COUNTERS[StatusUpdateOutcome.UPDATED].inc()
+            self._notify_listeners(updated, package.status)
+            return updated, StatusUpdateOutcome.UPDATED
+
+        _OUTCOME_COUNTERS[StatusUpdateOutcome.CONFLICT].inc()
+        raise StaleStatusError(
+            f"Package {package_id} changed concurrently {MAX_TRANSITION_ATTEMPTS} times, giving up."
+        )
+
+    async def execute_many(
+        self,
+        updates: Sequence[Tuple[str, PackageStatus]],
+    ) -> List[StatusUpdateResult]:
+        """
+        Batched version of execute() for (package_id, new_status) pairs.
+        1. Reads every package in a single repository call.
+        2. Validates each transition with the domain service, the whole batch
+           at once when every package appears only once. Several updates on
+           the same package are validated one by one against the status left
+           by the previous one, in request order.
+        3. Applies all valid transitions with one transition_many() call.
+        4. Items that lost a race are retried one by one through execute().
+        Items asking for the status the package already has (or will have
+        after an earlier item of the batch) are reported as UNCHANGED. Items
+        answered on the status an earlier item was to leave, when that item
+        failed, are run again through execute() on the current state.
+        UNCHANGED and INVALID_TRANSITION answers are checked against a
+        refresh() of the package, and re-run through execute() when the
+        storage had moved on (the batch read a cached copy).
+
+        Never throws for per-item failures: returns one StatusUpdateResult per
+        input item, in the same order.
+        """
+
+        logger.debug("UseCase: Updating %d packages in batch", len(updates))
+
+        package_ids = {package_id for package_id, _ in updates}
+        packages = await self._repository.get_many(package_ids)
+        projected: Dict[str, PackageStatus] = {
+            package_id: package.status for package_id, package in packages.items()
+        }
+
+        # When no package appears twice, every item is checked against the
+        # stored status, so the whole batch is validated in one vectorized call
+        allowed: Optional[bytes] = None
+        if len(package_ids) == len(updates):
+            # Unknown packages get a placeholder status; they are reported as not found
+            allowed = PackageDomainService.can_transition_many(
+                [projected.get(package_id, new_status) for package_id, new_status in updates],
+                [new_status for _, new_status in updates],
+            )
+
+        results: List[Optional[StatusUpdateResult]] = [None] * len(updates)
+        pending: List[int] = []
+        unchanged: List[int] = []
+        # Items answered without a conditional update, by package id
+        unverified: Dict[str, List[int]] = {}
+        # Last pending item of each package, and the pending item each
+        # unverified answer relied on
+        projected_by: Dict[str, int] = {}
+        decided_on: Dict[int, int] = {}
+        transitions: List[Tuple[str, PackageStatus, PackageStatus]] = []
+
+        for index, (package_id, new_status) in enumerate(updates):
+            current = projected.get(package_id)
+            if current is None:
+                results[index] = StatusUpdateResult(
+                    package_id, StatusUpdateOutcome.NOT_FOUND,
+                    error=f"Package with id {package_id} not found.",
+                )
+                continue
+            if current == new_status:
+                # Filled in once the batch is applied, with the latest version
+                unchanged.append(index)
+            elif not (allowed[index] if allowed is not None else PackageDomainService.can_transition(current, new_status)):
+                results[index] = StatusUpdateResult(
+                    package_id, StatusUpdateOutcome.INVALID_TRANSITION,
+                    error=str(PackageDomainService.invalid_transition_error(current, new_status)),
+                )
+            else:
+                projected[package_id] = new_status
+                projected_by[package_id] = index
+                pending.append(index)
+                transitions.append((package_id, current, new_status))
+                continue
+            unverified.setdefault(package_id, []).append(index)
+            if package_id in projected_by:
+                decided_on[index] = projected_by[package_id]
+
+        applied = await self._repository.transition_many(transitions)
+
+        # Items retried through execute() are already counted there
+        retried: Set[int] = set()
+        for index, outcome, (_, previous_status, _) in zip(pending, applied, transitions):
+            package_id, new_status = updates[index]
+            if isinstance(outcome, StaleStatusError):
+                retried.add(index)
+                results[index] = await self.execute_one(package_id, new_status)
+            elif isinstance(outcome, PackageNotFoundError):
+                results[index] = StatusUpdateResult(
+                    package_id, StatusUpdateOutcome.NOT_FOUND, error=str(outcome)
+                )
+            else:
+                results[index] = StatusUpdateResult(
+                    package_id, StatusUpdateOutcome.UPDATED, package=outcome
+                )
+                self._notify_listeners(outcome, previous_status)
+
+        # An earlier item did not leave the status these answers relied on:
+        # run them again on the current state
+        for index, earlier in decided_on.items():
+            result = results[earlier]
+            if result.outcome != StatusUpdateOutcome.UPDATED or result.package.status != updates[earlier][1]:
+                retried.add(index)
+                results[index] = await self.execute_one(*updates[index])
+
+        latest = dict(packages)
+        for result in results:
+            if result is not None and result.package is not None:
+                latest[result.package_id] = result.package
+
+        for package_id, indexes in unverified.items():
+            indexes = [index for index in indexes if index not in retried]
+            if not indexes:
+                continue
+            try:
+                fresh = await self._repository.refresh(package_id)
+            except PackageNotFoundError:
+                stale = True
+            else:
+                stale = fresh is not None and fresh.status != latest[package_id].status
+            if stale:
+                for index in indexes:
+                    retried.add(index)
+                    results[index] = await self.execute_one(*updates[index])
+
+        for index in unchanged:
+            if index in retried:
+                continue
+            package_id = updates[index][0]
+            results[index] = StatusUpdateResult(package_id, StatusUpdateOutcome.UNCHANGED, package=latest[package_id])
+
+        for index, result in enumerate(results):
+            if index not in retried:
+                _OUTCOME_COUNTERS[result.outcome].inc()
 
-        await self._repository.save(package)
+        logger.debug(
+            "UseCase: Batch finished, %d/%d packages updated",
+            sum(r.outcome == StatusUpdateOutcome.UPDATED for r in results),
+            len(updates),
+        )
+        return results
 
-        return package
\ No newline at end of file
+    def _notify_listeners(self, package: Package, previous_status: PackageStatus) -> None:
+        # The transition is stored already: a failing listener must not turn
+        # it into an error for the caller
+        for listener in self._listeners:
+            try:
+                listener.on_status_changed(package, previous_status)
+            except Exception:
+                logger.exception("UseCase: Transition listener %r failed for package %s", listener, package.id)
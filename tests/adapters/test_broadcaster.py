@@ -0,0 +1,100 @@
+import asyncio
+import json
+import pytest
+from src.adapters.events.broadcaster import (
+    SHUTTING_DOWN,
+    SLOW_SUBSCRIBER,
+    StatusBroadcaster,
+    SubscriptionClosedError,
+)
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+
+
+def transition(broadcaster, package_id, status, previous=PackageStatus.READY):
+    broadcaster.on_status_changed(Package("Calle 1", status=status, package_id=package_id), previous)
+
+
+@pytest.mark.asyncio
+async def test_subscriber_receives_the_transition():
+    broadcaster = StatusBroadcaster()
+    subscription = broadcaster.subscribe()
+
+    transition(broadcaster, "p1", PackageStatus.IN_TRANSIT)
+
+    assert json.loads(await subscription.get()) == {
+        "id": "p1",
+        "status": "IN_TRANSIT",
+        "previous_status": "READY",
+        "customer_address": "Calle 1",
+    }
+
+@pytest.mark.asyncio
+async def test_filters_by_package_and_status():
+    broadcaster = StatusBroadcaster()
+    by_package = broadcaster.subscribe(package_ids=["p1"])
+    by_status = broadcaster.subscribe(statuses=[PackageStatus.DELIVERED])
+    by_both = broadcaster.subscribe(package_ids=["p1", "p2"], statuses=[PackageStatus.DELIVERED])
+
+    transition(broadcaster, "p1", PackageStatus.IN_TRANSIT)
+    transition(broadcaster, "p2", PackageStatus.DELIVERED, PackageStatus.IN_TRANSIT)
+    transition(broadcaster, "p3", PackageStatus.IN_TRANSIT)
+
+    assert [json.loads(e)["id"] for e in [await by_package.get()]] == ["p1"]
+    assert len(by_package) == 0
+    assert json.loads(await by_status.get())["id"] == "p2"
+    assert len(by_status) == 0
+    assert json.loads(await by_both.get())["id"] == "p2"
+    assert len(by_both) == 0
+
+@pytest.mark.asyncio
+async def test_get_waits_for_the_next_event_or_the_timeout():
+    broadcaster = StatusBroadcaster()
+    subscription = broadcaster.subscribe()
+
+    assert await subscription.get(timeout=0.01) is None
+
+    waiting = asyncio.create_task(subscription.get())
+    await asyncio.sleep(0)
+    transition(broadcaster, "p1", PackageStatus.IN_TRANSIT)
+    assert json.loads(await waiting)["id"] == "p1"
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_dropped_without_affecting_others():
+    broadcaster = StatusBroadcaster(queue_size=2)
+    slow = broadcaster.subscribe()
+    fast = broadcaster.subscribe()
+
+    for i in range(3):
+        transition(broadcaster, f"p{i}", PackageStatus.IN_TRANSIT)
+        assert json.loads(await fast.get())["id"] == f"p{i}"
+
+    assert slow.close_reason == SLOW_SUBSCRIBER
+    with pytest.raises(SubscriptionClosedError):
+        await slow.get()
+    assert len(broadcaster) == 1
+
+@pytest.mark.asyncio
+async def test_close_wakes_up_waiting_subscribers():
+    broadcaster = StatusBroadcaster()
+    subscription = broadcaster.subscribe(statuses=[PackageStatus.LOST])
+    waiting = asyncio.create_task(subscription.get())
+    await asyncio.sleep(0)
+
+    broadcaster.close()
+
+    with pytest.raises(SubscriptionClosedError) as closed:
+        await waiting
+    assert closed.value.reason == SHUTTING_DOWN
+    assert len(broadcaster) == 0
+
+def test_unsubscribe_removes_the_subscription_from_every_index():
+    broadcaster = StatusBroadcaster()
+    subscription = broadcaster.subscribe(package_ids=["p1", "p2"])
+
+    broadcaster.unsubscribe(subscription)
+    broadcaster.unsubscribe(subscription)
+
+    assert len(broadcaster) == 0
+    assert broadcaster._by_package == {}
+    assert subscription.closed
@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+from src.adapters.repository.caching_repository import CachingPackageRepository
+from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
+from src.adapters.repository.sql_repository import SQLPackageRepository
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.domain.exceptions import PackageNotFoundError, StaleStatusError
+from src.use_cases.update_package_status import StatusUpdateOutcome, UpdatePackageStatusUseCase
+
+
+class CountingRepository(InMemoryPackageRepository):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+        self.delay = 0.0
+
+    async def get_by_id(self, package_id):
+        self.reads += 1
+        package = await super().get_by_id(package_id)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return package
+
+    async def get_many(self, package_ids):
+        package_ids = list(package_ids)
+        self.reads += len(package_ids)
+        return await super().get_many(package_ids)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_repeated_reads_hit_the_cache():
+    inner = CountingRepository()
+    repo = CachingPackageRepository(inner)
+    pkg = Package(customer_address="A")
+    await inner.save(pkg)
+
+    assert (await repo.get_by_id(pkg.id)).id == pkg.id
+    assert (await repo.get_by_id(pkg.id)).id == pkg.id
+    assert list(await repo.get_many([pkg.id])) == [pkg.id]
+    assert inner.reads == 1
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_ttl_and_lru_is_bounded():
+    clock = FakeClock()
+    inner = CountingRepository()
+    repo = CachingPackageRepository(inner, max_entries=2, ttl=10, clock=clock)
+    a, b, c = Package("A"), Package("B"), Package("C")
+    await inner.preload_packages([a, b, c])
+
+    await repo.get_many([a.id, b.id])
+    await repo.get_by_id(a.id)          # b is now the least recently used
+    await repo.get_by_id(c.id)
+    assert inner.reads == 3
+    await repo.get_by_id(a.id)
+    assert inner.reads == 3
+    await repo.get_by_id(b.id)
+    assert inner.reads == 4
+
+    clock.now = 11
+    await repo.get_by_id(b.id)
+    assert inner.reads == 5
+
+@pytest.mark.asyncio
+async def test_writes_go_through_and_are_cached():
+    inner = CountingRepository()
+    repo = CachingPackageRepository(inner)
+    pkg = Package(customer_address="A")
+
+    await repo.save(pkg)
+    await repo.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+
+    assert (await inner.get_by_id(pkg.id)).status == PackageStatus.IN_TRANSIT
+    reads = inner.reads
+    assert (await repo.get_by_id(pkg.id)).status == PackageStatus.IN_TRANSIT
+    assert inner.reads == reads
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_dropped_when_a_transition_fails():
+    inner = CountingRepository()
+    repo = CachingPackageRepository(inner)
+    pkg = Package(customer_address="A")
+    await repo.save(pkg)
+    # Another process moves the package behind the cache's back
+    await inner.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+
+    with pytest.raises(StaleStatusError):
+        await repo.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    assert len(repo) == 0
+
+    # The use case validates against the cached IN_TRANSIT, loses the race,
+    # then retries against the storage and succeeds
+    await repo.get_by_id(pkg.id)
+    await inner.transition(pkg.id, PackageStatus.IN_TRANSIT, PackageStatus.FAILED_ATTEMPT)
+    updated = await UpdatePackageStatusUseCase(repo).execute(pkg.id, PackageStatus.LOST)
+    assert updated.status == PackageStatus.LOST
+    assert (await inner.get_by_id(pkg.id)).status == PackageStatus.LOST
+
+    results = await repo.transition_many([("fake-id", PackageStatus.READY, PackageStatus.IN_TRANSIT)])
+    assert isinstance(results[0], PackageNotFoundError)
+
+@pytest.mark.asyncio
+async def test_read_overtaken_by_a_write_is_not_cached():
+    inner = CountingRepository()
+    repo = CachingPackageRepository(inner)
+    pkg = Package(customer_address="A")
+    await inner.save(pkg)
+    inner.delay = 0.01
+
+    read = asyncio.create_task(repo.get_by_id(pkg.id))
+    await asyncio.sleep(0)
+    await repo.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    assert (await read).status == PackageStatus.READY
+
+    assert (await repo.get_by_id(pkg.id)).status == PackageStatus.IN_TRANSIT
+
+@pytest.mark.asyncio
+async def test_status_updates_are_decided_on_the_stored_package(tmp_path):
+    # Two workers, each with its own cache, over one SQL database
+    database = str(tmp_path / "shared.db")
+    workers = [CachingPackageRepository(SQLPackageRepository(database, pool_size=1)) for _ in range(2)]
+    for worker in workers:
+        await worker.open()
+    try:
+        mine, other = workers
+        p, q, r, s = (Package(customer_address=a) for a in "PQRS")
+        await mine.preload_packages([p, q, r, s])
+        # Both cache READY, then the other worker moves every package on
+        await mine.get_many([p.id, q.id, r.id, s.id])
+        for package in (p, q, r, s):
+            await UpdatePackageStatusUseCase(other).execute(package.id, PackageStatus.IN_TRANSIT)
+        use_case = UpdatePackageStatusUseCase(mine)
+
+        # Refused against the cached READY, allowed from the stored IN_TRANSIT
+        updated = await use_case.execute_one(p.id, PackageStatus.DELIVERED)
+        assert updated.outcome == StatusUpdateOutcome.UPDATED
+        assert updated.package.status == PackageStatus.DELIVERED
+        # A no-op against the cached READY, not allowed from IN_TRANSIT
+        refused = await use_case.execute_one(q.id, PackageStatus.READY)
+        assert refused.outcome == StatusUpdateOutcome.INVALID_TRANSITION
+
+        results = await use_case.execute_many([(r.id, PackageStatus.DELIVERED), (s.id, PackageStatus.READY)])
+        assert [result.outcome for result in results] == [
+            StatusUpdateOutcome.UPDATED, StatusUpdateOutcome.INVALID_TRANSITION,
+        ]
+        assert (await other.inner.get_by_id(r.id)).status == PackageStatus.DELIVERED
+    finally:
+        for worker in workers:
+            await worker.close()
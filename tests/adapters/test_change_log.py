@@ -0,0 +1,39 @@
+from src.adapters.repository.change_log import ChangeLog
+
+
+def test_versions_start_from_the_clock_and_grow_per_change():
+    log = ChangeLog(clock=lambda: 1.5)
+    assert log.version == 1_500_000
+    assert log.record("a") == 1_500_001
+    assert log.record("b") == 1_500_002
+
+def test_since_returns_each_package_once_in_order_of_last_change():
+    log = ChangeLog(clock=lambda: 0)
+    for package_id in ("a", "b", "a", "c"):
+        log.record(package_id)
+
+    assert log.since(0, limit=10) == (4, ["b", "a", "c"])
+    assert log.since(2, limit=10) == (4, ["a", "c"])
+    assert log.since(4, limit=10) == (4, [])
+
+def test_limit_reports_the_version_reached():
+    log = ChangeLog(clock=lambda: 0)
+    for package_id in ("a", "b", "c"):
+        log.record(package_id)
+
+    assert log.since(0, limit=2) == (2, ["a", "b"])
+    assert log.since(2, limit=2) == (3, ["c"])
+
+def test_versions_outside_the_log_are_unknown():
+    log = ChangeLog(max_entries=2, clock=lambda: 0)
+    for package_id in ("a", "b", "c"):
+        log.record(package_id)
+
+    assert log.since(0, limit=10) is None  # change 1 was dropped
+    assert log.since(1, limit=10) == (3, ["b", "c"])
+    assert log.since(4, limit=10) is None  # from the future (e.g. another process)
+
+    log.reset()
+    assert log.version == 4
+    assert log.since(3, limit=10) is None
+    assert log.since(4, limit=10) == (4, [])
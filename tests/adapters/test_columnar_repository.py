@@ -0,0 +1,107 @@
+import pytest
+from src.adapters.repository.columnar_repository import ColumnarPackageRepository
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.domain.exceptions import PackageNotFoundError, StaleStatusError
+
+@pytest.mark.asyncio
+async def test_save_and_get_by_id():
+    repo = ColumnarPackageRepository()
+    pkg = Package(customer_address="Calle Test")
+    await repo.save(pkg)
+    fetched = await repo.get_by_id(pkg.id)
+    assert fetched.id == pkg.id
+    assert fetched.customer_address == "Calle Test"
+    assert fetched.status == PackageStatus.READY
+
+@pytest.mark.asyncio
+async def test_get_by_id_not_found():
+    repo = ColumnarPackageRepository()
+    with pytest.raises(PackageNotFoundError):
+        await repo.get_by_id("non-existent-id")
+    with pytest.raises(PackageNotFoundError):
+        await repo.get_by_id(Package(customer_address="unsaved").id)
+
+@pytest.mark.asyncio
+async def test_save_rejects_non_uuid_ids():
+    repo = ColumnarPackageRepository()
+    with pytest.raises(ValueError):
+        await repo.save(Package(customer_address="A", package_id="not-a-uuid"))
+
+@pytest.mark.asyncio
+async def test_transition_and_status_counts():
+    repo = ColumnarPackageRepository()
+    pkg1 = Package(customer_address="A")
+    pkg2 = Package(customer_address="A")
+    await repo.preload_packages([pkg1, pkg2])
+
+    updated = await repo.transition(pkg1.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    assert updated.status == PackageStatus.IN_TRANSIT
+    with pytest.raises(StaleStatusError):
+        await repo.transition(pkg1.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+
+    assert await repo.count_by_status() == {
+        PackageStatus.READY: 1,
+        PackageStatus.IN_TRANSIT: 1,
+        PackageStatus.DELIVERED: 0,
+        PackageStatus.RETURNED: 0,
+        PackageStatus.FAILED_ATTEMPT: 0,
+        PackageStatus.LOST: 0,
+    }
+    assert [p.id for p in await repo.list_by_status(PackageStatus.READY)] == [pkg2.id]
+
+@pytest.mark.asyncio
+async def test_addresses_are_interned():
+    repo = ColumnarPackageRepository()
+    await repo.preload_packages([Package(customer_address="Same") for _ in range(3)])
+    assert len(repo._addresses) == 1
+    assert [p.customer_address for p in await repo.list_all()] == ["Same"] * 3
+
+@pytest.mark.asyncio
+async def test_list_page_with_cursor_and_status_filter():
+    repo = ColumnarPackageRepository()
+    pkgs = [Package(customer_address=str(i)) for i in range(5)]
+    await repo.preload_packages(pkgs)
+    await repo.transition(pkgs[3].id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+
+    first = await repo.list_page(2)
+    second = await repo.list_page(2, after=first[-1].id)
+    assert [p.id for p in first + second] == [p.id for p in pkgs[:4]]
+
+    in_transit = await repo.list_page(10, after=pkgs[0].id, status=PackageStatus.IN_TRANSIT)
+    assert [p.id for p in in_transit] == [pkgs[3].id]
+
+@pytest.mark.asyncio
+async def test_changes_since_a_version():
+    repo = ColumnarPackageRepository()
+    pkg = Package(customer_address="A")
+    await repo.save(pkg)
+    version = await repo.current_version()
+
+    await repo.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    reached, changed = await repo.changes_since(version, limit=10)
+    assert reached == version + 1
+    assert [(p.id, p.status) for p in changed] == [(pkg.id, PackageStatus.IN_TRANSIT)]
+
+    await repo.clear()
+    assert await repo.current_version() > reached
+    assert await repo.changes_since(reached, limit=10) is None
+
+@pytest.mark.asyncio
+async def test_clear_empties_the_columns_and_keeps_the_change_log_size():
+    repo = ColumnarPackageRepository(change_log_size=2)
+    await repo.preload_packages([Package(customer_address=str(i)) for i in range(3)])
+
+    await repo.clear()
+    assert await repo.list_all() == []
+    assert sum((await repo.count_by_status()).values()) == 0
+    assert repo._addresses == []
+
+    pkgs = [Package(customer_address=str(i)) for i in range(3)]
+    version = await repo.current_version()
+    for pkg in pkgs:
+        await repo.save(pkg)
+    # Only the last 2 changes are kept, as configured
+    assert await repo.changes_since(version, limit=10) is None
+    reached, changed = await repo.changes_since(version + 1, limit=10)
+    assert [p.id for p in changed] == [p.id for p in pkgs[1:]]
@@ -0,0 +1,91 @@
+import pytest
+from src.adapters.history.in_memory_history import InMemoryTransitionHistory
+from src.domain.entities import Package, StatusTransition
+from src.domain.enums import PackageStatus
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def move(history, package, status):
+    previous = package.status
+    package.status = status
+    history.on_status_changed(package, previous)
+
+@pytest.mark.asyncio
+async def test_records_transitions_per_package_in_order():
+    clock = FakeClock(1_000.5)
+    history = InMemoryTransitionHistory(clock=clock)
+    pkg, other = Package("A"), Package("B")
+
+    move(history, pkg, PackageStatus.IN_TRANSIT)
+    clock.now = 2_000.25
+    move(history, other, PackageStatus.IN_TRANSIT)
+    move(history, pkg, PackageStatus.FAILED_ATTEMPT)
+
+    assert await history.get_package_history(pkg.id) == [
+        StatusTransition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT, 1_000.5),
+        StatusTransition(pkg.id, PackageStatus.IN_TRANSIT, PackageStatus.FAILED_ATTEMPT, 2_000.25),
+    ]
+    assert [t.at for t in await history.get_package_history(pkg.id, start=1_500)] == [2_000.25]
+    assert [t.at for t in await history.get_package_history(pkg.id, end=2_000.25)] == [1_000.5]
+    assert await history.get_package_history("unknown") == []
+    assert len(history) == 3
+
+@pytest.mark.asyncio
+async def test_counts_by_hour_only_cover_the_window():
+    clock = FakeClock(10 * 3600 + 5)
+    history = InMemoryTransitionHistory(clock=clock)
+    packages = [Package(str(i)) for i in range(3)]
+
+    for package in packages:
+        move(history, package, PackageStatus.IN_TRANSIT)
+    clock.now = 12 * 3600 + 59
+    move(history, packages[0], PackageStatus.DELIVERED)
+    move(history, packages[1], PackageStatus.LOST)
+
+    assert await history.count_by_hour(10 * 3600, 13 * 3600) == {
+        10 * 3600: {PackageStatus.IN_TRANSIT: 3},
+        12 * 3600: {PackageStatus.DELIVERED: 1, PackageStatus.LOST: 1},
+    }
+    # Hours overlapping the window count whole
+    assert await history.count_by_hour(10 * 3600 + 1800, 11 * 3600) == {10 * 3600: {PackageStatus.IN_TRANSIT: 3}}
+    assert await history.count_by_hour(11 * 3600, 12 * 3600) == {}
+
+@pytest.mark.asyncio
+async def test_transitions_older_than_the_retention_are_dropped():
+    clock = FakeClock(0.0)
+    history = InMemoryTransitionHistory(retention=2 * 3600, clock=clock)
+    idle, busy = Package("A"), Package("B")
+
+    move(history, idle, PackageStatus.IN_TRANSIT)
+    move(history, busy, PackageStatus.IN_TRANSIT)
+    clock.now = 3600.0
+    move(history, busy, PackageStatus.FAILED_ATTEMPT)
+    assert len(history) == 3
+
+    clock.now = 7200.5
+    # Past the retention but not cut off yet: not reported either
+    assert [t.at for t in await history.get_package_history(busy.id)] == [3600.0]
+    move(history, busy, PackageStatus.IN_TRANSIT)
+    # The idle package is gone, the busy one lost its first transition
+    assert await history.get_package_history(idle.id) == []
+    assert [t.at for t in await history.get_package_history(busy.id)] == [3600.0, 7200.5]
+    assert len(history) == 2
+    # Hourly counters go once their whole hour is past the retention
+    assert list(await history.count_by_hour(0, 4 * 3600)) == [0, 3600, 7200]
+    clock.now = 3 * 3600.0
+    move(history, busy, PackageStatus.DELIVERED)
+    assert list(await history.count_by_hour(0, 4 * 3600)) == [3600, 7200, 10800]
+
+def test_recorded_since_is_the_start_of_the_process_or_the_retention():
+    clock = FakeClock(10_000.0)
+    history = InMemoryTransitionHistory(retention=3600, clock=clock)
+    assert history.recorded_since() == 10_000.0
+    clock.now = 20_000.0
+    assert history.recorded_since() == 20_000.0 - 3600
@@ -1,7 +1,8 @@
 import pytest
 from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
 from src.domain.entities import Package
-from src.domain.exceptions import PackageNotFoundError
+from src.domain.enums import PackageStatus
+from src.domain.exceptions import PackageNotFoundError, StaleStatusError
 
 @pytest.mark.asyncio
 async def test_save_and_get_by_id():
@@ -25,4 +26,132 @@ async def test_list_all_and_preload():
     pkg2 = Package(customer_address="B")
     await repo.preload_packages([pkg1, pkg2])
     all_pkgs = await repo.list_all()
-    assert {p.id for p in all_pkgs} == {pkg1.id, pkg2.id}
\ No newline at end of file
+    assert {p.id for p in all_pkgs} == {pkg1.id, pkg2.id}
+
+@pytest.mark.asyncio
+async def test_list_all_returns_snapshot():
+    repo = InMemoryPackageRepository()
+    pkg1 = Package(customer_address="A")
+    await repo.save(pkg1)
+    snapshot = await repo.list_all()
+    await repo.save(Package(customer_address="B"))
+    assert [p.id for p in snapshot] == [pkg1.id]
+
+
+@pytest.mark.asyncio
+async def test_transition_replaces_package_with_updated_copy():
+    repo = InMemoryPackageRepository()
+    pkg = Package(customer_address="A")
+    await repo.save(pkg)
+    updated = await repo.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    assert updated.status == PackageStatus.IN_TRANSIT
+    assert updated.id == pkg.id
+    # The instance handed out before the transition is left untouched
+    assert pkg.status == PackageStatus.READY
+    assert (await repo.get_by_id(pkg.id)) is updated
+
+@pytest.mark.asyncio
+async def test_transition_with_stale_expected_status():
+    repo = InMemoryPackageRepository()
+    pkg = Package(customer_address="A", status=PackageStatus.IN_TRANSIT)
+    await repo.save(pkg)
+    with pytest.raises(StaleStatusError):
+        await repo.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+
+@pytest.mark.asyncio
+async def test_transition_not_found():
+    repo = InMemoryPackageRepository()
+    with pytest.raises(PackageNotFoundError):
+        await repo.transition("non-existent-id", PackageStatus.READY, PackageStatus.IN_TRANSIT)
+
+@pytest.mark.asyncio
+async def test_get_many_and_transition_many():
+    repo = InMemoryPackageRepository()
+    pkg1 = Package(customer_address="A")
+    pkg2 = Package(customer_address="B", status=PackageStatus.IN_TRANSIT)
+    await repo.preload_packages([pkg1, pkg2])
+
+    found = await repo.get_many([pkg1.id, "missing", pkg2.id])
+    assert set(found) == {pkg1.id, pkg2.id}
+
+    results = await repo.transition_many([
+        (pkg1.id, PackageStatus.READY, PackageStatus.IN_TRANSIT),
+        ("missing", PackageStatus.READY, PackageStatus.IN_TRANSIT),
+        (pkg2.id, PackageStatus.READY, PackageStatus.IN_TRANSIT),
+    ])
+    assert results[0].status == PackageStatus.IN_TRANSIT
+    assert isinstance(results[1], PackageNotFoundError)
+    assert isinstance(results[2], StaleStatusError)
+
+@pytest.mark.asyncio
+async def test_list_page_with_cursor_and_status_filter():
+    repo = InMemoryPackageRepository()
+    pkgs = [Package(customer_address=str(i)) for i in range(5)]
+    await repo.preload_packages(pkgs)
+    await repo.transition(pkgs[3].id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+
+    first = await repo.list_page(2)
+    second = await repo.list_page(2, after=first[-1].id)
+    assert [p.id for p in first + second] == [p.id for p in pkgs[:4]]
+
+    in_transit = await repo.list_page(10, status=PackageStatus.IN_TRANSIT)
+    assert [p.id for p in in_transit] == [pkgs[3].id]
+    assert await repo.list_page(10, after=pkgs[3].id, status=PackageStatus.IN_TRANSIT) == []
+
+    with pytest.raises(PackageNotFoundError):
+        await repo.list_page(2, after="unknown-cursor")
+
+@pytest.mark.asyncio
+async def test_iter_all_yields_chunks():
+    repo = InMemoryPackageRepository()
+    pkgs = [Package(customer_address=str(i)) for i in range(5)]
+    await repo.preload_packages(pkgs)
+    chunks = [chunk async for chunk in repo.iter_all(chunk_size=2)]
+    assert [len(c) for c in chunks] == [2, 2, 1]
+
+@pytest.mark.asyncio
+async def test_status_index_follows_transitions():
+    repo = InMemoryPackageRepository()
+    pkg1 = Package(customer_address="A")
+    pkg2 = Package(customer_address="B")
+    await repo.preload_packages([pkg1, pkg2])
+    await repo.transition(pkg1.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    await repo.transition_many([(pkg2.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)])
+    await repo.transition(pkg1.id, PackageStatus.IN_TRANSIT, PackageStatus.DELIVERED)
+
+    assert await repo.count_by_status() == {
+        PackageStatus.READY: 0,
+        PackageStatus.IN_TRANSIT: 1,
+        PackageStatus.DELIVERED: 1,
+        PackageStatus.RETURNED: 0,
+        PackageStatus.FAILED_ATTEMPT: 0,
+        PackageStatus.LOST: 0,
+    }
+    assert [p.id for p in await repo.list_by_status(PackageStatus.IN_TRANSIT)] == [pkg2.id]
+
+@pytest.mark.asyncio
+async def test_status_index_after_in_place_save():
+    repo = InMemoryPackageRepository()
+    pkg = Package(customer_address="A")
+    await repo.save(pkg)
+    pkg.status = PackageStatus.IN_TRANSIT
+    await repo.save(pkg)
+    counts = await repo.count_by_status()
+    assert counts[PackageStatus.READY] == 0 and counts[PackageStatus.IN_TRANSIT] == 1
+
+@pytest.mark.asyncio
+async def test_changes_since_a_version():
+    repo = InMemoryPackageRepository()
+    pkg1 = Package(customer_address="A")
+    pkg2 = Package(customer_address="B")
+    await repo.preload_packages([pkg1, pkg2])
+    version = await repo.current_version()
+
+    await repo.transition(pkg1.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    assert await repo.current_version() == version + 1
+    reached, changed = await repo.changes_since(version, limit=10)
+    assert reached == version + 1
+    assert [(p.id, p.status) for p in changed] == [(pkg1.id, PackageStatus.IN_TRANSIT)]
+
+    await repo.clear()
+    assert await repo.changes_since(version, limit=10) is None
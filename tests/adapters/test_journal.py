@@ -0,0 +1,132 @@
+import asyncio
+import os
+import pytest
+from src.adapters.repository import in_memory_repository
+from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
+from src.adapters.repository.journal import PackageJournal
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+
+
+async def _reopen(directory) -> InMemoryPackageRepository:
+    repo = InMemoryPackageRepository(journal=PackageJournal(str(directory)))
+    await repo.open()
+    return repo
+
+@pytest.mark.asyncio
+async def test_state_survives_restart_without_snapshot(tmp_path):
+    repo = await _reopen(tmp_path)
+    pkg1 = Package(customer_address="Calle\tcon tabulador\ny salto")
+    pkg2 = Package(customer_address="B")
+    await repo.preload_packages([pkg1, pkg2])
+    await repo.transition(pkg1.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    await repo.transition_many([(pkg1.id, PackageStatus.IN_TRANSIT, PackageStatus.DELIVERED)])
+    # Crash: no close(), hence no final snapshot
+    repo._journal._writer.cancel()
+
+    recovered = await _reopen(tmp_path)
+    fetched = await recovered.get_by_id(pkg1.id)
+    assert fetched.status == PackageStatus.DELIVERED
+    assert fetched.customer_address == pkg1.customer_address
+    assert (await recovered.get_by_id(pkg2.id)).status == PackageStatus.READY
+    assert not any(name.startswith("snapshot-") for name in os.listdir(tmp_path))
+    await recovered.close()
+
+@pytest.mark.asyncio
+async def test_close_snapshots_and_compacts_the_log(tmp_path):
+    repo = await _reopen(tmp_path)
+    pkg = Package(customer_address="A")
+    await repo.save(pkg)
+    await repo.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    await repo.close()
+
+    snapshots = [n for n in os.listdir(tmp_path) if n.startswith("snapshot-")]
+    segments = [n for n in os.listdir(tmp_path) if n.startswith("journal-")]
+    assert len(snapshots) == 1 and len(segments) == 1
+
+    recovered = await _reopen(tmp_path)
+    assert (await recovered.get_by_id(pkg.id)).status == PackageStatus.IN_TRANSIT
+    await recovered.close()
+
+@pytest.mark.asyncio
+async def test_writes_during_snapshot_go_to_the_log_tail(tmp_path):
+    repo = InMemoryPackageRepository(journal=PackageJournal(str(tmp_path)), snapshot_every=2)
+    await repo.open()
+    pkgs = [Package(customer_address=str(i)) for i in range(3)]
+    await repo.preload_packages(pkgs)
+    # The preload crossed snapshot_every: a snapshot runs in the background
+    await repo.transition(pkgs[0].id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    await repo._snapshot_task
+    repo._journal._writer.cancel()
+
+    recovered = await _reopen(tmp_path)
+    assert {p.id for p in await recovered.list_all()} == {p.id for p in pkgs}
+    assert (await recovered.get_by_id(pkgs[0].id)).status == PackageStatus.IN_TRANSIT
+    await recovered.close()
+
+@pytest.mark.asyncio
+async def test_torn_last_record_is_ignored(tmp_path):
+    repo = await _reopen(tmp_path)
+    pkg = Package(customer_address="A")
+    await repo.save(pkg)
+    repo._journal._writer.cancel()
+    segment = sorted(n for n in os.listdir(tmp_path) if n.startswith("journal-"))[-1]
+    with open(tmp_path / segment, "ab") as f:
+        f.write(f"T\t{pkg.id}\t1".encode())
+
+    recovered = await _reopen(tmp_path)
+    assert (await recovered.get_by_id(pkg.id)).status == PackageStatus.READY
+    await recovered.close()
+
+@pytest.mark.asyncio
+async def test_clear_is_journaled(tmp_path):
+    repo = await _reopen(tmp_path)
+    old = Package(customer_address="A")
+    await repo.save(old)
+    await repo.clear()
+    new = Package(customer_address="B")
+    await repo.save(new)
+    repo._journal._writer.cancel()
+
+    recovered = await _reopen(tmp_path)
+    assert [p.id for p in await recovered.list_all()] == [new.id]
+    await recovered.close()
+
+@pytest.mark.asyncio
+async def test_replay_skips_transitions_of_unknown_packages(tmp_path, caplog):
+    repo = await _reopen(tmp_path)
+    pkg = Package(customer_address="A")
+    await repo.save(pkg)
+    await repo.close()
+    with open(tmp_path / "journal-0000000099.log", "w") as f:
+        f.write(f"T\tunknown-id\t1\nT\t{pkg.id}\t1\n")
+
+    recovered = await _reopen(tmp_path)
+    assert (await recovered.get_by_id(pkg.id)).status == PackageStatus.IN_TRANSIT
+    assert "skipped 1 journal transitions" in caplog.text
+    await recovered.close()
+
+@pytest.mark.asyncio
+async def test_replay_yields_to_the_event_loop_between_chunks(tmp_path, monkeypatch):
+    repo = await _reopen(tmp_path)
+    await repo.preload_packages([Package(customer_address=str(i)) for i in range(10)])
+    await repo._journal.close()
+    monkeypatch.setattr(in_memory_repository, "_REPLAY_CHUNK", 2)
+
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    ticker = asyncio.create_task(tick())
+    await asyncio.sleep(0)
+    before = ticks
+    recovered = await _reopen(tmp_path)
+    ticker.cancel()
+    assert len(await recovered.list_all()) == 10
+    # One yield per chunk of 2 of the 10 records
+    assert ticks - before >= 5
+    await recovered.close()
@@ -0,0 +1,71 @@
+import uuid
+import pytest
+from src.adapters.manifest import parse_csv, parse_ndjson
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.domain.exceptions import InvalidPackageRecordError
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def _parse(parser, data: bytes, size: int = 7):
+    return [record async for record in parser(_chunks(data, size))]
+
+@pytest.mark.asyncio
+async def test_ndjson_records_split_across_chunks():
+    package_id = str(uuid.uuid4())
+    data = (
+        '{"customer_address": "Calle 1"}\n'
+        '\n'
+        f'{{"id": "{package_id}", "customer_address": "Calle 2", "status": "IN_TRANSIT"}}\r\n'
+        '{"customer_address": "Calle 3"}'
+    ).encode()
+
+    records = await _parse(parse_ndjson, data)
+    assert [line for line, _ in records] == [1, 3, 4]
+    assert all(isinstance(package, Package) for _, package in records)
+    assert records[1][1].id == package_id
+    assert records[1][1].status == PackageStatus.IN_TRANSIT
+    assert records[2][1].customer_address == "Calle 3"
+
+@pytest.mark.asyncio
+async def test_ndjson_invalid_records_are_reported_with_their_line():
+    data = (
+        b'not json\n'
+        b'{"customer_address": "A"} {"customer_address": "B"}\n'
+        b'["Calle 1"]\n'
+        b'{"customer_address": ""}\n'
+        b'{"customer_address": "A", "id": "nope"}\n'
+        b'{"customer_address": "A", "status": "SHIPPED"}\n'
+        b'{"customer_address": "ok"}\n'
+    )
+
+    records = await _parse(parse_ndjson, data, size=1024)
+    errors = [record for _, record in records if isinstance(record, InvalidPackageRecordError)]
+    assert [error.line for error in errors] == [1, 2, 3, 4, 5, 6]
+    assert isinstance(records[-1][1], Package)
+
+@pytest.mark.asyncio
+async def test_csv_with_quoted_fields_and_optional_columns():
+    data = (
+        'customer_address,status\n'
+        '"Calle Mayor 1, 3A, Madrid",READY\n'
+        '"Calle ""Nueva"" 2",\n'
+        'Calle 3\n'
+    ).encode()
+
+    records = await _parse(parse_csv, data)
+    assert records[0] == (2, records[0][1])
+    assert records[0][1].customer_address == "Calle Mayor 1, 3A, Madrid"
+    assert records[1][1].customer_address == 'Calle "Nueva" 2'
+    assert records[1][1].status == PackageStatus.READY
+    assert isinstance(records[2][1], InvalidPackageRecordError) and records[2][0] == 4
+
+@pytest.mark.asyncio
+async def test_csv_without_address_column_is_rejected():
+    records = await _parse(parse_csv, b"id,status\nabc,READY\n")
+    assert len(records) == 1
+    assert isinstance(records[0][1], InvalidPackageRecordError)
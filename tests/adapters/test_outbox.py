@@ -0,0 +1,248 @@
+import asyncio
+import fcntl
+import os
+from typing import List
+
+import orjson
+import pytest
+
+from src.adapters.outbox.dispatcher import OutboxDispatcher
+from src.adapters.outbox.file_outbox import FileOutbox
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.ports.notification import NotificationPort, NotificationRejectedError
+from src.ports.outbox import OutboxEvent
+
+
+class RecordingNotifier(NotificationPort):
+    """
+    Records the delivered batches; the first `failures` deliveries raise,
+    and batches with a package whose address is in `refused` are rejected.
+    """
+
+    def __init__(self, failures: int = 0, refused=()):
+        self.failures = failures
+        self.refused = set(refused)
+        self.batches: List[List[OutboxEvent]] = []
+
+    async def deliver_status_changes(self, events):
+        self.batches.append(events)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("receiver down")
+        if any(e.customer_address in self.refused for e in events):
+            raise NotificationRejectedError("400 Bad Request")
+
+
+def _moved(outbox, package, status):
+    previous = package.status
+    package.status = status
+    outbox.on_status_changed(package, previous)
+
+async def _reopen(path, **kwargs) -> FileOutbox:
+    outbox = FileOutbox(str(path), commit_interval=0, **kwargs)
+    await outbox.open()
+    return outbox
+
+async def _crash(outbox):
+    # Wait for what is buffered to be written, then stop without close()
+    while outbox._buffer:
+        await asyncio.sleep(0.001)
+    await asyncio.sleep(0.01)
+    outbox._writer.cancel()
+    outbox._file.close()
+
+@pytest.mark.asyncio
+async def test_events_are_snapshots_handed_out_until_acknowledged():
+    outbox = FileOutbox(clock=lambda: 100.0)
+    await outbox.open()
+    pkg = Package(customer_address="A")
+    _moved(outbox, pkg, PackageStatus.IN_TRANSIT)
+    _moved(outbox, pkg, PackageStatus.DELIVERED)
+
+    batch = await outbox.next_batch(10)
+    assert [(e.sequence, e.status, e.previous_status) for e in batch] == [
+        (1, PackageStatus.IN_TRANSIT, PackageStatus.READY),
+        (2, PackageStatus.DELIVERED, PackageStatus.IN_TRANSIT),
+    ]
+    # Not acknowledged: handed out again
+    assert await outbox.next_batch(1) == batch[:1]
+    outbox.ack(1)
+    assert await outbox.next_batch(10) == batch[1:]
+    assert outbox.pending() == 1
+    outbox.ack(2)
+    assert outbox.pending() == 0 and outbox.lag() == 0
+    await outbox.close()
+
+@pytest.mark.asyncio
+async def test_undelivered_events_survive_a_crash(tmp_path):
+    path = tmp_path / "outbox.log"
+    outbox = await _reopen(path)
+    pkgs = [Package(customer_address=f"Calle\t{i}\n") for i in range(3)]
+    for pkg in pkgs:
+        _moved(outbox, pkg, PackageStatus.IN_TRANSIT)
+    outbox.ack(1)
+    await _crash(outbox)
+
+    recovered = await _reopen(path)
+    batch = await recovered.next_batch(10)
+    assert [(e.sequence, e.package_id, e.customer_address) for e in batch] == [
+        (2, pkgs[1].id, pkgs[1].customer_address),
+        (3, pkgs[2].id, pkgs[2].customer_address),
+    ]
+    # Numbering goes on after the recovered events
+    _moved(recovered, pkgs[0], PackageStatus.DELIVERED)
+    assert (await recovered.next_batch(10))[-1].sequence == 4
+    await recovered.close()
+
+@pytest.mark.asyncio
+async def test_torn_last_line_is_cut_off(tmp_path):
+    path = tmp_path / "outbox.log"
+    outbox = await _reopen(path)
+    _moved(outbox, Package(customer_address="A"), PackageStatus.IN_TRANSIT)
+    await _crash(outbox)
+    with open(path, "ab") as f:
+        f.write(b'["E",2,"torn')
+
+    recovered = await _reopen(path)
+    assert [e.sequence for e in await recovered.next_batch(10)] == [1]
+    _moved(recovered, Package(customer_address="B"), PackageStatus.IN_TRANSIT)
+    await recovered.close()
+
+    recovered = await _reopen(path)
+    assert [e.sequence for e in await recovered.next_batch(10)] == [1, 2]
+    await recovered.close()
+
+@pytest.mark.asyncio
+async def test_backlog_beyond_max_in_memory_is_read_back_from_disk(tmp_path):
+    outbox = await _reopen(tmp_path / "outbox.log", max_in_memory=2)
+    pkgs = [Package(customer_address=str(i)) for i in range(5)]
+    for pkg in pkgs:
+        _moved(outbox, pkg, PackageStatus.IN_TRANSIT)
+    assert len(outbox._events) == 2 and outbox.pending() == 5
+
+    delivered = []
+    while outbox.pending():
+        batch = await outbox.next_batch(10)
+        assert len(batch) <= 2
+        delivered += [e.package_id for e in batch]
+        outbox.ack(batch[-1].sequence)
+        if len(delivered) == 2:
+            # Recorded while the backlog is on disk
+            _moved(outbox, pkgs[0], PackageStatus.DELIVERED)
+    assert delivered == [p.id for p in pkgs] + [pkgs[0].id]
+
+    # Caught up: new events stay in memory again
+    _moved(outbox, pkgs[1], PackageStatus.DELIVERED)
+    assert len(outbox._events) == 1
+    await outbox.close()
+
+@pytest.mark.asyncio
+async def test_memory_only_outbox_drops_events_beyond_max_in_memory():
+    outbox = FileOutbox(max_in_memory=2)
+    await outbox.open()
+    for i in range(3):
+        _moved(outbox, Package(customer_address=str(i)), PackageStatus.IN_TRANSIT)
+    assert outbox.pending() == 2
+    assert [e.sequence for e in await outbox.next_batch(10)] == [1, 2]
+
+@pytest.mark.asyncio
+async def test_file_is_compacted_once_everything_is_delivered(tmp_path):
+    path = tmp_path / "outbox.log"
+    outbox = await _reopen(path, compact_bytes=0)
+    for i in range(3):
+        _moved(outbox, Package(customer_address=str(i)), PackageStatus.IN_TRANSIT)
+    outbox.ack(3)
+    await outbox.close()
+    assert path.read_bytes() == b'["A",3]\n'
+
+    recovered = await _reopen(path)
+    assert recovered.pending() == 0
+    _moved(recovered, Package(customer_address="D"), PackageStatus.IN_TRANSIT)
+    assert (await recovered.next_batch(1))[0].sequence == 4
+    await recovered.close()
+
+@pytest.mark.asyncio
+async def test_each_process_claims_its_own_file(tmp_path):
+    path = tmp_path / "outbox.log"
+    with open(path, "ab") as other_worker:
+        fcntl.flock(other_worker.fileno(), fcntl.LOCK_EX)
+        outbox = await _reopen(path)
+        assert outbox.file_path == f"{path}.1"
+        await outbox.close()
+    assert sorted(os.listdir(tmp_path)) == ["outbox.log", "outbox.log.1"]
+
+@pytest.mark.asyncio
+async def test_dispatcher_retries_a_failed_batch_before_anything_behind_it():
+    outbox = FileOutbox()
+    await outbox.open()
+    notifier = RecordingNotifier(failures=2)
+    dispatcher = OutboxDispatcher(outbox, notifier, batch_size=2, backoff_base=0.001)
+    pkg = Package(customer_address="A")
+    _moved(outbox, pkg, PackageStatus.IN_TRANSIT)
+    _moved(outbox, pkg, PackageStatus.DELIVERED)
+    other = Package(customer_address="B")
+    _moved(outbox, other, PackageStatus.IN_TRANSIT)
+
+    dispatcher.start()
+    await dispatcher.stop()
+
+    sent = [[(e.package_id, e.status) for e in batch] for batch in notifier.batches]
+    first = [(pkg.id, PackageStatus.IN_TRANSIT), (pkg.id, PackageStatus.DELIVERED)]
+    assert sent == [first, first, first, [(other.id, PackageStatus.IN_TRANSIT)]]
+    # Snapshots: the package changed since, its notifications did not
+    assert pkg.status == PackageStatus.DELIVERED
+    assert outbox.pending() == 0
+
+@pytest.mark.asyncio
+async def test_dispatcher_stop_leaves_undelivered_events_in_the_outbox(tmp_path):
+    path = tmp_path / "outbox.log"
+    outbox = await _reopen(path)
+    dispatcher = OutboxDispatcher(outbox, RecordingNotifier(failures=1_000), backoff_base=0.001, backoff_max=0.001)
+    _moved(outbox, Package(customer_address="A"), PackageStatus.IN_TRANSIT)
+    dispatcher.start()
+    await dispatcher.stop(drain_timeout=0.05)
+    await outbox.close()
+
+    recovered = await _reopen(path)
+    notifier = RecordingNotifier()
+    dispatcher = OutboxDispatcher(recovered, notifier)
+    dispatcher.start()
+    await dispatcher.stop()
+    await recovered.close()
+    assert [e.customer_address for batch in notifier.batches for e in batch] == ["A"]
+
+@pytest.mark.asyncio
+async def test_committed_waits_for_the_events_to_be_on_disk(tmp_path):
+    path = tmp_path / "outbox.log"
+    outbox = FileOutbox(str(path), commit_interval=0.05)
+    await outbox.open()
+    await outbox.committed()
+    _moved(outbox, Package(customer_address="A"), PackageStatus.IN_TRANSIT)
+    assert path.read_bytes() == b""
+    await outbox.committed()
+    assert [orjson.loads(line)[:2] for line in path.read_bytes().splitlines()] == [["E", 1]]
+    await outbox.close()
+
+@pytest.mark.asyncio
+async def test_dispatcher_dead_letters_refused_events_and_moves_on(tmp_path):
+    outbox = await _reopen(tmp_path / "outbox.log")
+    notifier = RecordingNotifier(refused={"C"})
+    dispatcher = OutboxDispatcher(outbox, notifier, batch_size=4, backoff_base=10)
+    for address in "ABCDE":
+        _moved(outbox, Package(customer_address=address), PackageStatus.IN_TRANSIT)
+
+    dispatcher.start()
+    await dispatcher.stop(drain_timeout=1)
+    await outbox.close()
+
+    # Halved until the refused event is isolated, without any backoff
+    sent = ["".join(e.customer_address for e in batch) for batch in notifier.batches]
+    assert sent == ["ABCD", "AB", "CD", "C", "D", "E"]
+    assert outbox.pending() == 0
+    dead = [orjson.loads(line) for line in (tmp_path / "outbox.log.dead").read_bytes().splitlines()]
+    assert [(d[0], d[1], d[5], d[7]) for d in dead] == [("D", 3, "C", "400 Bad Request")]
+    # Acknowledged: not handed out again after a restart
+    recovered = await _reopen(tmp_path / "outbox.log")
+    assert recovered.pending() == 0
+    await recovered.close()
@@ -0,0 +1,128 @@
+import asyncio
+import multiprocessing
+import pytest
+import pytest_asyncio
+from src.adapters.repository.shared_memory_repository import SharedMemoryPackageRepository
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.domain.exceptions import PackageNotFoundError, StaleStatusError
+
+@pytest_asyncio.fixture
+async def repo(tmp_path):
+    repository = SharedMemoryPackageRepository(str(tmp_path / "packages.shm"), capacity=1_000)
+    await repository.open()
+    yield repository
+    await repository.close()
+
+@pytest.mark.asyncio
+async def test_save_get_and_transition(repo):
+    pkg = Package(customer_address="Calle Ñandú 1")
+    await repo.save(pkg)
+    fetched = await repo.get_by_id(pkg.id)
+    assert (fetched.id, fetched.customer_address, fetched.status) == (pkg.id, "Calle Ñandú 1", PackageStatus.READY)
+
+    updated = await repo.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    assert updated.status == PackageStatus.IN_TRANSIT
+    with pytest.raises(StaleStatusError):
+        await repo.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    with pytest.raises(PackageNotFoundError):
+        await repo.get_by_id(Package(customer_address="unsaved").id)
+
+@pytest.mark.asyncio
+async def test_rejects_non_uuid_ids_and_long_addresses(repo):
+    with pytest.raises(ValueError):
+        await repo.save(Package(customer_address="A", package_id="not-a-uuid"))
+    with pytest.raises(ValueError):
+        await repo.save(Package(customer_address="x" * 200))
+
+@pytest.mark.asyncio
+async def test_listing_counting_and_pagination(repo):
+    packages = [Package(customer_address=f"Calle {i}") for i in range(5)]
+    await repo.preload_packages(packages)
+    await repo.transition(packages[1].id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    await repo.transition(packages[3].id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+
+    assert [p.id for p in await repo.list_all()] == [p.id for p in packages]
+    assert [p.id for p in await repo.list_page(2, after=packages[0].id)] == [packages[1].id, packages[2].id]
+    assert [p.id for p in await repo.list_page(5, status=PackageStatus.IN_TRANSIT)] == [packages[1].id, packages[3].id]
+    counts = await repo.count_by_status()
+    assert counts[PackageStatus.READY] == 3 and counts[PackageStatus.IN_TRANSIT] == 2
+
+@pytest.mark.asyncio
+async def test_state_is_shared_between_instances_on_the_same_file(repo, tmp_path):
+    other = SharedMemoryPackageRepository(str(tmp_path / "packages.shm"))
+    await other.open()
+    try:
+        pkg = Package(customer_address="Calle Compartida 2")
+        await repo.save(pkg)
+        assert (await other.get_by_id(pkg.id)).customer_address == "Calle Compartida 2"
+
+        await other.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+        assert (await repo.get_by_id(pkg.id)).status == PackageStatus.IN_TRANSIT
+
+        assert not await other.preload_if_empty([Package(customer_address="B")])
+        await other.clear()
+        assert await repo.list_all() == []
+        assert await repo.preload_if_empty([Package(customer_address="B")])
+        assert len(await other.list_all()) == 1
+    finally:
+        await other.close()
+
+
+@pytest.mark.asyncio
+async def test_transition_looks_the_row_up_again_after_a_clear_while_waiting(repo, tmp_path, monkeypatch):
+    other = SharedMemoryPackageRepository(str(tmp_path / "packages.shm"))
+    await other.open()
+    try:
+        pkg = Package(customer_address="Calle Borrada 1")
+        await repo.save(pkg)
+        newcomer = Package(customer_address="Calle Nueva 2")
+        acquire = repo._acquire
+
+        async def clear_first(offset):
+            monkeypatch.setattr(repo, "_acquire", acquire)
+            await other.clear()
+            await other.save(newcomer)
+            await acquire(offset)
+
+        monkeypatch.setattr(repo, "_acquire", clear_first)
+        with pytest.raises(PackageNotFoundError):
+            await repo.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+        assert (await other.get_by_id(newcomer.id)).status == PackageStatus.READY
+    finally:
+        await other.close()
+
+
+def _race_transition(path, package_id, results):
+    async def run():
+        repository = SharedMemoryPackageRepository(path)
+        await repository.open()
+        try:
+            await repository.transition(package_id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+            results.put("won")
+        except StaleStatusError:
+            results.put("stale")
+        finally:
+            await repository.close()
+    asyncio.run(run())
+
+def test_only_one_process_wins_a_concurrent_transition(tmp_path):
+    path = str(tmp_path / "packages.shm")
+    pkg = Package(customer_address="Calle Carrera 3")
+
+    async def setup():
+        repository = SharedMemoryPackageRepository(path, capacity=100)
+        await repository.open()
+        await repository.save(pkg)
+        await repository.close()
+    asyncio.run(setup())
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = [context.Process(target=_race_transition, args=(path, pkg.id, results)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=30)
+    outcomes = sorted(results.get(timeout=5) for _ in processes)
+    assert outcomes == ["stale", "stale", "stale", "won"]
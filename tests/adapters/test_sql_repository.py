@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from src.adapters.repository.sql_repository import SQLPackageRepository
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.domain.exceptions import PackageNotFoundError, StaleStatusError
+
+
+@pytest_asyncio.fixture
+async def repo(tmp_path):
+    repository = SQLPackageRepository(str(tmp_path / "packages.db"), pool_size=2)
+    await repository.open()
+    yield repository
+    await repository.close()
+
+@pytest.mark.asyncio
+async def test_save_and_get_by_id(repo):
+    pkg = Package(customer_address="Calle Test")
+    await repo.save(pkg)
+    fetched = await repo.get_by_id(pkg.id)
+    assert fetched.id == pkg.id
+    assert fetched.customer_address == "Calle Test"
+    assert fetched.status == PackageStatus.READY
+
+@pytest.mark.asyncio
+async def test_get_by_id_not_found(repo):
+    with pytest.raises(PackageNotFoundError):
+        await repo.get_by_id("non-existent-id")
+
+@pytest.mark.asyncio
+async def test_conditional_transition(repo):
+    pkg = Package(customer_address="A")
+    await repo.save(pkg)
+    updated = await repo.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    assert updated.status == PackageStatus.IN_TRANSIT
+    with pytest.raises(StaleStatusError):
+        await repo.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    with pytest.raises(PackageNotFoundError):
+        await repo.transition("missing", PackageStatus.READY, PackageStatus.IN_TRANSIT)
+
+@pytest.mark.asyncio
+async def test_concurrent_transitions_only_one_wins(repo):
+    pkg = Package(customer_address="A")
+    await repo.save(pkg)
+    results = await asyncio.gather(
+        *(repo.transition(pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT) for _ in range(4)),
+        return_exceptions=True,
+    )
+    assert sum(isinstance(r, Package) for r in results) == 1
+    assert sum(isinstance(r, StaleStatusError) for r in results) == 3
+
+@pytest.mark.asyncio
+async def test_bulk_preload_get_many_and_transition_many(repo):
+    pkgs = [Package(customer_address=str(i)) for i in range(1000)]
+    await repo.preload_packages(pkgs)
+
+    found = await repo.get_many([p.id for p in pkgs] + ["missing"])
+    assert len(found) == 1000
+
+    results = await repo.transition_many([
+        (pkgs[0].id, PackageStatus.READY, PackageStatus.IN_TRANSIT),
+        ("missing", PackageStatus.READY, PackageStatus.IN_TRANSIT),
+        (pkgs[0].id, PackageStatus.READY, PackageStatus.IN_TRANSIT),
+    ])
+    assert results[0].status == PackageStatus.IN_TRANSIT
+    assert isinstance(results[1], PackageNotFoundError)
+    assert isinstance(results[2], StaleStatusError)
+
+    counts = await repo.count_by_status()
+    assert counts[PackageStatus.READY] == 999 and counts[PackageStatus.IN_TRANSIT] == 1
+    assert [p.id for p in await repo.list_by_status(PackageStatus.IN_TRANSIT)] == [pkgs[0].id]
+
+@pytest.mark.asyncio
+async def test_keyset_pagination(repo):
+    pkgs = [Package(customer_address=str(i)) for i in range(5)]
+    await repo.preload_packages(pkgs)
+    await repo.transition(pkgs[3].id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+
+    first = await repo.list_page(2)
+    second = await repo.list_page(2, after=first[-1].id)
+    assert [p.id for p in first + second] == [p.id for p in pkgs[:4]]
+    in_transit = await repo.list_page(10, after=pkgs[0].id, status=PackageStatus.IN_TRANSIT)
+    assert [p.id for p in in_transit] == [pkgs[3].id]
+    with pytest.raises(PackageNotFoundError):
+        await repo.list_page(2, after="unknown-cursor")
+
+@pytest.mark.asyncio
+async def test_preload_if_empty_loads_once_across_instances(tmp_path):
+    database = str(tmp_path / "shared.db")
+    workers = [SQLPackageRepository(database, pool_size=1) for _ in range(2)]
+    for worker in workers:
+        await worker.open()
+    try:
+        loaded = await asyncio.gather(*(
+            worker.preload_if_empty([Package(customer_address=str(i)) for i in range(4)])
+            for worker in workers
+        ))
+        assert sorted(loaded) == [False, True]
+        assert len(await workers[0].list_all()) == 4
+    finally:
+        for worker in workers:
+            await worker.close()
+
+@pytest.mark.asyncio
+async def test_insert_missing_leaves_stored_packages_untouched(repo):
+    stored = Package(customer_address="A")
+    await repo.save(stored)
+    await repo.transition(stored.id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    fresh = [Package(customer_address=str(i)) for i in range(400)]
+
+    existing = await repo.insert_missing([Package(customer_address="B", package_id=stored.id)] + fresh)
+
+    assert existing == [stored.id]
+    kept = await repo.get_by_id(stored.id)
+    assert (kept.status, kept.customer_address) == (PackageStatus.IN_TRANSIT, "A")
+    assert len(await repo.get_many([p.id for p in fresh])) == 400
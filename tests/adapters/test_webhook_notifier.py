@@ -0,0 +1,144 @@
+import asyncio
+import http
+import json
+import pytest
+from src.adapters.notification.webhook_notifier import WebhookNotifier
+from src.adapters.outbox.dispatcher import OutboxDispatcher
+from src.adapters.outbox.file_outbox import FileOutbox
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.ports.notification import NotificationDeliveryError, NotificationRejectedError
+from src.ports.outbox import OutboxEvent
+
+
+class StandInWebhookServer:
+    """
+    Minimal local HTTP/1.1 server standing in for the external webhook.
+    Answers the first `failures` requests with `failure_code`, then 200,
+    and records every received JSON body.
+    """
+
+    def __init__(self, failures: int = 0, failure_code: int = 503):
+        self.failures = failures
+        self.failure_code = failure_code
+        self.requests = []
+        self._server = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/events"
+
+    async def _handle(self, reader, writer):
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.decode().partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            self.requests.append(json.loads(body))
+
+            code = self.failure_code if self.failures else 200
+            reason = http.HTTPStatus(code).phrase
+            self.failures = max(0, self.failures - 1)
+            writer.write(f"HTTP/1.1 {code} {reason}\r\ncontent-length: 0\r\n\r\n".encode())
+            await writer.drain()
+        writer.close()
+
+
+def _events(*addresses):
+    return [
+        OutboxEvent(i, Package(customer_address=a).id, PackageStatus.IN_TRANSIT, PackageStatus.READY, a, 100.0 + i)
+        for i, a in enumerate(addresses, start=1)
+    ]
+
+def _delivered_ids(server):
+    return [event["package_id"] for request in server.requests for event in request["events"]]
+
+
+@pytest.mark.asyncio
+async def test_batch_is_posted_in_one_request():
+    async with StandInWebhookServer() as server:
+        notifier = WebhookNotifier(server.url)
+        await notifier.start()
+        events = _events("A", "B", "C")
+        await notifier.deliver_status_changes(events)
+        await notifier.stop()
+
+    assert _delivered_ids(server) == [e.package_id for e in events]
+    assert len(server.requests) == 1
+    assert server.requests[0]["events"][0] == {
+        "event_id": 1,
+        "package_id": events[0].package_id,
+        "status": "IN_TRANSIT",
+        "previous_status": "READY",
+        "customer_address": "A",
+        "at": 101.0,
+    }
+    stats = notifier.stats()
+    assert stats.delivered == 3 and stats.batches_sent == 1 and stats.failed == 0
+
+@pytest.mark.asyncio
+async def test_delivery_raises_when_the_webhook_gives_no_ack():
+    async with StandInWebhookServer(failures=2) as server:
+        notifier = WebhookNotifier(server.url)
+        await notifier.start()
+        events = _events("A", "B")
+        # One attempt per call: retrying is up to the caller
+        for _ in range(2):
+            with pytest.raises(NotificationDeliveryError) as e:
+                await notifier.deliver_status_changes(events)
+            assert not isinstance(e.value, NotificationRejectedError)
+        await notifier.deliver_status_changes(events)
+        await notifier.stop()
+
+    assert len(server.requests) == 3
+    assert _delivered_ids(server)[-2:] == [e.package_id for e in events]
+    stats = notifier.stats()
+    assert stats.delivered == 2 and stats.failed == 0
+
+@pytest.mark.asyncio
+async def test_rejected_batch_raises_rejected_error():
+    async with StandInWebhookServer(failures=1, failure_code=400) as server:
+        notifier = WebhookNotifier(server.url)
+        await notifier.start()
+        with pytest.raises(NotificationRejectedError):
+            await notifier.deliver_status_changes(_events("A"))
+        await notifier.deliver_status_changes(_events("B"))
+        await notifier.stop()
+
+    assert len(server.requests) == 2
+    stats = notifier.stats()
+    assert stats.failed == 1 and stats.delivered == 1
+
+@pytest.mark.asyncio
+async def test_outbox_dispatcher_retries_the_webhook_until_it_accepts():
+    async with StandInWebhookServer(failures=2) as server:
+        notifier = WebhookNotifier(server.url)
+        await notifier.start()
+        outbox = FileOutbox()
+        await outbox.open()
+        dispatcher = OutboxDispatcher(outbox, notifier, backoff_base=0.01)
+        pkg = Package(customer_address="A")
+        pkg.status = PackageStatus.IN_TRANSIT
+        outbox.on_status_changed(pkg, PackageStatus.READY)
+        dispatcher.start()
+        await dispatcher.stop()
+        await notifier.stop()
+        await outbox.close()
+
+    assert len(server.requests) == 3
+    assert _delivered_ids(server) == [pkg.id] * 3
+    assert server.requests[-1]["events"][0]["previous_status"] == "READY"
+    assert outbox.pending() == 0
@@ -0,0 +1,162 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+
+from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
+from src.api.admission import AdmissionRejectedError, ConcurrencyLimiter, TokenBucketLimiter
+from src.api.dependencies import build_container
+from src.api.main import create_app
+from src.config import settings
+from src.domain.entities import Package
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_allows_bursts_then_the_refill_rate():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(rate=2, burst=3, clock=clock)
+
+    for _ in range(3):
+        limiter.acquire("scanner-1")
+    with pytest.raises(AdmissionRejectedError) as e:
+        limiter.acquire("scanner-1")
+    assert e.value.retry_after == pytest.approx(0.5)
+    # Other keys have their own bucket
+    limiter.acquire("scanner-2")
+
+    clock.now = 0.5
+    limiter.acquire("scanner-1")
+    with pytest.raises(AdmissionRejectedError):
+        limiter.acquire("scanner-1")
+
+def test_token_bucket_keeps_a_bounded_number_of_keys():
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=2, clock=FakeClock())
+    for key in ("a", "b", "c"):
+        limiter.acquire(key)
+    assert len(limiter) == 2
+    # "a" was forgotten: it starts again with a full bucket
+    limiter.acquire("a")
+
+@pytest.mark.asyncio
+async def test_concurrency_limiter_queues_in_order_then_sheds():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1, max_queue_delay=0.05)
+    order = []
+    release = asyncio.Event()
+
+    async def update(name):
+        async with limiter.slot():
+            order.append(name)
+            await release.wait()
+
+    first = asyncio.create_task(update("first"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(update("second"))
+    await asyncio.sleep(0)
+    assert (limiter.in_flight, limiter.queued) == (1, 1)
+
+    # The queue is full
+    with pytest.raises(AdmissionRejectedError):
+        await update("third")
+
+    release.set()
+    await asyncio.gather(first, second)
+    assert order == ["first", "second"]
+    assert (limiter.in_flight, limiter.queued) == (0, 0)
+
+@pytest.mark.asyncio
+async def test_concurrency_limiter_sheds_after_the_queue_delay():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=10, max_queue_delay=0.01)
+    async with limiter.slot():
+        with pytest.raises(AdmissionRejectedError) as e:
+            async with limiter.slot():
+                pass
+        assert e.value.retry_after == 0.01
+        assert limiter.queued == 0
+    # The slot was released
+    async with limiter.slot():
+        assert limiter.in_flight == 1
+
+@pytest.mark.asyncio
+async def test_concurrency_limiter_passes_on_a_slot_of_a_cancelled_waiter():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=10, max_queue_delay=1)
+    async with limiter.slot():
+        waiter = asyncio.create_task(limiter.slot().__aenter__())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+    assert (limiter.in_flight, limiter.queued) == (0, 0)
+
+def test_patch_over_the_rate_limit_gets_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_per_second", 0.1)
+    monkeypatch.setattr(settings, "rate_limit_burst", 2)
+    monkeypatch.setattr(settings, "rate_limit_client_header", "X-Scanner-Id")
+    repository = InMemoryPackageRepository()
+    pkg = Package(customer_address="Calle Limit 1")
+
+    with TestClient(create_app(build_container(repository=repository), configure_logging=False)) as client:
+        client.portal.call(repository.preload_packages, [pkg])
+        headers = {"X-Scanner-Id": "scanner-1"}
+        for _ in range(2):
+            response = client.patch(f"/packages/{pkg.id}/status", json={"status": "IN_TRANSIT"}, headers=headers)
+            assert response.status_code == 200
+        response = client.patch(f"/packages/{pkg.id}/status", json={"status": "IN_TRANSIT"}, headers=headers)
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "10"
+
+        # Another scanner, and another route, have their own budget
+        response = client.patch(
+            f"/packages/{pkg.id}/status", json={"status": "IN_TRANSIT"}, headers={"X-Scanner-Id": "scanner-2"}
+        )
+        assert response.status_code == 200
+        response = client.patch(
+            "/packages/status:batch", json={"items": [{"package_id": pkg.id, "status": "DELIVERED"}]}, headers=headers
+        )
+        assert response.status_code == 200
+
+def test_patch_is_shed_with_503_when_overloaded(monkeypatch):
+    monkeypatch.setattr(settings, "admission_max_concurrency", 1)
+    monkeypatch.setattr(settings, "admission_max_queue", 0)
+    app = create_app(build_container(repository=InMemoryPackageRepository()), configure_logging=False)
+    slot = app.state.container.concurrency_limiter.slot()
+
+    with TestClient(app) as client:
+        # Another update holds the only slot
+        client.portal.call(slot.__aenter__)
+        response = client.patch("/packages/fake-id/status", json={"status": "IN_TRANSIT"})
+        batch = client.patch("/packages/status:batch", json={"items": [{"package_id": "fake-id", "status": "LOST"}]})
+        client.portal.call(slot.__aexit__, None, None, None)
+
+        assert response.status_code == batch.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert client.patch("/packages/fake-id/status", json={"status": "IN_TRANSIT"}).status_code == 404
+
+def test_idempotent_retry_is_replayed_when_overloaded(monkeypatch):
+    monkeypatch.setattr(settings, "admission_max_concurrency", 1)
+    monkeypatch.setattr(settings, "admission_max_queue", 0)
+    repository = InMemoryPackageRepository()
+    pkg = Package(customer_address="Calle Replay 1")
+    app = create_app(build_container(repository=repository), configure_logging=False)
+    slot = app.state.container.concurrency_limiter.slot()
+
+    with TestClient(app) as client:
+        client.portal.call(repository.preload_packages, [pkg])
+        url, body = f"/packages/{pkg.id}/status", {"status": "IN_TRANSIT"}
+        assert client.patch(url, json=body, headers={"Idempotency-Key": "k-1"}).status_code == 200
+
+        client.portal.call(slot.__aenter__)
+        retry = client.patch(url, json=body, headers={"Idempotency-Key": "k-1"})
+        new = client.patch(url, json=body, headers={"Idempotency-Key": "k-2"})
+        client.portal.call(slot.__aexit__, None, None, None)
+
+        assert retry.status_code == 200
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert new.status_code == 503
+        # The shed request was not cached: its retry runs
+        retry = client.patch(url, json=body, headers={"Idempotency-Key": "k-2"})
+        assert retry.status_code == 200 and "Idempotent-Replayed" not in retry.headers
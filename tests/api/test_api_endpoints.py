@@ -1,11 +1,21 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime
 import pytest
 from fastapi.testclient import TestClient
-from src.api.main import app
+from src.adapters.outbox.file_outbox import FileOutbox
+from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
+from src.api.dependencies import build_container
+from src.api.main import app, create_app
+from src.api.routers import OUTBOX_COMMIT_FAILURES
+from src.domain.entities import Package
 from src.domain.enums import PackageStatus
 
 @pytest.fixture(scope="module")
 def client():
     with TestClient(app) as c:
+        c.portal.call(app.state.warmup.wait)
         yield c
 
 def test_healthcheck(client):
@@ -40,6 +50,80 @@ def test_patch_success_and_list_reflects_change(client):
     updated = next(p for p in all_pkgs2 if p["id"] == pkg_id)
     assert updated["status"] == "IN_TRANSIT"
 
+def test_patch_retried_after_success_returns_200(client):
+    # Moved to IN_TRANSIT by the previous test: the retry is a no-op
+    pkg_id = client.get("/packages").json()[0]["id"]
+
+    response = client.patch(f"/packages/{pkg_id}/status", json={"status": "IN_TRANSIT"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "IN_TRANSIT"
+
+async def _wait_until_delivered(outbox):
+    while outbox.pending():
+        await asyncio.sleep(0.01)
+
+def test_patch_with_idempotency_key_replays_without_notifying(client, monkeypatch):
+    notified = []
+
+    async def deliver(events):
+        notified.extend(event.package_id for event in events)
+
+    container = app.state.container
+    client.portal.call(_wait_until_delivered, container.outbox)
+    monkeypatch.setattr(container.notification_adapter, "deliver_status_changes", deliver)
+    pkg_id = client.get("/packages").json()[0]["id"]
+    headers = {"Idempotency-Key": f"scan-{pkg_id}"}
+
+    first = client.patch(f"/packages/{pkg_id}/status", json={"status": "DELIVERED"}, headers=headers)
+    retry = client.patch(f"/packages/{pkg_id}/status", json={"status": "DELIVERED"}, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    client.portal.call(_wait_until_delivered, container.outbox)
+    assert notified == [pkg_id]
+
+    # Same key, different request
+    reused = client.patch(f"/packages/{pkg_id}/status", json={"status": "LOST"}, headers=headers)
+    assert reused.status_code == 422
+
+def test_patch_answers_once_its_notification_is_on_disk(tmp_path):
+    repository = InMemoryPackageRepository()
+    pkg = Package(customer_address="Calle Outbox 1")
+    path = tmp_path / "outbox.log"
+    # Long enough for the PATCH to answer first if it did not wait
+    outbox = FileOutbox(str(path), commit_interval=0.2)
+    container = build_container(repository=repository, outbox=outbox)
+
+    with TestClient(create_app(container, configure_logging=False)) as client:
+        client.portal.call(repository.preload_packages, [pkg])
+        # No receiver: the event stays in the outbox
+        client.portal.call(container.outbox_dispatcher.stop, 0)
+        response = client.patch(f"/packages/{pkg.id}/status", json={"status": "IN_TRANSIT"})
+        assert response.status_code == 200
+        assert pkg.id.encode() in path.read_bytes()
+
+def test_patch_is_answered_when_the_outbox_cannot_be_written(tmp_path, monkeypatch):
+    repository = InMemoryPackageRepository()
+    pkg = Package(customer_address="Calle Outbox 2")
+    outbox = FileOutbox(str(tmp_path / "outbox.log"), commit_interval=0)
+    container = build_container(repository=repository, outbox=outbox)
+
+    def disk_full(lines):
+        raise OSError(28, "No space left on device")
+
+    with TestClient(create_app(container, configure_logging=False)) as client:
+        client.portal.call(repository.preload_packages, [pkg])
+        client.portal.call(container.outbox_dispatcher.stop, 0)
+        monkeypatch.setattr(outbox, "_write_lines", disk_full)
+        failures = OUTBOX_COMMIT_FAILURES.value
+        response = client.patch(f"/packages/{pkg.id}/status", json={"status": "IN_TRANSIT"})
+        assert response.status_code == 200
+        assert response.json()["status"] == "IN_TRANSIT"
+        assert OUTBOX_COMMIT_FAILURES.value == failures + 1
+        # Applied, and its notification still pending
+        assert outbox.pending() == 1
+
 def test_patch_not_found_returns_404(client):
     response = client.patch("/packages/fake-id/status", json={"status": "IN_TRANSIT"})
     assert response.status_code == 404
@@ -62,4 +146,201 @@ def test_patch_with_invalid_status_enum_returns_422(client):
     all_pkgs = client.get("/packages").json()
     pkg_id = all_pkgs[0]["id"]
     response = client.patch(f"/packages/{pkg_id}/status", json={"status": "NOT_A_STATUS"})
-    assert response.status_code == 422
\ No newline at end of file
+    assert response.status_code == 422
+
+def test_patch_batch_reports_per_item_results(client):
+    all_pkgs = client.get("/packages").json()
+    ready_id = next(p["id"] for p in all_pkgs if p["status"] == "READY")
+
+    response = client.patch("/packages/status:batch", json={"items": [
+        {"package_id": ready_id, "status": "IN_TRANSIT"},
+        {"package_id": "fake-id", "status": "IN_TRANSIT"},
+        {"package_id": ready_id, "status": "READY"},
+    ]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["updated"] == 1 and body["unchanged"] == 0 and body["failed"] == 2
+    assert [r["status_code"] for r in body["results"]] == [200, 404, 400]
+    assert body["results"][0]["package"]["status"] == "IN_TRANSIT"
+
+def test_patch_batch_empty_returns_422(client):
+    response = client.patch("/packages/status:batch", json={"items": []})
+    assert response.status_code == 422
+
+def test_list_packages_paginated_with_cursor(client):
+    all_ids = [p["id"] for p in client.get("/packages").json()]
+
+    first = client.get("/packages", params={"limit": 2})
+    assert first.status_code == 200
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get("/packages", params={"limit": 2, "after": cursor})
+
+    assert [p["id"] for p in first.json() + second.json()] == all_ids[:4]
+
+def test_list_packages_unknown_cursor_returns_400(client):
+    response = client.get("/packages", params={"limit": 2, "after": "fake-id"})
+    assert response.status_code == 400
+
+def test_list_packages_filtered_by_status(client):
+    response = client.get("/packages", params={"status": "READY"})
+    assert response.status_code == 200
+    assert response.json() and all(p["status"] == "READY" for p in response.json())
+
+def test_list_packages_ndjson_stream(client):
+    response = client.get("/packages", headers={"Accept": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [p["id"] for p in lines] == [p["id"] for p in client.get("/packages").json()]
+
+def test_package_stats_matches_listing(client):
+    all_pkgs = client.get("/packages").json()
+    response = client.get("/packages/stats")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == len(all_pkgs)
+    for package_status in ("READY", "IN_TRANSIT", "DELIVERED"):
+        assert body["by_status"][package_status] == sum(p["status"] == package_status for p in all_pkgs)
+
+def _new_package(client) -> str:
+    package_id = str(uuid.uuid4())
+    manifest = json.dumps({"id": package_id, "customer_address": "Calle Nueva 1"})
+    client.post("/packages:bulk", content=manifest, headers={"Content-Type": "application/x-ndjson"})
+    return package_id
+
+def test_list_packages_conditional_get_returns_304_until_a_change(client):
+    first = client.get("/packages")
+    etag = first.headers["ETag"]
+    assert client.get("/packages", params={"limit": 2}).headers["ETag"] == etag
+
+    not_modified = client.get("/packages", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    # The NDJSON representation has its own ETag
+    assert client.get(
+        "/packages", headers={"If-None-Match": etag, "Accept": "application/x-ndjson"}
+    ).status_code == 200
+
+    _new_package(client)
+    changed = client.get("/packages", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+def test_package_changes_since_a_listing_version(client):
+    pkg_id = _new_package(client)
+    version = int(client.get("/packages").headers["ETag"].strip('"'))
+    client.patch(f"/packages/{pkg_id}/status", json={"status": "IN_TRANSIT"})
+    client.patch(f"/packages/{pkg_id}/status", json={"status": "DELIVERED"})
+
+    response = client.get("/packages/changes", params={"since": version})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["more"] is False
+    assert [(p["id"], p["status"]) for p in body["packages"]] == [(pkg_id, "DELIVERED")]
+
+    caught_up = client.get("/packages/changes", params={"since": body["version"]}).json()
+    assert caught_up["packages"] == [] and caught_up["version"] == body["version"]
+
+    assert client.get("/packages/changes", params={"since": 0}).status_code == 410
+
+def test_metrics_exposes_request_latency_outcomes_and_repository_size(client):
+    pkg_id = client.get("/packages", params={"status": "READY"}).json()[0]["id"]
+    client.patch(f"/packages/{pkg_id}/status", json={"status": "IN_TRANSIT"})
+    client.patch("/packages/fake-id/status", json={"status": "IN_TRANSIT"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'http_request_duration_seconds_count{method="PATCH",route="/packages/{package_id}/status"}' in text
+    assert 'http_requests_total{method="PATCH",route="/packages/{package_id}/status",status="404"}' in text
+    assert 'package_status_updates_total{outcome="updated"}' in text
+    assert 'package_status_updates_total{outcome="not_found"}' in text
+    assert "repository_lock_wait_seconds_count" in text
+    stats = client.get("/packages/stats").json()
+    for status_name, count in stats["by_status"].items():
+        assert f'repository_packages{{status="{status_name}"}} {count}' in text
+
+def test_bulk_ingestion_of_ndjson_and_csv_manifests(client):
+    total = client.get("/packages/stats").json()["total"]
+
+    ndjson = '{"customer_address": "Calle Bulk 1"}\n{"customer_address": ""}\n'
+    response = client.post("/packages:bulk", content=ndjson, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["received"], body["inserted"], body["rejected"]) == (2, 1, 1)
+    assert body["errors"][0]["line"] == 2
+
+    csv_body = 'customer_address,status\n"Calle Bulk 2, Madrid",READY\n'
+    response = client.post("/packages:bulk", content=csv_body, headers={"Content-Type": "text/csv"})
+    assert response.json()["inserted"] == 1
+
+    assert client.get("/packages/stats").json()["total"] == total + 2
+
+def test_bulk_ingestion_rejects_unknown_media_type(client):
+    response = client.post("/packages:bulk", content="[]", headers={"Content-Type": "application/json"})
+    assert response.status_code == 415
+
+def _moment(text):
+    return datetime.fromisoformat(text.replace("Z", "+00:00"))
+
+def test_package_history_lists_its_transitions(client):
+    pkg_id = _new_package(client)
+    client.patch(f"/packages/{pkg_id}/status", json={"status": "IN_TRANSIT"})
+    client.patch(f"/packages/{pkg_id}/status", json={"status": "IN_TRANSIT"})
+    client.patch("/packages/status:batch", json={"items": [{"package_id": pkg_id, "status": "DELIVERED"}]})
+
+    response = client.get(f"/packages/{pkg_id}/history")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "DELIVERED"
+    assert [(t["from_status"], t["to_status"]) for t in body["transitions"]] == [
+        ("READY", "IN_TRANSIT"),
+        ("IN_TRANSIT", "DELIVERED"),
+    ]
+
+    # Known only since this process started
+    assert _moment(body["recorded_since"]) <= _moment(body["transitions"][0]["at"])
+
+    later = client.get(f"/packages/{pkg_id}/history", params={"start": "2999-01-01T00:00:00"})
+    assert later.json()["transitions"] == []
+    assert client.get("/packages/fake-id/history").status_code == 404
+
+def test_transition_counts_by_hour(client):
+    before = client.get("/packages/history/hourly").json()
+    pkg_id = _new_package(client)
+    client.patch(f"/packages/{pkg_id}/status", json={"status": "IN_TRANSIT"})
+
+    after = client.get("/packages/history/hourly").json()
+    assert after["total"] == before["total"] + 1
+    assert after["by_status"]["IN_TRANSIT"] == before["by_status"].get("IN_TRANSIT", 0) + 1
+    assert after["hours"][-1]["total"] >= 1
+    assert _moment(after["recorded_since"]) <= _moment(after["end"])
+
+    assert client.get("/packages/history/hourly", params={
+        "start": "2024-01-01T00:00:00", "end": "2024-03-01T00:00:00",
+    }).status_code == 400
+
+def test_get_single_package(client):
+    pkg_id = _new_package(client)
+
+    response = client.get(f"/packages/{pkg_id}")
+    assert response.status_code == 200
+    assert response.json() == {"id": pkg_id, "status": "READY", "customer_address": "Calle Nueva 1"}
+
+    client.patch(f"/packages/{pkg_id}/status", json={"status": "IN_TRANSIT"})
+    assert client.get(f"/packages/{pkg_id}").json()["status"] == "IN_TRANSIT"
+    assert client.get("/packages/fake-id").status_code == 404
+    # Fixed paths are not taken for package ids
+    assert "total" in client.get("/packages/stats").json()
+
+def test_lookup_many_packages(client):
+    first, second = _new_package(client), _new_package(client)
+
+    response = client.post("/packages:lookup", json={"ids": [second, "fake-id", first, second]})
+    assert response.status_code == 200
+    body = response.json()
+    assert [p["id"] for p in body["packages"]] == [second, first]
+    assert body["missing"] == ["fake-id"]
+
+    assert client.post("/packages:lookup", json={"ids": []}).status_code == 422
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
+from src.api.dependencies import build_container
+from src.api.main import create_app
+from src.config import settings
+from src.domain.entities import Package
+
+
+class GatedRepository(InMemoryPackageRepository):
+    """
+    Holds the warm-up's preload until released, or fails it.
+    """
+
+    def __init__(self, fail=False):
+        super().__init__()
+        self.fail = fail
+        self.release = None
+
+    async def preload_if_empty(self, packages):
+        self.release = asyncio.Event()
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("storage unavailable")
+        return await super().preload_if_empty(packages)
+
+
+class SlowRecoveryRepository(InMemoryPackageRepository):
+    """
+    Holds open(), i.e. the recovery of persisted state, until released.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+
+    async def open(self):
+        await self.release.wait()
+        await super().open()
+
+
+def test_apps_serve_their_own_injected_adapters():
+    first = create_app(build_container(repository=InMemoryPackageRepository()), configure_logging=False)
+    second = create_app(build_container(repository=InMemoryPackageRepository()), configure_logging=False)
+
+    with TestClient(first) as client:
+        client.portal.call(first.state.warmup.wait)
+        assert len(client.get("/packages").json()) == len(settings.preload_addresses)
+    # Never started: nothing loaded, and not ready
+    client = TestClient(second)
+    assert client.get("/packages").json() == []
+    assert client.get("/health").status_code == 503
+
+def test_health_is_503_until_warmup_completes():
+    repository = GatedRepository()
+    app = create_app(build_container(repository=repository), configure_logging=False)
+
+    with TestClient(app) as client:
+        response = client.get("/health")
+        assert response.status_code == 503
+        assert response.json() == {"status": "starting"}
+
+        client.portal.call(repository.release.set)
+        client.portal.call(app.state.warmup.wait)
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
+
+def test_routes_answer_503_while_the_repository_is_recovered():
+    repository = SlowRecoveryRepository()
+    app = create_app(build_container(repository=repository), configure_logging=False)
+
+    with TestClient(app) as client:
+        assert client.get("/health").json() == {"status": "recovering"}
+        response = client.get("/packages")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+        client.portal.call(repository.release.set)
+        client.portal.call(app.state.warmup.wait)
+        assert client.get("/health").status_code == 200
+        assert len(client.get("/packages").json()) == len(settings.preload_addresses)
+
+def test_health_reports_a_failed_warmup():
+    repository = GatedRepository(fail=True)
+    app = create_app(build_container(repository=repository), configure_logging=False)
+
+    with TestClient(app) as client:
+        client.portal.call(repository.release.set)
+        client.portal.call(app.state.warmup.wait)
+        response = client.get("/health")
+        assert response.status_code == 503
+        assert response.json() == {"status": "failed"}
+
+def test_seed_manifest_is_loaded_in_the_background(tmp_path, monkeypatch):
+    manifest = tmp_path / "seed.ndjson"
+    manifest.write_text("".join(json.dumps({"customer_address": f"Calle Seed {i}"}) + "\n" for i in range(25)))
+    monkeypatch.setattr(settings, "seed_manifest", str(manifest))
+    monkeypatch.setattr(settings, "warmup_chunk_size", 10)
+    app = create_app(build_container(repository=InMemoryPackageRepository()), configure_logging=False)
+
+    with TestClient(app) as client:
+        client.portal.call(app.state.warmup.wait)
+        assert client.get("/health").status_code == 200
+        addresses = [p["customer_address"] for p in client.get("/packages").json()]
+    # The manifest replaces the default preload addresses
+    assert sorted(addresses) == sorted(f"Calle Seed {i}" for i in range(25))
+
+@pytest.mark.asyncio
+async def test_seed_manifest_is_skipped_when_packages_were_recovered(tmp_path, monkeypatch):
+    manifest = tmp_path / "seed.csv"
+    manifest.write_text("customer_address\nCalle Seed 1\n")
+    monkeypatch.setattr(settings, "seed_manifest", str(manifest))
+    repository = InMemoryPackageRepository()
+    await repository.preload_packages([Package(customer_address="Calle Recovered 1")])
+    warmup = create_app(build_container(repository=repository), configure_logging=False).state.warmup
+
+    warmup.start()
+    await warmup.wait()
+    assert warmup.ready
+    assert [p.customer_address for p in await repository.list_all()] == ["Calle Recovered 1"]
@@ -3,7 +3,6 @@ import asyncio
 from httpx import AsyncClient, ASGITransport
 
 from src.api.main import app
-from src.api.routers import repository
 from src.domain.entities import Package
 from src.domain.enums import PackageStatus
 
@@ -16,8 +15,10 @@ async def test_concurrent_patch_status():
     without any race conditions.
     """
 
+    repository = app.state.container.repository
+
     # 1) Clear the in-memory storage to remove any lingering packages
-    repository._storage.clear()
+    await repository.clear()
 
     # 2) Preload a single new package in state READY
     new_pkg = Package(customer_address="Test Address for Concurrency")
@@ -59,8 +60,6 @@ async def test_concurrent_patch_status():
         assert resp2.status_code == 200
 
         # 8) Finally, fetch the package and confirm its state is DELIVERED
-        final_resp = await async_client.get("/packages")
-        data = final_resp.json()
-        pkg = next((p for p in data if p["id"] == pkg_id), None)
-        assert pkg is not None
-        assert pkg["status"] == "DELIVERED"
\ No newline at end of file
+        final_resp = await async_client.get(f"/packages/{pkg_id}")
+        assert final_resp.status_code == 200
+        assert final_resp.json()["status"] == "DELIVERED"
\ No newline at end of file
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import time
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from httpx import AsyncClient, ASGITransport
+
+from src.api.main import app
+from src.domain.entities import Package
+
+broadcaster = app.state.container.broadcaster
+repository = app.state.container.repository
+
+
+async def wait_for_subscribers(count):
+    for _ in range(100):
+        if len(broadcaster) == count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"expected {count} subscribers, got {len(broadcaster)}")
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if fields:
+            events.append((fields["event"], fields["data"]))
+    return events
+
+@pytest.mark.asyncio
+async def test_sse_streams_matching_transitions_until_closed():
+    watched = Package(customer_address="Calle SSE 1")
+    other = Package(customer_address="Calle SSE 2")
+    await repository.preload_packages([watched, other])
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        stream = asyncio.create_task(client.get("/packages/events", params={"package_id": watched.id}))
+        await wait_for_subscribers(1)
+
+        await client.patch(f"/packages/{other.id}/status", json={"status": "IN_TRANSIT"})
+        await client.patch(f"/packages/{watched.id}/status", json={"status": "IN_TRANSIT"})
+        await client.patch(f"/packages/{watched.id}/status", json={"status": "IN_TRANSIT"})
+        await client.patch(f"/packages/status:batch", json={"items": [{"package_id": watched.id, "status": "DELIVERED"}]})
+        # Closing drops the events still queued: let the stream write them first
+        await asyncio.sleep(0.05)
+        broadcaster.close()
+        response = await stream
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert [(name, json.loads(data)["status"]) for name, data in events[:-1]] == [
+        ("status", "IN_TRANSIT"),
+        ("status", "DELIVERED"),
+    ]
+    assert json.loads(events[0][1])["previous_status"] == "READY"
+    assert events[-1] == ("close", "server shutting down")
+    assert len(broadcaster) == 0
+
+@pytest.mark.asyncio
+async def test_sse_rejects_unknown_status_filter():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        response = await client.get("/packages/events", params={"status": "TELEPORTED"})
+    assert response.status_code == 422
+
+def test_websocket_streams_transitions_into_the_filtered_status():
+    client = TestClient(app)
+    pkg_id = str(uuid.uuid4())
+    client.post(
+        "/packages:bulk",
+        content=json.dumps({"id": pkg_id, "customer_address": "Calle WS 1"}) + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    with client.websocket_connect("/packages/events/ws?status=DELIVERED") as websocket:
+        assert len(broadcaster) == 1
+        client.patch(f"/packages/{pkg_id}/status", json={"status": "IN_TRANSIT"})
+        client.patch(f"/packages/{pkg_id}/status", json={"status": "DELIVERED"})
+
+        event = websocket.receive_json()
+        assert event["id"] == pkg_id
+        assert (event["previous_status"], event["status"]) == ("IN_TRANSIT", "DELIVERED")
+
+    # The client left: its subscription goes away
+    for _ in range(100):
+        if not len(broadcaster):
+            break
+        time.sleep(0.01)
+    assert len(broadcaster) == 0
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from src.api.idempotency import IdempotencyCache, IdempotencyKeyReusedError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def counting(outcome="done"):
+    calls = []
+
+    async def operation():
+        calls.append(outcome)
+        await asyncio.sleep(0)
+        return outcome
+
+    return operation, calls
+
+@pytest.mark.asyncio
+async def test_duplicate_gets_the_first_outcome_without_running_again():
+    cache = IdempotencyCache(max_entries=10, ttl=60)
+    operation, calls = counting()
+
+    assert await cache.run("k", "req", operation) == ("done", False)
+    assert await cache.run("k", "req", operation) == ("done", True)
+    assert calls == ["done"]
+
+@pytest.mark.asyncio
+async def test_in_flight_duplicates_share_one_execution():
+    cache = IdempotencyCache(max_entries=10, ttl=60)
+    operation, calls = counting()
+
+    results = await asyncio.gather(*(cache.run("k", "req", operation) for _ in range(5)))
+    assert sorted(replayed for _, replayed in results) == [False, True, True, True, True]
+    assert calls == ["done"]
+
+@pytest.mark.asyncio
+async def test_key_reused_with_another_request_is_rejected():
+    cache = IdempotencyCache(max_entries=10, ttl=60)
+    operation, _ = counting()
+    await cache.run("k", ("pkg", "IN_TRANSIT"), operation)
+
+    with pytest.raises(IdempotencyKeyReusedError):
+        await cache.run("k", ("pkg", "DELIVERED"), operation)
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = IdempotencyCache(max_entries=10, ttl=60, clock=clock)
+    operation, calls = counting()
+    await cache.run("k", "req", operation)
+
+    clock.now = 61
+    assert await cache.run("k", "req", operation) == ("done", False)
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entry_is_evicted():
+    cache = IdempotencyCache(max_entries=2, ttl=60)
+    operation, calls = counting()
+    await cache.run("a", "req", operation)
+    await cache.run("b", "req", operation)
+    await cache.run("a", "req", operation)  # "b" is now the least recently used
+    await cache.run("c", "req", operation)
+
+    assert len(cache) == 2
+    assert (await cache.run("a", "req", operation))[1] is True
+    assert (await cache.run("b", "req", operation))[1] is False
+
+@pytest.mark.asyncio
+async def test_failures_and_uncacheable_outcomes_are_not_kept():
+    cache = IdempotencyCache(max_entries=10, ttl=60)
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await cache.run("k", "req", failing)
+    operation, calls = counting("conflict")
+    await cache.run("k", "req", operation, cacheable=lambda outcome: outcome != "conflict")
+    await cache.run("k", "req", operation, cacheable=lambda outcome: outcome != "conflict")
+    assert len(calls) == 2
+    assert len(cache) == 0
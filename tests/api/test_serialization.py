@@ -0,0 +1,62 @@
+import json
+from typing import List
+from pydantic import TypeAdapter
+from src.api.schemas import PackageResponse
+from src.api.serialization import PACKAGE_ENCODINGS, PackageEncoder
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+
+
+def test_encoding_matches_package_response():
+    packages = [
+        Package(customer_address='Calle "Ñandú" 1, 3º A'),
+        Package(customer_address="Calle 2", status=PackageStatus.IN_TRANSIT),
+    ]
+    expected = TypeAdapter(List[PackageResponse]).dump_json(
+        [PackageResponse.model_validate(p) for p in packages]
+    )
+
+    encoder = PackageEncoder(max_entries=10)
+    assert encoder.encode_array(packages) == expected
+    assert encoder.encode_array([]) == b"[]"
+    lines = encoder.encode_lines(packages).splitlines()
+    assert [json.loads(line) for line in lines] == json.loads(expected)
+
+def test_cached_bytes_follow_the_package_version():
+    encoder = PackageEncoder(max_entries=10)
+    package = Package(customer_address="Calle 1")
+    first = encoder.encode(package)
+    assert encoder.encode(package) is first
+
+    # A new version (copy-on-write) and an in-place change are both re-encoded
+    moved = package.with_status(PackageStatus.IN_TRANSIT)
+    assert json.loads(encoder.encode(moved))["status"] == "IN_TRANSIT"
+    moved.customer_address = "Calle 2"
+    assert json.loads(encoder.encode(moved))["customer_address"] == "Calle 2"
+
+def test_cache_is_bounded():
+    encoder = PackageEncoder(max_entries=2)
+    encoder.encode_many([Package(customer_address=f"Calle {i}") for i in range(5)])
+    assert len(encoder) == 2
+
+    disabled = PackageEncoder(max_entries=0)
+    assert disabled.encode(Package(customer_address="Calle 1"))
+    assert len(disabled) == 0
+
+def test_cache_drops_the_least_recently_used_package():
+    encoder = PackageEncoder(max_entries=2)
+    a, b, c = (Package(customer_address=f"Calle {i}") for i in range(3))
+    first = encoder.encode(a)
+    encoder.encode(b)
+    encoder.encode_many([a])    # b is now the least recently used
+    encoder.encode(c)
+    assert encoder.encode(a) is first
+    assert len(encoder) == 2
+
+def test_listings_larger_than_the_cache_still_hit():
+    encoder = PackageEncoder(max_entries=3)
+    packages = [Package(customer_address=f"Calle {i}") for i in range(5)]
+    encoder.encode_many(packages)
+    hits = PACKAGE_ENCODINGS.labels("hit").value
+    assert encoder.encode_array(packages) == encoder.encode_array(packages)
+    assert PACKAGE_ENCODINGS.labels("hit").value - hits == 6
@@ -25,4 +25,39 @@ def test_invalid_transitions(initial, new_state):
     pkg = Package(customer_address="Calle X")
     pkg.status = initial
     with pytest.raises(InvalidStateTransitionError):
-        PackageDomainService.change_status(pkg, new_state)
\ No newline at end of file
+        PackageDomainService.change_status(pkg, new_state)
+
+def test_validate_transition_does_not_mutate():
+    PackageDomainService.validate_transition(PackageStatus.READY, PackageStatus.IN_TRANSIT)
+    with pytest.raises(InvalidStateTransitionError):
+        PackageDomainService.validate_transition(PackageStatus.READY, PackageStatus.DELIVERED)
+
+@pytest.mark.parametrize(
+    "initial, new_state",
+    [
+        (PackageStatus.IN_TRANSIT, PackageStatus.FAILED_ATTEMPT),
+        (PackageStatus.FAILED_ATTEMPT, PackageStatus.IN_TRANSIT),
+        (PackageStatus.FAILED_ATTEMPT, PackageStatus.RETURNED),
+        (PackageStatus.IN_TRANSIT, PackageStatus.LOST),
+    ],
+)
+def test_exception_flow_transitions(initial, new_state):
+    assert PackageDomainService.can_transition(initial, new_state)
+
+@pytest.mark.parametrize("terminal", [PackageStatus.DELIVERED, PackageStatus.RETURNED, PackageStatus.LOST])
+def test_terminal_statuses_allow_no_transition(terminal):
+    assert not any(PackageDomainService.can_transition(terminal, status) for status in PackageStatus)
+
+def test_batch_check_matches_single_checks():
+    pairs = [(current, new) for current in PackageStatus for new in PackageStatus]
+    allowed = PackageDomainService.can_transition_many([c for c, _ in pairs], [n for _, n in pairs])
+    assert list(allowed) == [int(PackageDomainService.can_transition(c, n)) for c, n in pairs]
+
+def test_validate_transitions_reports_first_rejected_pair():
+    PackageDomainService.validate_transitions(
+        [PackageStatus.READY, PackageStatus.IN_TRANSIT], [PackageStatus.IN_TRANSIT, PackageStatus.DELIVERED]
+    )
+    with pytest.raises(InvalidStateTransitionError, match="DELIVERED -> PackageStatus.READY"):
+        PackageDomainService.validate_transitions(
+            [PackageStatus.READY, PackageStatus.DELIVERED], [PackageStatus.IN_TRANSIT, PackageStatus.READY]
+        )
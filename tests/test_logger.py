@@ -0,0 +1,62 @@
+import json
+import logging
+import queue
+import pytest
+from src.logger import BoundedQueueHandler, JsonFormatter
+from src.metrics import REGISTRY
+
+
+def _record(message: str) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.INFO, __file__, 1, message, None, None)
+
+def _drain(log_queue):
+    messages = []
+    while not log_queue.empty():
+        messages.append(log_queue.get_nowait().getMessage())
+    return messages
+
+def test_drop_policy_discards_new_records_when_full():
+    log_queue = queue.Queue(maxsize=2)
+    handler = BoundedQueueHandler(log_queue, overflow="drop")
+    for message in ("a", "b", "c"):
+        handler.handle(_record(message))
+    assert _drain(log_queue) == ["a", "b"]
+    assert handler.dropped == 1
+
+def test_drop_oldest_policy_keeps_latest_records():
+    log_queue = queue.Queue(maxsize=2)
+    handler = BoundedQueueHandler(log_queue, overflow="drop_oldest")
+    for message in ("a", "b", "c"):
+        handler.handle(_record(message))
+    assert _drain(log_queue) == ["b", "c"]
+    assert handler.dropped == 1
+
+def test_dropped_records_are_exported_in_metrics():
+    log_queue = queue.Queue(maxsize=1)
+    handler = BoundedQueueHandler(log_queue, overflow="drop")
+    root = logging.getLogger()
+    root.addHandler(handler)
+    try:
+        before = _dropped_in_metrics()
+        for message in ("a", "b", "c"):
+            handler.handle(_record(message))
+        assert _dropped_in_metrics() == before + 2
+    finally:
+        root.removeHandler(handler)
+
+def _dropped_in_metrics() -> float:
+    for line in REGISTRY.render().splitlines():
+        if line.startswith("log_records_dropped "):
+            return float(line.split()[1])
+    raise AssertionError("log_records_dropped not exported")
+
+def test_unknown_overflow_policy_is_rejected():
+    with pytest.raises(ValueError):
+        BoundedQueueHandler(queue.Queue(), overflow="explode")
+
+def test_json_formatter_emits_one_object_per_record():
+    record = _record("Package %s updated")
+    record.args = ("abc",)
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["message"] == "Package abc updated"
+    assert payload["level"] == "INFO" and payload["logger"] == "test"
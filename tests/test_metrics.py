@@ -0,0 +1,44 @@
+import pytest
+from src.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+def test_counter_with_labels_renders_one_series_per_label_value():
+    registry = MetricsRegistry()
+    counter = Counter("updates_total", "Updates.", ["outcome"], registry=registry)
+    counter.labels("updated").inc()
+    counter.labels(outcome="updated").inc(2)
+    counter.labels("not_found").inc()
+
+    text = registry.render()
+    assert "# TYPE updates_total counter" in text
+    assert 'updates_total{outcome="updated"} 3' in text
+    assert 'updates_total{outcome="not_found"} 1' in text
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{le="1"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "latency_seconds_count 4" in text
+    assert "latency_seconds_sum 3.65" in text
+
+def test_gauge_function_is_read_at_render_time():
+    registry = MetricsRegistry()
+    gauge = Gauge("queue_depth", "Depth.", registry=registry)
+    depth = [3]
+    gauge.set_function(lambda: depth[0])
+    depth[0] = 7
+    assert "queue_depth 7" in registry.render()
+
+def test_duplicate_names_and_wrong_labels_are_rejected():
+    registry = MetricsRegistry()
+    counter = Counter("things_total", "Things.", ["kind"], registry=registry)
+    with pytest.raises(ValueError):
+        Counter("things_total", "Again.", registry=registry)
+    with pytest.raises(ValueError):
+        counter.labels("a", "b")
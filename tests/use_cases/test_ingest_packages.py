@@ -0,0 +1,54 @@
+import pytest
+from src.use_cases.ingest_packages import IngestPackagesUseCase
+from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
+from src.domain.entities import Package
+from src.domain.enums import PackageStatus
+from src.domain.exceptions import InvalidPackageRecordError
+
+
+async def _records(items):
+    for line, item in enumerate(items, 1):
+        yield line, item
+
+@pytest.mark.asyncio
+async def test_ingest_stores_packages_in_chunks_and_reports_rejections():
+    repo = InMemoryPackageRepository()
+    stored = Package(customer_address="Already here", status=PackageStatus.IN_TRANSIT)
+    await repo.save(stored)
+    chunks = []
+    insert_missing = repo.insert_missing
+
+    async def spy(packages):
+        chunks.append(len(packages))
+        return await insert_missing(packages)
+
+    repo.insert_missing = spy
+    packages = [Package(customer_address=f"Calle {i}") for i in range(5)]
+    records = packages + [
+        InvalidPackageRecordError(6, "customer_address is required"),
+        Package(customer_address="Copy", package_id=packages[0].id),
+        Package(customer_address="Reloaded", package_id=stored.id),
+    ]
+
+    report = await IngestPackagesUseCase(repo, chunk_size=2).execute(_records(records))
+
+    assert (report.received, report.inserted, report.rejected) == (8, 5, 3)
+    assert [error.line for error in report.errors] == [6, 7, 8]
+    assert chunks == [2, 2, 2, 1]
+    # The manifest does not overwrite what is already stored
+    assert (await repo.get_by_id(stored.id)).status == PackageStatus.IN_TRANSIT
+    assert report.packages_per_second > 0
+
+@pytest.mark.asyncio
+async def test_ingest_only_if_empty_loads_nothing_into_a_stored_repository():
+    repo = InMemoryPackageRepository()
+    use_case = IngestPackagesUseCase(repo, chunk_size=2)
+    first = [Package(customer_address=f"Calle {i}") for i in range(3)]
+
+    report = await use_case.execute(_records(first), only_if_empty=True)
+    assert (report.inserted, report.rejected) == (3, 0)
+
+    # Another worker seeding the same (now shared, not empty) state
+    again = [Package(customer_address=f"Calle {i}") for i in range(3)]
+    assert await use_case.execute(_records(again), only_if_empty=True) is None
+    assert sorted(p.id for p in await repo.list_all()) == sorted(p.id for p in first)
@@ -1,5 +1,6 @@
+import asyncio
 import pytest
-from src.use_cases.update_package_status import UpdatePackageStatusUseCase
+from src.use_cases.update_package_status import UpdatePackageStatusUseCase, StatusUpdateOutcome
 from src.adapters.repository.in_memory_repository import InMemoryPackageRepository
 from src.adapters.notification.notification_stub import NotificationStub
 from src.domain.entities import Package
@@ -43,4 +44,148 @@ async def test_execute_invalid_transition():
         
     # We ensure that the repo status remains READY
     still = await repo.get_by_id(pkg.id)
-    assert still.status == PackageStatus.READY
\ No newline at end of file
+    assert still.status == PackageStatus.READY
+
+@pytest.mark.asyncio
+async def test_concurrent_executes_only_one_wins():
+    repo = InMemoryPackageRepository()
+    pkg = Package(customer_address="Test")
+    await repo.save(pkg)
+    use_case = UpdatePackageStatusUseCase(repo)
+
+    results = await asyncio.gather(
+        use_case.execute(pkg.id, PackageStatus.IN_TRANSIT),
+        use_case.execute(pkg.id, PackageStatus.IN_TRANSIT),
+        return_exceptions=True,
+    )
+
+    # The loser re-reads IN_TRANSIT: the duplicate is a no-op, not an error
+    assert all(r.status == PackageStatus.IN_TRANSIT for r in results)
+    assert (await repo.get_by_id(pkg.id)).status == PackageStatus.IN_TRANSIT
+
+@pytest.mark.asyncio
+async def test_execute_retries_after_stale_status():
+    class RacingRepository(InMemoryPackageRepository):
+        """Another writer moves the package right before our first conditional update."""
+        raced = False
+
+        async def transition(self, package_id, expected_status, new_status):
+            if not self.raced:
+                self.raced = True
+                await super().transition(package_id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+            return await super().transition(package_id, expected_status, new_status)
+
+    repo = RacingRepository()
+    pkg = Package(customer_address="Test")
+    await repo.save(pkg)
+    use_case = UpdatePackageStatusUseCase(repo)
+
+    # READY -> IN_TRANSIT loses the race; the retry re-reads IN_TRANSIT
+    # and reports the duplicate as a no-op
+    result = await use_case.execute_one(pkg.id, PackageStatus.IN_TRANSIT)
+    assert result.outcome == StatusUpdateOutcome.UNCHANGED
+    assert result.package.status == PackageStatus.IN_TRANSIT
+
+    updated = await use_case.execute(pkg.id, PackageStatus.DELIVERED)
+    assert updated.status == PackageStatus.DELIVERED
+
+@pytest.mark.asyncio
+async def test_execute_same_status_is_a_noop():
+    repo = InMemoryPackageRepository()
+    pkg = Package(customer_address="Test")
+    await repo.save(pkg)
+    use_case = UpdatePackageStatusUseCase(repo)
+    await use_case.execute(pkg.id, PackageStatus.IN_TRANSIT)
+
+    result = await use_case.execute_one(pkg.id, PackageStatus.IN_TRANSIT)
+    assert result.outcome == StatusUpdateOutcome.UNCHANGED
+    assert result.package.status == PackageStatus.IN_TRANSIT
+
+    results = await use_case.execute_many([
+        (pkg.id, PackageStatus.DELIVERED),
+        (pkg.id, PackageStatus.DELIVERED),
+    ])
+    assert [r.outcome for r in results] == [StatusUpdateOutcome.UPDATED, StatusUpdateOutcome.UNCHANGED]
+    assert results[1].package.status == PackageStatus.DELIVERED
+
+@pytest.mark.asyncio
+async def test_execute_many_reruns_duplicates_of_a_failed_item():
+    class RacingRepository(InMemoryPackageRepository):
+        """Another writer loses the package right before the batch is applied."""
+
+        async def transition_many(self, transitions):
+            package_id = transitions[0][0]
+            await super().transition(package_id, PackageStatus.READY, PackageStatus.IN_TRANSIT)
+            await super().transition(package_id, PackageStatus.IN_TRANSIT, PackageStatus.LOST)
+            return await super().transition_many(transitions)
+
+    repo = RacingRepository()
+    pkg = Package(customer_address="A")
+    await repo.save(pkg)
+
+    results = await UpdatePackageStatusUseCase(repo).execute_many([
+        (pkg.id, PackageStatus.IN_TRANSIT),
+        # A no-op only if the first item had moved it
+        (pkg.id, PackageStatus.IN_TRANSIT),
+    ])
+
+    assert [r.outcome for r in results] == [StatusUpdateOutcome.INVALID_TRANSITION] * 2
+    assert (await repo.get_by_id(pkg.id)).status == PackageStatus.LOST
+
+@pytest.mark.asyncio
+async def test_execute_many_reports_per_item_outcomes():
+    repo = InMemoryPackageRepository()
+    ready = Package(customer_address="A")
+    chained = Package(customer_address="B")
+    await repo.preload_packages([ready, chained])
+    use_case = UpdatePackageStatusUseCase(repo)
+
+    results = await use_case.execute_many([
+        (ready.id, PackageStatus.IN_TRANSIT),
+        ("fake-id", PackageStatus.IN_TRANSIT),
+        (chained.id, PackageStatus.DELIVERED),
+        # Validated against the status left by the previous item for the same package
+        (chained.id, PackageStatus.IN_TRANSIT),
+        (chained.id, PackageStatus.DELIVERED),
+    ])
+
+    assert [r.outcome for r in results] == [
+        StatusUpdateOutcome.UPDATED,
+        StatusUpdateOutcome.NOT_FOUND,
+        StatusUpdateOutcome.INVALID_TRANSITION,
+        StatusUpdateOutcome.UPDATED,
+        StatusUpdateOutcome.UPDATED,
+    ]
+    assert results[0].package.status == PackageStatus.IN_TRANSIT
+    assert (await repo.get_by_id(chained.id)).status == PackageStatus.DELIVERED
+
+@pytest.mark.asyncio
+async def test_listeners_see_every_stored_transition_only():
+    class Recorder:
+        def __init__(self):
+            self.seen = []
+
+        def on_status_changed(self, package, previous_status):
+            self.seen.append((package.id, previous_status, package.status))
+
+    class Broken:
+        def on_status_changed(self, package, previous_status):
+            raise RuntimeError("boom")
+
+    repo = InMemoryPackageRepository()
+    pkg = Package(customer_address="A")
+    await repo.save(pkg)
+    recorder = Recorder()
+    use_case = UpdatePackageStatusUseCase(repo, listeners=[Broken(), recorder])
+
+    await use_case.execute(pkg.id, PackageStatus.IN_TRANSIT)
+    await use_case.execute_one(pkg.id, PackageStatus.IN_TRANSIT)
+    await use_case.execute_many([
+        (pkg.id, PackageStatus.DELIVERED),
+        (pkg.id, PackageStatus.READY),
+    ])
+
+    assert recorder.seen == [
+        (pkg.id, PackageStatus.READY, PackageStatus.IN_TRANSIT),
+        (pkg.id, PackageStatus.IN_TRANSIT, PackageStatus.DELIVERED),
+    ]